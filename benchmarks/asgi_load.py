@@ -0,0 +1,243 @@
+"""In-process ASGI load benchmark for the example apps
+
+Drives each app through its ASGI interface with no network sockets, at one
+or more concurrency levels, and reports requests/sec, latency percentiles,
+bytes per response and memory blocks allocated per request:
+
+    poetry run python benchmarks/asgi_load.py
+    poetry run python benchmarks/asgi_load.py main.py --requests 2000 -c 1 -c 16
+    poetry run python benchmarks/asgi_load.py --output benchmarks/results-asgi.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import runpy
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from ugui import App
+
+ROOT = Path(__file__).parent.parent
+APPS = ["main.py", "examples/02-components.py", "examples/picocss/main.py"]
+
+
+def load_app(path: Path) -> App:
+    """Import an example without starting its server, with its routes added"""
+    # The examples only call app.run() when run as a script
+    with quiet():
+        namespace = runpy.run_path(str(path), run_name="__benchmark__")
+    apps = [value for value in namespace.values() if isinstance(value, App)]
+    if not apps:
+        raise ValueError(f"No ugui App found in {path}")
+    app = apps[0]
+    app._register_pages()
+    return app
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence stdout, pages print diagnostics while rendering"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+class ASGIClient:
+    """Minimal in-process ASGI driver"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan = None
+        self._lifespan_messages = asyncio.Queue()
+        self._lifespan_events = asyncio.Queue()
+
+    async def startup(self) -> None:
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}}
+        self._lifespan = asyncio.create_task(
+            self.app(scope, self._lifespan_messages.get, self._lifespan_events.put)
+        )
+        await self._lifespan_messages.put({"type": "lifespan.startup"})
+        message = await self._lifespan_events.get()
+        if message["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"Startup failed: {message}")
+
+    async def shutdown(self) -> None:
+        await self._lifespan_messages.put({"type": "lifespan.shutdown"})
+        await self._lifespan_events.get()
+        await self._lifespan
+
+    async def get(self, path: str) -> tuple:
+        """Return (status, body size) of a GET request"""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 12345),
+            "server": ("localhost", 80),
+            "extensions": {},
+        }
+        finished = asyncio.Event()
+        requested = False
+        status = 0
+        size = 0
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    finished.set()
+
+        await self.app(scope, receive, send)
+        finished.set()
+        return status, size
+
+
+def percentile(values: list, fraction: float) -> float:
+    index = min(len(values) - 1, max(0, round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+async def load(client: ASGIClient, path: str, requests: int, concurrency: int):
+    latencies = []
+    sizes = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status, size = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f"GET {path} returned {status}")
+            sizes.append(size)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "bytes": sum(sizes) / len(sizes),
+    }
+
+
+async def allocations(client: ASGIClient, path: str, samples: int) -> dict:
+    """Memory blocks allocated per request, over samples sequential requests
+
+    Blocks are counted with sys.getallocatedblocks() around each request, with
+    the garbage collector off so the cycles a request leaves behind count
+    until the collection before the next one. Blocks freed by reference
+    counting during the request do not show, peak_kib is the most memory the
+    request held at once.
+    """
+    blocks = 0
+    peaks = 0
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            gc.collect()
+            gc.disable()
+            try:
+                tracemalloc.reset_peak()
+                current, _ = tracemalloc.get_traced_memory()
+                before = sys.getallocatedblocks()
+                await client.get(path)
+                blocks += sys.getallocatedblocks() - before
+                _, peak = tracemalloc.get_traced_memory()
+                peaks += peak - current
+            finally:
+                gc.enable()
+    finally:
+        tracemalloc.stop()
+    return {"allocs": blocks / samples, "peak_kib": peaks / samples / 1024}
+
+
+async def bench_app(name: str, args) -> list:
+    app = load_app(ROOT / name)
+    client = ASGIClient(app)
+    results = []
+    with quiet():
+        await client.startup()
+        try:
+            for route, _ in app._pages:
+                for _ in range(args.warmup):
+                    await client.get(route)
+                memory = await allocations(client, route, args.memory_samples)
+                for concurrency in args.concurrency:
+                    result = await load(client, route, args.requests, concurrency)
+                    result.update(app=name, route=route, **memory)
+                    results.append(result)
+        finally:
+            await client.shutdown()
+    return results
+
+
+def print_results(results: list) -> None:
+    print(
+        f"{'app':<32}{'route':<8}{'conc':>6}{'req/s':>10}{'p50 ms':>9}"
+        f"{'p95 ms':>9}{'p99 ms':>9}{'bytes':>9}{'allocs':>9}{'peak KiB':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['app']:<32}{r['route']:<8}{r['concurrency']:>6}{r['rps']:>10.1f}"
+            f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+            f"{r['bytes']:>9.0f}{r['allocs']:>9.0f}{r['peak_kib']:>10.1f}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("apps", nargs="*", default=APPS)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "-c", "--concurrency", type=int, action="append", help="default: 1, 8, 32"
+    )
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--memory-samples", type=int, default=20)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args(argv)
+    args.concurrency = args.concurrency or [1, 8, 32]
+
+    results = []
+    for app in args.apps:
+        results += asyncio.run(bench_app(app, args))
+    print_results(results)
+
+    if args.output:
+        args.output.write_text(json.dumps({"results": results}, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Import-time budget for rendering with ugui
+
+Run from the repository root:
+
+    poetry run python benchmarks/imports.py
+    poetry run python benchmarks/imports.py --budget 80
+
+Imports ugui and renders a page in fresh interpreters, and exits with status 1
+when the fastest import is over the budget, importing pulled in a component
+pack, or rendering pulled in the web stack, asyncio or NumPy, which should only
+load when they are used.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+# Modules that must stay unimported until they are needed
+UNWANTED = ("asyncio", "quart", "hypercorn", "asgiref", "werkzeug", "numpy")
+
+# Component packs load with the first page that uses them
+PACKS = ("ugui.components.og",)
+
+CHILD = f"""
+import sys, time
+start = time.perf_counter()
+import ugui
+imported = time.perf_counter() - start
+str(ugui.Page())
+loaded = [name for name in {UNWANTED!r} if name in sys.modules]
+print(imported * 1000, ",".join(loaded))
+"""
+
+# The source tree, so the check runs without installing the package
+ENV = dict(os.environ, PYTHONPATH=str(Path(__file__).parent.parent / "src"))
+
+
+def measure() -> tuple:
+    """(import milliseconds, unwanted modules loaded) from a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=ENV,
+    ).stdout.split("\n")[-2]
+    milliseconds, loaded = output.split(" ")
+    return float(milliseconds), [name for name in loaded.split(",") if name]
+
+
+def loaded_after(code: str, modules=UNWANTED + PACKS) -> list:
+    """The modules a fresh interpreter has imported after running code"""
+    report = f"import sys\nprint(*[m for m in {tuple(modules)!r} if m in sys.modules])"
+    output = subprocess.run(
+        [sys.executable, "-c", f"{code}\n{report}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=ENV,
+    ).stdout.split("\n")[-2]
+    return output.split()
+
+
+def slowest_imports(count: int = 10) -> list:
+    """The modules with the largest cumulative import time, from -X importtime"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ugui"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=ENV,
+    ).stderr
+    rows = re.findall(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", stderr)
+    rows = sorted(rows, key=lambda row: -int(row[0]))
+    return [f"{int(us) / 1000:8.1f} ms  {indent}{name}" for us, indent, name in rows][
+        :count
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget", type=float, default=150.0, help="milliseconds (default 150)"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.repeat)]
+    best = min(milliseconds for milliseconds, _ in runs)
+    loaded = sorted({name for _, names in runs for name in names})
+    loaded += [name for name in loaded_after("import ugui") if name not in loaded]
+    print(f"import ugui: {best:.1f} ms (budget {args.budget:.0f} ms)")
+
+    failed = False
+    if loaded:
+        print(f"Importing ugui or rendering a page imported {', '.join(loaded)}")
+        failed = True
+    if best > args.budget:
+        print("Over budget, the slowest imports are:")
+        print("\n".join(slowest_imports()))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
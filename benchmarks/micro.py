@@ -0,0 +1,284 @@
+"""Micro-benchmarks for the ugui hot paths
+
+Run from the repository root:
+
+    poetry run python benchmarks/micro.py
+    poetry run python benchmarks/micro.py --save-baseline
+    poetry run python benchmarks/micro.py --baseline benchmarks/baseline.json
+
+Results are written as JSON. When a baseline exists the run is compared
+against it and the script exits with status 1 if any benchmark got slower
+than the threshold allows.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+from pathlib import Path
+
+from ugui import Page
+from ugui.components.base_css import BASE_CSS
+from ugui.components.og import BASE_CSS as OG_BASE_CSS
+from ugui.components.og import Box, Button, Card, Form, Grid, Hero, Link, NavBar
+from ugui.components.og.data_table import DataTable
+from ugui.components.og.material_icon import MaterialIcon, load_svg
+from ugui.css import CSSRegistry
+from ugui.html import AGGRESSIVE, Element
+from ugui.utils.colors import colorhash, colorhash_many
+from ugui.utils.downsample import lttb
+
+HERE = Path(__file__).parent
+DEFAULT_BASELINE = HERE / "baseline.json"
+DEFAULT_OUTPUT = HERE / "results.json"
+
+# (total nodes, depth) of the generated trees used by the render benchmarks
+TREE_SHAPES = [(100, 3), (1_000, 5), (10_000, 8)]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence stdout while building pages"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def build_tree(nodes: int, depth: int, seed: int = 0) -> Element:
+    """Build a reproducible tree with roughly the given node count and depth"""
+    rng = random.Random(seed)
+    tags = ["div", "section", "ul", "li", "p", "span", "a"]
+    root = Element("div", cls="root")
+    frontier = [(root, 1)]
+    count = 1
+    while count < nodes:
+        parent, level = frontier[rng.randrange(len(frontier))]
+        child = Element(
+            rng.choice(tags), cls=f"item item-{count % 7}", data_index=str(count)
+        )
+        child.append(f"Item {count}")
+        parent.append(child)
+        count += 1
+        if level + 1 < depth:
+            frontier.append((child, level + 1))
+    return root
+
+
+def css_registry() -> CSSRegistry:
+    registry = CSSRegistry()
+    registry.add(BASE_CSS)
+    registry.add(OG_BASE_CSS)
+    for component in (
+        Box(),
+        Button(text="x"),
+        Card(),
+        Form(),
+        Grid(),
+        Hero(),
+        Link(text="x"),
+        NavBar(),
+        MaterialIcon(name="home"),
+    ):
+        registry.add(component.style())
+    return registry
+
+
+def list_page(items: int, flat: bool = False) -> str:
+    """Build and render a page with a long list, as objects or flat arrays"""
+    with quiet():
+        page = Page(flat=flat)
+    with page.body():
+        with page.ul():
+            for i in range(items):
+                with page.li(cls="row"):
+                    page.a(f"item {i}", href=f"/items/{i}")
+    return str(page)
+
+
+def build_page(items: int, flat: bool = False) -> str:
+    """list_page built from nested lists with page.build"""
+    with quiet():
+        page = Page(flat=flat)
+    rows = [
+        ("li", {"cls": "row"}, ("a", {"href": f"/items/{i}"}, f"item {i}"))
+        for i in range(items)
+    ]
+    page.build(["body", ["ul", rows]])
+    return str(page)
+
+
+def benchmarks() -> dict:
+    """Return {name: zero-argument callable} for every benchmark"""
+    with quiet():
+        page = Page()
+    body = page.body()
+    page._current = body
+
+    def page_tag():
+        body.children.clear()
+        page.div("text", cls="x")
+
+    def page_component():
+        body.children.clear()
+        page.ui.box(material_icon="home")
+
+    def page_construct():
+        with quiet():
+            Page()
+
+    suite = {
+        "element.construct": lambda: Element("div", cls="card", id="main"),
+        "element.attrs": lambda: Element(
+            "input",
+            cls="field",
+            type_="text",
+            aria_label="Name",
+            data__value="x",
+            hx_post="/submit",
+            required=True,
+        ),
+        "page.construct": page_construct,
+        "page.getattr.tag": page_tag,
+        "page.getattr.component": page_component,
+    }
+
+    for nodes, depth in TREE_SHAPES:
+        tree = build_tree(nodes, depth)
+        suite[f"render.minify.{nodes}x{depth}"] = lambda t=tree: t.render(minify=True)
+        suite[f"render.pretty.{nodes}x{depth}"] = lambda t=tree: t.render()
+        suite[f"render.aggressive.{nodes}x{depth}"] = lambda t=tree: t.render(
+            minify=AGGRESSIVE
+        )
+
+    suite["page.list.10000"] = lambda: list_page(10_000)
+    suite["page.list.10000.flat"] = lambda: list_page(10_000, flat=True)
+    suite["page.build.10000"] = lambda: build_page(10_000)
+    suite["page.build.10000.flat"] = lambda: build_page(10_000, flat=True)
+
+    rows = 10_000
+    columns = {
+        "id": list(range(rows)),
+        "name": [f"user <{i}>" for i in range(rows)],
+        "score": [i * 0.5 for i in range(rows)],
+        "email": [f"user{i}@example.org" for i in range(rows)],
+    }
+    suite["table.data_table.10000x4"] = lambda: DataTable(
+        columns=columns, formats={"score": ".2f"}
+    ).render(minify=True)
+
+    series = [(i % 997) * 0.5 for i in range(100000)]
+    suite["chart.lttb.100000"] = lambda: lttb(series, 600)
+
+    registry = css_registry()
+    suite["css.render.minify"] = lambda: registry.render(minify=True)
+    suite["css.render.pretty"] = lambda: registry.render(minify=False)
+
+    suite["icon.load_svg"] = lambda: load_svg("home")
+    suite["icon.material_icon"] = lambda: MaterialIcon(name="home", color="auto")
+
+    labels = [f"label-{i}" for i in range(100)]
+    suite["colorhash.100"] = lambda: [colorhash(label) for label in labels]
+    tags = [f"tag-{i}" for i in range(10000)]
+    suite["colorhash_many.10000"] = lambda: colorhash_many(tags)
+    return suite
+
+
+def measure(func, repeat: int, min_time: float) -> float:
+    """Best seconds per call over several timing runs"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    # Scale the loop count so each run takes at least min_time
+    if elapsed < min_time:
+        number = max(number, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(names=None, repeat: int = 5, min_time: float = 0.2) -> dict:
+    results = {}
+    for name, func in benchmarks().items():
+        if names and not any(part in name for part in names):
+            continue
+        seconds = measure(func, repeat, min_time)
+        results[name] = {"seconds": seconds}
+        print(f"{name:<32}{format_time(seconds):>14}", flush=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Print the comparison and return the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<32}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<32}{format_time(base['seconds']):>14}"
+            f"{format_time(result['seconds']):>14}{(ratio - 1) * 100:>+9.1f}%{flag}"
+        )
+    return regressions
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help="only run benchmarks matching")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="allowed slowdown before failing, as a fraction (default 0.10)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    current = run(args.names, repeat=args.repeat, min_time=args.min_time)
+    args.output.write_text(json.dumps(current, indent=2) + "\n")
+    print(f"\nWrote {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Saved baseline {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        return 0
+
+    regressions = compare(
+        current, json.loads(args.baseline.read_text()), args.threshold
+    )
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,4 +21,5 @@ def index(page: Page):
             page.p("Because that what we have on the menu today.")
 
 
-app.run()
+if __name__ == "__main__":
+    app.run()
@@ -1,7 +1,7 @@
 from ugui import App, Page
 from quart_compress import Compress
 
-app = App(__name__)
+app = App(__name__, purged_css=True)
 compress = Compress()
 compress.init_app(app)
 
@@ -490,4 +490,5 @@ async def index(page: Page):
                 )
 
 
-app.run(debug=False)
+if __name__ == "__main__":
+    app.run(debug=False)
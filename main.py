@@ -141,4 +141,5 @@ async def index(page: Page):
         await render_card(page)
 
 
-app.run(host="0.0.0.0")
+if __name__ == "__main__":
+    app.run(host="0.0.0.0")
@@ -1,5 +1,32 @@
-from quart import request, url_for
-from .app import App
+from .html import LazyChildren
+from .markup import Markup, escape
 from .page import Page
 
-__all__ = ["App", "Page", "request", "url_for"]
+__all__ = [
+    "App",
+    "LazyChildren",
+    "Markup",
+    "Page",
+    "escape",
+    "render_many",
+    "request",
+    "url_for",
+]
+
+# The web stack is imported on first use, rendering pages needs none of it
+_LAZY = {
+    "App": ".app",
+    "render_many": ".batch",
+    "request": "quart",
+    "url_for": "quart",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,17 +1,61 @@
 from pathlib import Path
 from asgiref.sync import sync_to_async
-from quart import Quart, request, send_from_directory
+from hypercorn.asyncio import serve
+from hypercorn.config import Config as HyperConfig
+from quart import Quart, abort, make_response, request, send_from_directory
+from .css import css_digest
+from .html import defaults, tag_name
 from .page import Page, PageUI
+from .metrics import MetricsRegistry, RenderTimer
+from .profiler import ComponentProfiler
+from .probes import PROBES, Probe
+from .tables import TableSource
+from time import perf_counter
+import asyncio
+import hmac
 import inspect
+import logging
+import os
+import re
+import tempfile
+import warnings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("development", "production")
 
 
 class App(Quart):
-    def __init__(self, *args, **kwargs):
+    # Set by the hot reloader while it re-imports a page module. An App the
+    # module creates meanwhile is a throwaway copy, the running app adopts its
+    # pages and table sources and its other setup is dropped, see _adopt
+    _reloading = None
+
+    def __init__(
+        self,
+        *args,
+        metrics: bool = False,
+        metrics_url="/_ugui/metrics",
+        component_profile: bool = False,
+        component_profile_url="/_ugui/components",
+        admin_token: str = None,
+        probe_url="/_ugui/profile",
+        css_url="/_ugui/css",
+        css_dir=None,
+        table_url="/_ugui/table",
+        purged_css: bool = False,
+        mode: str = None,
+        reload_url="/_ugui/reload",
+        instant_navigation: bool = False,
+        **kwargs,
+    ):
         # Set static folder before initializing Quart
         if "static_folder" not in kwargs:
             kwargs["static_folder"] = str(Path(__file__).parent / "static")
 
         super().__init__(*args, **kwargs)
+        # Created by a page module the hot reloader is running again
+        self._reload_copy = self._reloading is not None
         self._pages = []
         self._ui = PageUI(None, "og")  # Change default pack here
 
@@ -19,6 +63,229 @@ class App(Quart):
         if "static_url_path" not in kwargs:
             self.static_url_path = "/static"
 
+        # Render instrumentation: Server-Timing headers and per-route histograms
+        self.metrics = MetricsRegistry() if metrics else None
+        if metrics:
+            self.add_url_rule(metrics_url, "ugui_metrics", self._metrics_view)
+
+        # Per-component cost profiles, aggregated per route
+        self.component_profiles = {} if component_profile else None
+        if component_profile:
+            self.add_url_rule(
+                component_profile_url, "ugui_components", self._components_view
+            )
+
+        # On-demand cProfile/tracemalloc probes, armed per route
+        self._probes = {}
+        self._probe_reports = {}
+        self._admin_token = admin_token or os.environ.get("UGUI_ADMIN_TOKEN")
+        if self._admin_token:
+            self.add_url_rule(
+                probe_url, "ugui_probe", self._probe_view, methods=["GET", "POST"]
+            )
+
+        # Full stylesheets of pages rendered with critical_css, by digest. Also
+        # written to css_dir, so other workers and later processes serve them;
+        # it defaults to the app's instance folder, readable by its user only
+        self.css_url = css_url
+        self.css_dir = Path(css_dir or Path(self.instance_path) / "ugui-css")
+        self._stylesheets = {}
+
+        # Row callbacks behind VirtualTable fragment requests, by name
+        self.table_url = table_url
+        self._table_sources = {}
+
+        # Purged copies of linked stylesheets, see ugui.purge
+        self.purged_css = purged_css
+        self.stylesheet_map = {}
+
+        # Production validates pages once at startup instead of as they are
+        # built, and serves without debug, reloader or access log
+        self.mode = mode or os.environ.get("UGUI_MODE", "development")
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown mode {self.mode!r}, expected one of {MODES}")
+        if self.production:
+            self.before_serving(self._warm_up)
+
+        # In-process reload of page modules in development, see ugui.reload
+        self.reload_url = reload_url
+        self._reloader = None
+        # Endpoints of pages a reload removed, by route, their rules stay mapped
+        self._removed_pages = {}
+
+        # Client-side navigation between pages, which then answer requests
+        # marked with PARTIAL_HEADER with their body and missing styles only
+        self.instant_navigation = instant_navigation
+
+    # Server settings in production mode, see hypercorn.config.Config
+    PRODUCTION_SERVER = {"keep_alive_timeout": 75, "backlog": 2048}
+
+    @property
+    def production(self) -> bool:
+        return self.mode == "production"
+
+    # Request header of in-place navigations, repeated on partial responses
+    PARTIAL_HEADER = "X-Ugui-Partial"
+    # Request header listing the style digests the navigating client has
+    STYLES_HEADER = "X-Ugui-Styles"
+
+    # Cookie set when a client has fetched a full stylesheet
+    CSS_COOKIE = "ugui-css"
+    # Number of full stylesheets kept in memory, oldest are dropped first
+    MAX_STYLESHEETS = 256
+
+    async def _stylesheet_view(self, name):
+        digest = name.removesuffix(".css")
+        css = await self._load_stylesheet(digest)
+        if css is None:
+            return "Not found", 404
+        response = await make_response(css)
+        response.headers["Content-Type"] = "text/css; charset=utf-8"
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        response.set_cookie(
+            self.CSS_COOKIE, digest, max_age=31536000, path="/", samesite="Lax"
+        )
+        return response
+
+    async def _store_stylesheet(self, digest: str, css: str) -> None:
+        if digest in self._stylesheets:
+            return
+        self._remember_stylesheet(digest, css)
+        await asyncio.to_thread(self._write_stylesheet, digest, css)
+
+    def _write_stylesheet(self, digest: str, css: str) -> None:
+        self.css_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # Written whole under a fresh name before it replaces whatever is
+        # there, workers may read it meanwhile
+        descriptor, temporary = tempfile.mkstemp(dir=self.css_dir, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                file.write(css)
+            os.replace(temporary, self.css_dir / f"{digest}.css")
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    async def _load_stylesheet(self, digest: str):
+        css = self._stylesheets.get(digest)
+        if css is not None or not re.fullmatch(r"[0-9a-f]{16}", digest):
+            return css
+        path = self.css_dir / f"{digest}.css"
+        try:
+            css = await asyncio.to_thread(path.read_text, encoding="utf-8")
+        except OSError:
+            return None
+        # Only serve what this digest was made from
+        if css_digest(css) != digest:
+            logger.warning("Ignoring %s, its content does not match its name", path)
+            return None
+        self._remember_stylesheet(digest, css)
+        return css
+
+    def _remember_stylesheet(self, digest: str, css: str) -> None:
+        if len(self._stylesheets) >= self.MAX_STYLESHEETS:
+            del self._stylesheets[next(iter(self._stylesheets))]
+        self._stylesheets[digest] = css
+
+    async def _metrics_view(self):
+        headers = {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        return self.metrics.render(), 200, headers
+
+    async def _components_view(self):
+        sort = request.args.get("sort", "bytes")
+        if sort not in ComponentProfiler.COLUMNS:
+            return f"Unknown sort column {sort!r}", 400
+        reports = [
+            f"# {route}\n{profile.report(sort=sort)}"
+            for route, profile in sorted(self.component_profiles.items())
+        ]
+        return "\n".join(reports), 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+    async def _probe_view(self):
+        """Arm a probe with POST, fetch its report with GET"""
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(token.encode(), self._admin_token.encode()):
+            return "Forbidden", 403
+
+        route = request.args.get("route", "/")
+        if request.method == "POST":
+            mode = request.args.get("mode", "cpu")
+            if mode not in PROBES:
+                return f"Unknown probe mode {mode!r}", 400
+            try:
+                requests = int(request.args.get("requests", 1))
+                limit = int(request.args.get("limit", 25))
+            except ValueError:
+                return "requests and limit must be integers", 400
+            self.probe(route, requests=requests, mode=mode, limit=limit)
+            return f"Armed {mode} probe for {requests} request(s) to {route!r}\n", 202
+
+        probe = self._probe_reports.get(route) or self._probes.get(route)
+        if probe is None:
+            return f"No probe for {route!r}\n", 404
+        if not probe.done:
+            return f"{probe.completed}/{probe.requests} request(s) profiled\n", 202
+        return probe.report(), 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+    async def _table_view(self, name):
+        """Serve a window of table rows as <tr> markup"""
+        source = self._table_sources.get(name)
+        if source is None:
+            return "Not found", 404
+        sort = request.args.get("sort")
+        if not source.valid_sort(sort):
+            return f"Unknown sort column {sort!r}", 400
+        try:
+            offset, cursor = source.parse_next(request.args.get("next", "0"))
+            limit = int(request.args.get("limit", source.page_size))
+        except ValueError:
+            return "Invalid next or limit", 400
+        if limit < 1:
+            return "limit must be at least 1", 400
+
+        rows, following = await source.fetch_async(
+            offset, limit, sort, request.args.get("q"), cursor
+        )
+        # Imported here so importing the app leaves component packs unloaded
+        from .components.og.data_table import DataTable
+
+        table = DataTable(rows=rows, headers=source.headers, formats=source.formats)
+        html = "".join(table.iter_rows(True))
+        headers = {"Content-Type": "text/html; charset=utf-8", "X-Ugui-Next": following}
+        return html, 200, headers
+
+    def table_source(
+        self, name=None, headers=(), page_size=50, formats=None, numeric=None
+    ):
+        """Register a row callback for VirtualTable, see TableSource"""
+
+        def decorator(func) -> TableSource:
+            source_name = name or func.__name__
+            source = TableSource(
+                func,
+                source_name,
+                headers,
+                page_size=page_size,
+                url=f"{self.table_url}/{source_name}",
+                formats=formats,
+                numeric=numeric,
+            )
+            self._table_sources[source_name] = source
+            if "ugui_table" not in self.view_functions:
+                self.add_url_rule(
+                    f"{self.table_url}/<name>", "ugui_table", self._table_view
+                )
+            return source
+
+        return decorator
+
+    def probe(self, route: str, requests: int = 1, mode="cpu", limit=25) -> Probe:
+        """Profile the next requests to a page route with cProfile or tracemalloc"""
+        probe = PROBES[mode](route, requests=requests, limit=limit)
+        self._probe_reports.pop(route, None)
+        self._probes[route] = probe
+        return probe
+
     @property
     def ui(self) -> PageUI:
         """Access UI configuration"""
@@ -28,26 +295,262 @@ class App(Quart):
         """Select which component pack to use"""
         self._ui.use(pack_name)
 
-    async def handle_page(self, func, minify=True, style=True):
-        page = Page(minify=minify, style=style, component_pack=self._ui._component_pack)
-        if inspect.iscoroutinefunction(func):
+    async def handle_page(self, func, minify=True, style=True, route=None, **options):
+        route = route or func.__name__
+        probe = self._probes.get(route) if self._probes else None
+        if probe is None or not probe.acquire():
+            return await self._render_page(func, minify, style, route, options)
+
+        try:
+            return await self._render_page(func, minify, style, route, options, probe)
+        finally:
+            probe.release()
+            if probe.done and self._probes.get(route) is probe:
+                self._probe_reports[route] = self._probes.pop(route)
+
+    async def _render_page(self, func, minify, style, route, options, probe=None):
+        timer = RenderTimer() if self.metrics is not None else None
+        profiler = ComponentProfiler() if self.component_profiles is not None else None
+        page = Page(
+            minify=minify,
+            style=style,
+            component_pack=self._ui._component_pack,
+            timer=timer,
+            profiler=profiler,
+            **options,
+        )
+        page.document.stylesheet_map = self.stylesheet_map
+        headers = {}
+        # Request headers the response depends on
+        vary = []
+        if page.document.critical_css is not None:
+            page.document.css_url = self.css_url
+            # Returning visitors skip the inline copy, via cookie or header
+            page.document.cached_css = request.cookies.get(
+                self.CSS_COOKIE
+            ) or request.headers.get("X-Ugui-CSS")
+            vary += ["Cookie", "X-Ugui-CSS"]
+        if self.instant_navigation:
+            page.document.instant_navigation = True
+            vary += [self.PARTIAL_HEADER, self.STYLES_HEADER]
+            if request.headers.get(self.PARTIAL_HEADER):
+                known = request.headers.get(self.STYLES_HEADER, "").split()
+                page.document.known_styles = set(known)
+                headers[self.PARTIAL_HEADER] = "1"
+        if vary:
+            headers["Vary"] = ", ".join(vary)
+
+        start = perf_counter()
+        if probe is not None:
+            await probe.call(func, page)
+        elif inspect.iscoroutinefunction(func):
             await func(page)
         else:
             await sync_to_async(func)(page)
-        return str(page)
+        if self._reloader is not None:
+            page.raw(self._reloader.script)
+        built = perf_counter()
+        if page.stream and probe is None and profiler is None:
+            return self._stream_page(page, route, timer, built - start, headers)
+        html = probe.render(page) if probe is not None else str(page)
+        if page.document.external_css is not None:
+            await self._store_stylesheet(*page.document.external_css)
+
+        if profiler is not None:
+            if route not in self.component_profiles:
+                self.component_profiles[route] = ComponentProfiler()
+            self.component_profiles[route].merge(profiler)
+
+        if timer is None:
+            return (html, headers) if headers else html
+
+        timer.add("page", built - start)
+        # CSS collection is timed inside Document.render, the rest is serialization
+        timer.add("html", perf_counter() - built - timer.phases.get("css", 0.0))
+        timer.size = len(html.encode())
+        self.metrics.observe(route, timer)
+        return html, {**headers, "Server-Timing": timer.server_timing()}
+
+    def _stream_page(self, page, route, timer, build_time, headers):
+        """Respond with the document as it is serialized, see Document.astream"""
+        document = page.document
+
+        async def body():
+            start = perf_counter()
+            size = 0
+            async for chunk in document.astream():
+                if document.external_css is not None and size == 0:
+                    await self._store_stylesheet(*document.external_css)
+                chunk = chunk.encode()
+                size += len(chunk)
+                yield chunk
+            if timer is not None:
+                # Sent after the headers, so only the metrics see the timings
+                timer.add("page", build_time)
+                html = perf_counter() - start - timer.phases.get("css", 0.0)
+                timer.add("html", html)
+                timer.size = size
+                self.metrics.observe(route, timer)
+
+        return self.response_class(body(), mimetype="text/html", headers=headers)
+
+    def page(self, route, minify=True, style=True, **options):
+        """Register a page function, extra options are passed on to Page"""
 
-    def page(self, route, minify=True, style=True):
         def decorator(func):
             async def wrapper():
-                return await self.handle_page(func, minify=minify, style=style)
+                return await self.handle_page(
+                    func, minify=minify, style=style, route=route, **options
+                )
 
-            self._pages.append((route, wrapper))
+            # Endpoints are named after the view, one per page function
+            wrapper.__name__ = func.__name__
+            wrapper.__wrapped__ = func
+            wrapper.page_options = dict(minify=minify, style=style, **options)
+            for index, (existing, previous) in enumerate(self._pages):
+                if existing == route:
+                    # Reloaded, serve the new function from the same endpoint
+                    self._pages[index] = (route, wrapper)
+                    if previous.__name__ in self.view_functions:
+                        self.view_functions[previous.__name__] = wrapper
+                        wrapper.__name__ = previous.__name__
+                    break
+            else:
+                self._pages.append((route, wrapper))
+                if self._reloader is not None:
+                    self._add_reloaded_route(route, wrapper)
+            if options.get("critical_css") is not None:
+                self._add_stylesheet_route()
             return wrapper
 
         return decorator
 
-    def run(self, host="127.0.0.1", port=5000, debug=True, use_reloader=True):
+    def _add_stylesheet_route(self) -> None:
+        """Serve the full stylesheets of critical_css pages"""
+        if "ugui_css" in self.view_functions:
+            return
+        rule = f"{self.css_url}/<name>"
+        if self._reloading is self:
+            self._add_rule(rule, "ugui_css", self._stylesheet_view)
+        else:
+            self.add_url_rule(rule, "ugui_css", self._stylesheet_view)
+
+    def _add_rule(self, route, endpoint, view) -> None:
+        """Add a GET route while serving, when add_url_rule is closed"""
+        if endpoint in self.view_functions:
+            raise AssertionError(
+                f"View function mapping is overwriting an existing endpoint "
+                f"function: {endpoint}"
+            )
+        rule = self.url_rule_class(route, methods={"GET", "OPTIONS"}, endpoint=endpoint)
+        rule.provide_automatic_options = True
+        self.url_map.add(rule)
+        self.view_functions[endpoint] = view
+
+    def _adopt(self, copy: "App") -> None:
+        """Take over the pages and table sources of an App a reload created"""
+        for route, wrapper in copy._pages:
+            self.page(route, **wrapper.page_options)(wrapper.__wrapped__)
+        if copy._table_sources and "ugui_table" not in self.view_functions:
+            self._add_rule(f"{self.table_url}/<name>", "ugui_table", self._table_view)
+        self._table_sources.update(copy._table_sources)
+
+    def _add_reloaded_route(self, route, wrapper) -> None:
+        """Route a page added by a reload"""
+        endpoint = self._removed_pages.pop(route, None)
+        if endpoint is None:
+            self._add_rule(route, wrapper.__name__, wrapper)
+        else:
+            # Removed by an earlier reload, its rule is still in the map
+            wrapper.__name__ = endpoint
+            self.view_functions[endpoint] = wrapper
+
+    def _remove_pages(self, routes) -> None:
+        """Stop serving pages that a reloaded module no longer defines"""
+        for route in routes:
+            for index, (existing, wrapper) in enumerate(self._pages):
+                if existing == route:
+                    del self._pages[index]
+                    self.view_functions[wrapper.__name__] = _removed_page
+                    self._removed_pages[route] = wrapper.__name__
+                    logger.info("Removed page %r", route)
+                    break
+
+    def _register_pages(self) -> None:
+        """Add the routes of all @app.page functions"""
+        if self.purged_css:
+            # Imported here so `python -m ugui.purge` finds it unimported
+            from .purge import load_manifest
+
+            self.stylesheet_map = load_manifest(self)
         for route, func in self._pages:
             self.route(route)(func)
 
-        super().run(host=host, port=port, debug=debug, use_reloader=use_reloader)
+    async def _warm_up(self) -> None:
+        """Render every page once with validation on, then turn it off"""
+        defaults.validate = True
+        # Tag names are cached with the checks made when first seen
+        tag_name.cache_clear()
+        try:
+            for route, wrapper in self._pages:
+                if "<" in route:
+                    logger.info("Not warming up %r, it has route parameters", route)
+                    continue
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter("always")
+                    try:
+                        async with self.test_request_context(route):
+                            await wrapper()
+                    except Exception:
+                        logger.exception("Rendering %r at startup failed", route)
+                for warning in caught:
+                    logger.warning("%s: %s", route, warning.message)
+        finally:
+            defaults.validate = False
+            tag_name.cache_clear()
+
+    def run(
+        self,
+        host="127.0.0.1",
+        port=5000,
+        debug=None,
+        use_reloader=None,
+        hot_reload=None,
+    ):
+        """Serve the app, with debug and hot reload on outside production mode
+
+        hot_reload re-imports changed page modules in place, use_reloader
+        restarts the process on any change instead.
+        """
+        if self._reloading is not None:
+            # Called by a page module being reloaded
+            return
+        self._register_pages()
+        if not self.production:
+            if hot_reload is None:
+                hot_reload = not use_reloader
+            if hot_reload:
+                # Imported here, production never reloads
+                from .reload import Reloader
+
+                self._reloader = Reloader(self, self.reload_url)
+                self._reloader.install()
+            debug = True if debug is None else debug
+            use_reloader = bool(use_reloader)
+            super().run(host=host, port=port, debug=debug, use_reloader=use_reloader)
+            return
+
+        config = HyperConfig()
+        config.bind = [f"{host}:{port}"]
+        config.accesslog = None
+        config.errorlog = self.logger
+        for name, value in self.PRODUCTION_SERVER.items():
+            setattr(config, name, value)
+        self.debug = bool(debug)
+        logger.info("Serving %r in production mode on %s:%s", self.name, host, port)
+        asyncio.run(serve(self, config))
+
+
+async def _removed_page(**kwargs):
+    """View of pages removed by a hot reload, until a reload adds them back"""
+    abort(404)
@@ -0,0 +1,157 @@
+"""Render many pages without a server, in a pool of worker processes
+
+    def report(page, customer):
+        page.h1(f"Report for {customer.name}")
+
+    stats = render_many(report, customers, workers=8, output="out/{index}.html")
+    print(stats)
+
+Workers live for the whole batch, so the parsed CSS, minified icons and
+imported component packs they cache are reused by every page they render.
+Results come back in input order, to files, a callback or a list.
+"""
+
+import logging
+import multiprocessing
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Iterable, List, Optional
+from .page import Page
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchReport:
+    """Throughput of a render_many run"""
+
+    pages: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    workers: int = 1
+    # Rendered pages, when neither output nor callback was given
+    results: List[str] = field(default_factory=list, repr=False)
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.pages} pages, {self.bytes / 1e6:.1f} MB in {self.seconds:.2f} s"
+            f" ({self.pages_per_second:.0f} pages/s, {self.workers} workers)"
+        )
+
+
+# Chunks per worker kept in flight, enough that a worker finishing a chunk
+# finds the next one queued, few enough that inputs are not read far ahead
+WINDOW_CHUNKS = 4
+
+
+# Set in each worker by _init_worker
+_page_options: dict = {}
+
+
+def _init_worker(page_options: dict) -> None:
+    """Remember the page options and fill the caches with an empty page"""
+    global _page_options
+    _page_options = page_options
+    str(Page(**page_options))
+
+
+def _render(task: tuple) -> str:
+    func, item = task
+    page = Page(**_page_options)
+    func(page, item)
+    return str(page)
+
+
+def _render_chunk(task: tuple) -> List[str]:
+    func, items = task
+    return [_render((func, item)) for item in items]
+
+
+def render_many(
+    func: Callable,
+    inputs: Iterable,
+    workers: Optional[int] = None,
+    output: Optional[str] = None,
+    callback: Optional[Callable[[int, Any, str], None]] = None,
+    chunksize: int = 8,
+    **page_options,
+) -> BatchReport:
+    """Build a page with func(page, item) for every input and render it
+
+    func must be importable by the workers, a module-level function. Pages
+    are written to output, a path formatted with index and item such as
+    "out/{index}.html", and passed to callback(index, item, html) in input
+    order; without either they are collected in the report's results.
+    workers defaults to the CPU count, 1 renders in this process. Inputs are
+    read as chunks finish, with at most WINDOW_CHUNKS chunks per worker in
+    flight, so a generator is not read far ahead of the pages written. Extra options are passed on to Page.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    report = BatchReport(workers=workers)
+    start = perf_counter()
+
+    if workers == 1:
+        _init_worker(page_options)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, _init_worker, (page_options,))
+
+    try:
+        rendered = _rendered(func, inputs, pool, workers * WINDOW_CHUNKS, chunksize)
+        for index, (item, html) in enumerate(rendered):
+            if output is not None:
+                path = Path(output.format(index=index, item=item))
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(html, encoding="utf-8")
+            if callback is not None:
+                callback(index, item, html)
+            if output is None and callback is None:
+                report.results.append(html)
+            report.pages += 1
+            report.bytes += len(html.encode())
+    except BaseException:
+        if pool is not None:
+            pool.terminate()
+        raise
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    report.seconds = perf_counter() - start
+    logger.info("Rendered %s", report)
+    return report
+
+
+def _rendered(func: Callable, inputs: Iterable, pool, in_flight: int, chunksize: int):
+    """Yield (item, html) in input order
+
+    Chunks are submitted as earlier ones are collected, so the pool always has
+    up to in_flight chunks queued and no worker waits for a whole window.
+    """
+    items = iter(inputs)
+    if pool is None:
+        for item in items:
+            yield item, _render((func, item))
+        return
+    pending = deque()
+
+    def submit() -> bool:
+        chunk = list(islice(items, chunksize))
+        if chunk:
+            pending.append((chunk, pool.apply_async(_render_chunk, ((func, chunk),))))
+        return bool(chunk)
+
+    while len(pending) < in_flight and submit():
+        pass
+    while pending:
+        chunk, result = pending.popleft()
+        pages = result.get()
+        submit()
+        yield from zip(chunk, pages)
@@ -0,0 +1,85 @@
+"""Build elements from nested lists, for large data-driven structures
+
+A spec is text, a node, None (skipped) or a list or tuple. A list starting
+with a string is an element, ``[tag, {attributes}, *children]`` with the
+attributes optional; any other list is a run of specs:
+
+    page.build(["ul", {"cls": "menu"}, [["li", ["a", {"href": url}, label]]
+                                        for label, url in links]])
+
+Tag names are validated and attribute names mapped once per name rather than
+once per element, and nodes are built in one loop without a tag call and
+context manager each. Under a flat page they are written to the tree's arrays.
+"""
+
+from itertools import islice
+from typing import Optional, Union
+from .flat import FlatElement, OBJECT_TAGS
+from .html import (
+    Attributes,
+    Element,
+    Node,
+    TextNode,
+    is_lazy_source,
+    normalize_attributes,
+    tag_name,
+)
+
+
+def build(spec, parent, page=None) -> Optional[Node]:
+    """Add the nodes of spec under parent, return the element of an element spec"""
+    built = None
+    stack = [(parent, iter((spec,)))]
+    while stack:
+        parent, items = stack[-1]
+        for item in items:
+            if isinstance(item, (list, tuple)):
+                if item and isinstance(item[0], str):
+                    node = _add_element(parent, item, page)
+                    if len(stack) == 1:
+                        built = node
+                    stack.append((node, _children(item)))
+                else:
+                    stack.append((parent, iter(item)))
+                # Descend, the loop resumes this iterator afterwards
+                break
+            if (
+                type(item) is str
+                and type(parent) is Element
+                and parent._name != "style"
+            ):
+                text = TextNode(item)
+                text.parent = parent
+                parent.children.append(text)
+            elif isinstance(item, (str, Node, FlatElement)) or is_lazy_source(item):
+                parent.append(item)
+            elif item is not None:
+                raise TypeError(
+                    f"Invalid spec {item!r}: expected text, a node, None, a list "
+                    "or a tuple; attributes are a dict right after the tag name"
+                )
+        else:
+            stack.pop()
+    return built
+
+
+def _children(spec: Union[list, tuple]):
+    start = 2 if len(spec) > 1 and isinstance(spec[1], dict) else 1
+    return islice(spec, start, None)
+
+
+def _add_element(parent, spec: Union[list, tuple], page):
+    tag = spec[0]
+    attrs = spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else None
+    if type(parent) is FlatElement and tag_name(tag) not in OBJECT_TAGS:
+        return parent.tree.element(parent.index, tag, attrs)
+    element = Element(tag)
+    if attrs:
+        element._attrs = Attributes(normalize_attributes(attrs))
+    element._page = page
+    if isinstance(parent, Node):
+        element.parent = parent
+        parent.children.append(element)
+    else:
+        parent.append(element)
+    return element
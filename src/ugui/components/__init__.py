@@ -1,7 +1,9 @@
 from importlib import import_module
 from abc import abstractmethod
-from typing import Any, Dict, Type
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Type
 from ugui.html import Element
+from ugui.utils.colors import hash_string
 
 
 class Component(Element):
@@ -35,6 +37,10 @@ class Component(Element):
         """Return the CSS for this component"""
         pass
 
+    def instance_style(self) -> str:
+        """Return CSS for this instance's parameters, registered on every use"""
+        return ""
+
     def __call__(self, page: Any = None, *args, **kwargs) -> Any:
         """Make components callable for page context"""
         # If first arg is page, it's being used in a with statement
@@ -49,30 +55,51 @@ class Component(Element):
         return self
 
 
+@lru_cache(maxsize=1024)
+def variant_class(prefix: str, declarations: Tuple[Tuple[str, str], ...]) -> tuple:
+    """Return a content-hashed class name and its rule for a set of declarations
+
+    Cached process-wide, so each distinct parameter tuple is formatted once.
+    """
+    body = ";".join(f"{name}:{value}" for name, value in declarations)
+    name = f"{prefix}-{hash_string(body):08x}"
+    return name, f".{name}{{{body}}}"
+
+
+# Module paths of the registered packs, imported on first lookup
+_pack_paths: Dict[str, str] = {}
 _component_packs: Dict[str, Any] = {}
 
 
 def register_pack(name: str, module_path: str) -> None:
     """Register a component pack by name and module path"""
+    _pack_paths[name] = module_path
+    _component_packs.pop(name, None)
+
+
+def get_pack(name: str) -> Any:
+    """Get the module of a registered pack, importing it on first use"""
+    module = _component_packs.get(name)
+    if module is not None:
+        return module
+    if name not in _pack_paths:
+        raise ValueError(f"Component pack {name!r} not found")
     try:
-        module = import_module(module_path)
-        # Store the entire module rather than just components
-        _component_packs[name] = module
+        module = import_module(_pack_paths[name])
     except ImportError as e:
         raise ImportError(f"Could not load component pack {name!r}: {e}")
+    # Store the entire module rather than just components
+    _component_packs[name] = module
+    return module
 
 
 def get_component(pack: str, name: str) -> Type[Component]:
     """Get a component class from a registered pack"""
-    if pack not in _component_packs:
-        raise ValueError(f"Component pack {pack!r} not found")
-    module = _component_packs[pack]
+    module = get_pack(pack)
+    # Allow snake_case lookups such as nav_item -> NavItem
+    name = name.replace("_", "").lower()
     for k, v in module.__dict__.items():
-        if (
-            k.lower() == name.lower()
-            and isinstance(v, type)
-            and issubclass(v, Component)
-        ):
+        if k.lower() == name and isinstance(v, type) and issubclass(v, Component):
             return v
     raise ValueError(f"Component {name!r} not found in pack {pack!r}")
 
@@ -0,0 +1,185 @@
+from typing import Dict, List, Sequence, Tuple
+from . import Component
+from .material_icon import SVGNode
+from ugui.html import Element
+from ugui.markup import escape_html
+from ugui.utils.colors import colorhash
+from ugui.utils.downsample import lttb
+
+
+def _series(data) -> Tuple[Sequence[float], Sequence[float]]:
+    """Accept y values or an (x, y) pair"""
+    if isinstance(data, tuple) and len(data) == 2:
+        return data[1], data[0]
+    return data, None
+
+
+def _points(xs: List[float], ys: List[float], box: tuple) -> str:
+    """Scale points into the (left, top, width, height, bounds) box"""
+    left, top, width, height, (x0, x1, y0, y1) = box
+    sx = width / ((x1 - x0) or 1)
+    sy = height / ((y1 - y0) or 1)
+    if y1 == y0:
+        # Draw a constant series across the middle
+        top, height, sy = top + height / 2, 0, 0
+    # One decimal is below pixel precision and keeps the markup small
+    return " ".join(
+        f"{round(left + (x - x0) * sx, 1):g},{round(top + height - (y - y0) * sy, 1):g}"
+        for x, y in zip(xs, ys)
+    )
+
+
+class Sparkline(Component):
+    """A small inline line chart, downsampled to one point per pixel"""
+
+    def __init__(self, values: Sequence[float] = (), **props):
+        values = props.pop("values", values)
+        width = props.pop("width", 120)
+        height = props.pop("height", 24)
+        color = props.pop("color", None)
+        label = props.pop("label", None)
+        max_points = props.pop("max_points", width)
+        if color == "auto":
+            color = colorhash(label or "")
+        props["class"] = "sparkline"
+        if label:
+            props.setdefault("title", label)
+
+        super().__init__("span", **props)
+        ys, xs = _series(values)
+        # Narrow sparklines still keep both ends and a point between
+        xs, ys = lttb(ys, max(max_points, 3), xs)
+        self.points = len(ys)
+        if not ys:
+            return
+        bounds = (xs[0], xs[-1], min(ys), max(ys))
+        points = _points(xs, ys, (1, 1, width - 2, height - 2, bounds))
+        stroke = f' style="stroke: {escape_html(color)}"' if color else ""
+        self.append(
+            SVGNode(
+                f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}"'
+                f' aria-hidden="true"><polyline{stroke} points="{points}"/></svg>'
+            )
+        )
+
+    def style(self) -> str:
+        return CHART_CSS
+
+
+class LineChart(Component):
+    """A line chart of one or more series, each bounded to the plot width
+
+    ``series`` maps labels to y values or (x, y) pairs. Series are coloured
+    with colorhash of their label unless ``colors`` names one.
+    """
+
+    def __init__(self, **props):
+        series: Dict[str, object] = props.pop("series", {})
+        width = props.pop("width", 600)
+        height = props.pop("height", 200)
+        colors = props.pop("colors", {})
+        max_points = props.pop("max_points", None)
+        title = props.pop("title", None)
+        props["class"] = "line-chart"
+        super().__init__("figure", **props)
+
+        # Room for the min/max labels on the left
+        left, top, right, bottom = 48, 8, 8, 8
+        plot_width = width - left - right
+        plot_height = height - top - bottom
+
+        lines = []
+        for label, data in series.items():
+            ys, xs = _series(data)
+            xs, ys = lttb(ys, max(max_points or plot_width, 3), xs)
+            if ys:
+                lines.append((label, xs, ys))
+        self.points = sum(len(ys) for _, _, ys in lines)
+
+        svg = [
+            f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}"'
+            ' role="img">'
+        ]
+        if title:
+            svg.append(f"<title>{escape_html(title)}</title>")
+        if lines:
+            x0 = min(xs[0] for _, xs, _ in lines)
+            x1 = max(xs[-1] for _, xs, _ in lines)
+            y0 = min(min(ys) for _, _, ys in lines)
+            y1 = max(max(ys) for _, _, ys in lines)
+            box = (left, top, plot_width, plot_height, (x0, x1, y0, y1))
+            svg.append(
+                f'<path class="axis" d="M{left} {top}V{top + plot_height}'
+                f'H{left + plot_width}"/>'
+                f'<text x="{left - 6}" y="{top + 4}" text-anchor="end">{y1:g}</text>'
+                f'<text x="{left - 6}" y="{top + plot_height}" text-anchor="end">'
+                f"{y0:g}</text>"
+            )
+            for label, xs, ys in lines:
+                color = escape_html(colors.get(label) or colorhash(str(label)))
+                svg.append(
+                    f'<polyline style="stroke: {color}" points="{_points(xs, ys, box)}"/>'
+                )
+        svg.append("</svg>")
+        self.append(SVGNode("".join(svg)))
+
+        if lines:
+            legend = Element("figcaption")
+            for label, _, _ in lines:
+                color = colors.get(label) or colorhash(str(label))
+                key = Element("span", cls="line-chart-key", style=f"color: {color}")
+                key.append(str(label))
+                legend.append(key)
+            self.append(legend)
+
+    def style(self) -> str:
+        return CHART_CSS
+
+
+CHART_CSS = """
+.sparkline {
+    display: inline-block;
+    vertical-align: middle;
+}
+.sparkline svg,
+.line-chart svg {
+    display: block;
+    max-width: 100%;
+    height: auto;
+    overflow: visible;
+}
+.sparkline polyline,
+.line-chart polyline {
+    fill: none;
+    stroke: var(--color-primary);
+    stroke-width: 1.5;
+    stroke-linejoin: round;
+    stroke-linecap: round;
+}
+.line-chart {
+    margin: 1rem 0;
+}
+.line-chart .axis {
+    fill: none;
+    stroke: var(--color-border);
+}
+.line-chart text {
+    fill: var(--color-text-secondary);
+    font-size: 0.75rem;
+}
+.line-chart figcaption {
+    display: flex;
+    flex-wrap: wrap;
+    gap: 1rem;
+    font-size: 0.875rem;
+}
+.line-chart-key::before {
+    content: "";
+    display: inline-block;
+    width: 0.75rem;
+    height: 0.2rem;
+    margin-right: 0.35rem;
+    vertical-align: middle;
+    background: currentColor;
+}
+"""
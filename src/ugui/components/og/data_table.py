@@ -0,0 +1,258 @@
+from array import array
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from . import Component
+from ugui.html import AGGRESSIVE
+from ugui.markup import Markup, escape_text
+from ugui.utils.colors import hash_string
+from ugui.utils.optional import loaded_numpy
+
+Formatter = Union[str, Callable[[Any], str]]
+
+
+def format_column(values, fmt: Optional[Formatter] = None) -> List[str]:
+    """Format and escape a whole column in one pass
+
+    fmt is a format spec (``".2f"``), a printf-style string (``"%.2f"``) or a
+    callable; return Markup from it for cells holding HTML. None becomes an
+    empty cell.
+    """
+    if callable(fmt):
+        return [escape_text(cell) for cell in map(fmt, values)]
+    np = loaded_numpy()
+    if np is not None and isinstance(values, np.ndarray):
+        if fmt and fmt.startswith("%"):
+            cells = np.char.mod(fmt, values).tolist()
+        elif fmt:
+            cells = [format(value, fmt) for value in values.tolist()]
+        else:
+            cells = values.astype(str).tolist()
+        return cells if values.dtype.kind in "biuf" else _escape_cells(cells)
+    if isinstance(values, array) and values.typecode not in "uw":
+        if fmt:
+            return _format_cells(values, fmt)
+        return list(map(str, values))
+
+    types = set(map(type, values))
+    if Markup in types:
+        # Markup cells are written as they are, fmt applies to the others
+        formatted = iter(
+            format_column([value for value in values if type(value) is not Markup], fmt)
+        )
+        return [
+            value.__html__() if type(value) is Markup else next(formatted)
+            for value in values
+        ]
+    if type(None) in types:
+        values = ["" if value is None else value for value in values]
+    if fmt:
+        cells = _format_cells(values, fmt)
+    elif types <= {str}:
+        cells = values if isinstance(values, list) else list(values)
+    else:
+        cells = list(map(str, values))
+    if types <= {int, float, bool, type(None)}:
+        return cells
+    return _escape_cells(cells)
+
+
+def _format_cells(values, fmt: str) -> List[str]:
+    if fmt.startswith("%"):
+        return [fmt % value if value != "" else "" for value in values]
+    return [format(value, fmt) if value != "" else "" for value in values]
+
+
+def _escape_cells(cells: List[str]) -> List[str]:
+    """Escape a column with a single escape call over the joined text"""
+    joined = "\x00".join(cells)
+    if joined.count("\x00") != len(cells) - 1:
+        return [escape_text(cell) for cell in cells]
+    return escape_text(joined).split("\x00") if cells else []
+
+
+def is_numeric(values) -> bool:
+    """True for columns of numbers, which are right-aligned"""
+    np = loaded_numpy()
+    if np is not None and isinstance(values, np.ndarray):
+        return values.dtype.kind in "iuf"
+    if isinstance(values, array):
+        return values.typecode not in "uw"
+    types = set(map(type, values)) - {type(None)}
+    return bool(types) and types <= {int, float}
+
+
+@lru_cache(maxsize=256)
+def numeric_columns_class(columns: tuple) -> tuple:
+    """Return a hashed class name and the rule right-aligning these columns"""
+    name = f"data-table-{hash_string(','.join(map(str, columns))):08x}"
+    selector = ",".join(f".{name} td:nth-child({i})" for i in columns)
+    return name, f"{selector}{{text-align:right}}"
+
+
+class DataTable(Component):
+    """A table rendered from columns without creating an element per cell
+
+    Pass ``columns`` as a mapping of header to column (list, ``array`` or
+    NumPy array), or ``rows`` as any iterable of tuples together with
+    ``headers``. Rows are consumed ``chunk_size`` at a time, so a generator
+    is never materialized; it can only be rendered once. Numeric columns are
+    right-aligned, pass ``numeric`` (headers or indexes) to choose them.
+    """
+
+    def __init__(self, **props):
+        columns: Optional[Dict[str, Any]] = props.pop("columns", None)
+        rows: Optional[Iterable[tuple]] = props.pop("rows", None)
+        headers = props.pop("headers", None)
+        formats: Dict[Union[str, int], Formatter] = props.pop("formats", None) or {}
+        numeric = props.pop("numeric", None)
+        self.chunk_size = props.pop("chunk_size", 1000)
+        props["class"] = (
+            f"data-table {props['class']}" if "class" in props else "data-table"
+        )
+
+        if columns is not None:
+            headers = list(columns) if headers is None else headers
+            self.columns = list(columns.values())
+            lengths = {len(column) for column in self.columns}
+            if len(lengths) > 1:
+                raise ValueError(f"Columns have different lengths {sorted(lengths)}")
+            self.rows = None
+            sample = self.columns
+        else:
+            self.columns = None
+            rows = iter(rows or ())
+            # Peek at the first chunk to tell numeric columns apart
+            first = list(islice(rows, self.chunk_size))
+            self.rows = chain(first, rows)
+            sample = list(zip(*first)) if first else []
+        # Columns, or those of the first chunk of rows, scanned for markup
+        self.sample = sample
+        self.headers = list(headers or [])
+        self.formats = [
+            formats.get(name, formats.get(index))
+            for index, name in enumerate(self.headers or range(len(sample)))
+        ]
+
+        super().__init__("table", **props)
+
+        if numeric is None:
+            numeric = tuple(
+                i + 1 for i, column in enumerate(sample) if is_numeric(column)
+            )
+        else:
+            numeric = tuple(
+                (self.headers.index(column) if isinstance(column, str) else column) + 1
+                for column in numeric
+            )
+        self.variant = numeric_columns_class(numeric) if numeric else None
+        if self.variant:
+            self.attrs["class"] += f" {self.variant[0]}"
+
+    def style(self) -> str:
+        return """
+        .data-table {
+            width: 100%;
+            border-collapse: collapse;
+            margin: 1rem 0;
+            font-variant-numeric: tabular-nums;
+        }
+        .data-table th,
+        .data-table td {
+            padding: 0.5rem 0.75rem;
+            border-bottom: 0.0625rem solid var(--color-border);
+            text-align: left;
+        }
+        .data-table thead th {
+            position: sticky;
+            top: 0;
+            background: var(--color-bg-subtle);
+        }
+        .data-table tbody tr:hover {
+            background: var(--color-bg-hover);
+        }
+        """
+
+    def instance_style(self) -> str:
+        return self.variant[1] if self.variant else ""
+
+    def add_usage(self, usage) -> None:
+        super().add_usage(usage)
+        for tag in ("thead", "tbody", "tr", "th", "td"):
+            usage.add(tag, {})
+        if any(map(callable, self.formats)):
+            # Cells a callable formats may hold markup, unknown until rendered
+            usage.partial = True
+        # Markup cells are written as they are; rows after the first chunk
+        # are taken to use the same markup
+        for column in [self.headers, *self.sample]:
+            if isinstance(column, (list, tuple)):
+                for cell in column:
+                    if hasattr(cell, "__html__"):
+                        usage.add_markup(cell.__html__())
+
+    def _chunks(self):
+        """Yield lists of formatted columns, chunk_size rows at a time"""
+        if self.columns is not None:
+            length = len(self.columns[0]) if self.columns else 0
+            for start in range(0, length, self.chunk_size):
+                stop = start + self.chunk_size
+                yield [
+                    format_column(column[start:stop], fmt)
+                    for column, fmt in zip(self.columns, self.formats)
+                ]
+            return
+        while True:
+            chunk = list(islice(self.rows, self.chunk_size))
+            if not chunk:
+                return
+            columns = list(zip(*chunk))
+            yield [
+                format_column(column, fmt)
+                for column, fmt in zip(columns, self.formats + [None] * len(columns))
+            ]
+
+    def iter_html(self, indent: int = 0, indent_size: int = 2, minify=False):
+        """Yield the table markup in chunks of rows"""
+        aggressive = minify == AGGRESSIVE
+        if minify:
+            pad = inner = row_pad = close = ""
+        else:
+            pad = " " * indent
+            inner = "\n" + pad + " " * indent_size
+            row_pad = inner + " " * indent_size
+            close = "\n" + pad
+        # </td>, </th>, </tr>, </thead> and </tbody> are optional
+        cell_end, row_end = ("", "") if aggressive else ("</td>", "</tr>")
+        head_end = "" if aggressive else "</thead>"
+
+        yield f"{pad}<table{self._attrs.html(aggressive)}>"
+        if self.headers:
+            cells = f"{cell_end.replace('td', 'th')}<th>".join(
+                map(escape_text, self.headers)
+            )
+            yield (
+                f"{inner}<thead>{row_pad}<tr><th>{cells}"
+                f"{cell_end.replace('td', 'th')}{row_end}{inner}{head_end}"
+            )
+        yield f"{inner}<tbody>"
+        yield from self.iter_rows(minify, row_pad)
+        if aggressive:
+            yield "</table>"
+        else:
+            yield f"{inner}</tbody>{close}</table>{close and chr(10)}"
+
+    def iter_rows(self, minify=False, row_pad: str = ""):
+        """Yield the <tr> markup of the body rows in chunks"""
+        aggressive = minify == AGGRESSIVE
+        cell_end, row_end = ("", "") if aggressive else ("</td>", "</tr>")
+        cell_sep = f"{cell_end}<td>"
+        row_sep = f"{cell_end}{row_end}{row_pad}<tr><td>"
+        for columns in self._chunks():
+            rows = row_sep.join(map(cell_sep.join, zip(*columns)))
+            yield f"{row_pad}<tr><td>{rows}{cell_end}{row_end}"
+
+    def render(
+        self, indent: int = 0, indent_size: int = 2, minify: bool = False
+    ) -> str:
+        return "".join(self.iter_html(indent, indent_size, minify))
@@ -81,7 +81,9 @@ class Fieldset(Component):
 
 
 class Field(Component):
-    def __init__(self, **props):
+    def __init__(self, label=None, **props):
+        if label is not None:
+            props["label"] = label
         super().__init__("div", cls="form-field", **props)
         label_text = self.props.get("label")
         input_type = self.props.get("input_type", "text")
@@ -1,12 +1,29 @@
 from . import Component
+from ugui.components import variant_class
 
 
 class Grid(Component):
+    DEFAULTS = {"cols": "auto-fit", "min_width": "250px", "gap": "1rem"}
+
     def __init__(self, **props):
-        cols = props.pop("cols", "auto-fit")
-        min_width = props.pop("min_width", "250px")
-        gap = props.pop("gap", "1rem")
-        props["class"] = "grid"
+        cols = props.pop("cols", self.DEFAULTS["cols"])
+        min_width = props.pop("min_width", self.DEFAULTS["min_width"])
+        gap = props.pop("gap", self.DEFAULTS["gap"])
+
+        # Non-default layouts get their own hashed class next to .grid
+        self.variant = None
+        if (cols, min_width, gap) != tuple(self.DEFAULTS.values()):
+            self.variant = variant_class(
+                "grid",
+                (
+                    (
+                        "grid-template-columns",
+                        f"repeat({cols}, minmax({min_width}, 1fr))",
+                    ),
+                    ("gap", str(gap)),
+                ),
+            )
+        props["class"] = f"grid {self.variant[0]}" if self.variant else "grid"
 
         super().__init__("div", **props)
         self.cols = cols
@@ -14,12 +31,15 @@ class Grid(Component):
         self.gap = gap
 
     def style(self) -> str:
-        return f"""
-        .grid {{
+        return """
+        .grid {
             display: grid;
-            grid-template-columns: repeat({self.cols}, minmax({self.min_width}, 1fr));
-            gap: {self.gap};
+            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+            gap: 1rem;
             width: 100%;
             margin: 1rem 0;
-        }}
+        }
         """
+
+    def instance_style(self) -> str:
+        return self.variant[1] if self.variant else ""
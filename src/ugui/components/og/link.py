@@ -4,13 +4,15 @@ from ugui.html import Element
 
 
 class Link(Component):
-    def __init__(self, **props):
+    def __init__(self, text="", url="#", **props):
         # Extract link-specific props
-        text = props.pop("text", "")
-        url = props.pop("url", "#")
         material_icon = props.pop("material_icon", None)
         icon_position = props.pop("icon_position", "left")
         icon_size = props.pop("icon_size", "1.8rem")
+        # "viewport" or "off", links are prefetched on hover by default
+        prefetch = props.pop("prefetch", None)
+        if prefetch:
+            props["data-ugui-prefetch"] = prefetch
         # cls = f"link {props.pop('class', '')} {props.pop('cls', '')}".strip()
         props["class"] = "link"
 
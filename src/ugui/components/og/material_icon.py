@@ -1,6 +1,8 @@
+import re
+from functools import lru_cache
 from . import Component
 from pathlib import Path
-from ugui.html import TextNode
+from ugui.html import AGGRESSIVE, TextNode
 from ugui.utils.colors import colorhash
 
 
@@ -13,6 +15,34 @@ def load_svg(name: str) -> str:
     return icon_path.read_text()
 
 
+@lru_cache(maxsize=1024)
+def minify_svg(svg: str) -> str:
+    """Drop comments, whitespace between tags and attributes inline SVG ignores"""
+    svg = re.sub(r"<\?xml.*?\?>|<!--.*?-->", "", svg, flags=re.DOTALL).strip()
+    svg = re.sub(r">\s+<", "><", svg)
+    end = svg.find(">") + 1
+    root = svg[:end].replace(' xmlns="http://www.w3.org/2000/svg"', "")
+    if " style=" in root:
+        # The inline style sets the size, so width and height are redundant
+        root = re.sub(r' (?:width|height)="[^"]*"', "", root)
+        root = re.sub(r"([:;])\s+", r"\1", root)
+    return root + svg[end:]
+
+
+class SVGNode(TextNode):
+    """Raw inline SVG, minified when the page is minified aggressively"""
+
+    def __init__(self, svg: str):
+        super().__init__(svg, raw=True)
+
+    def render(
+        self, indent: int = 0, indent_size: int = 2, minify: bool = False
+    ) -> str:
+        if minify == AGGRESSIVE:
+            return minify_svg(self.text)
+        return super().render(indent, indent_size, minify)
+
+
 class MaterialIcon(Component):
     def __init__(self, **props):
         name = props.pop("name", "")
@@ -37,13 +67,12 @@ class MaterialIcon(Component):
 
         # Add SVG with styling
         self.append(
-            TextNode(
+            SVGNode(
                 svg_content.replace(
                     "<svg",
                     f'<svg style="width: {size}; height: {size}; fill: {color}"',
                     1,
-                ),
-                raw=True,
+                )
             )
         )
 
@@ -100,13 +100,13 @@ class NavBar(Component):
 
 
 class NavItem(Component):
-    def __init__(self, **props):
+    def __init__(self, label="", url="#", **props):
         # Keep special props from being passed to li element
-        label = props.pop("label", "")
-        url = props.pop("url", "#")
         icon = props.pop("icon", None)
         material_icon = props.pop("material_icon", None)
         icon_color = props.pop("icon_color", None)
+        # "hover" or "off", instant navigation prefetches nav items in view
+        prefetch = props.pop("prefetch", None)
         if icon_color == "auto":
             icon_color = colorhash(label)
 
@@ -115,6 +115,8 @@ class NavItem(Component):
 
         # Build link content
         a = Element("a", href=url, cls="nav-item")
+        if prefetch:
+            a.attrs["data-ugui-prefetch"] = prefetch
 
         # Handle icon (either raw icon or material icon)
         if material_icon:
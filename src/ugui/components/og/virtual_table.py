@@ -0,0 +1,112 @@
+from .data_table import DataTable
+from ugui.html import AGGRESSIVE, Attributes
+from ugui.tables import TableSource
+
+SCRIPT_URL = "/static/js/virtual_table.js"
+
+
+class VirtualTable(DataTable):
+    """A DataTable that ships one window of rows and loads more on scroll
+
+    Rows come from a TableSource registered with App.table_source. A sync
+    source fills the first window while the page is built; for an async one
+    pass ``rows`` fetched in the page function, or the client loads the
+    first window itself. Clicking a header sorts, the optional search box
+    filters, both through the source callback. Column formats and alignment
+    come from the source, so the rows loaded on scroll match.
+    """
+
+    def __init__(self, **props):
+        source: TableSource = props.pop("source")
+        sort = props.pop("sort", None)
+        filter = props.pop("filter", None)
+        height = props.pop("height", "24rem")
+        searchable = props.pop("searchable", False)
+        rows = props.pop("rows", None)
+        if "formats" in props or "numeric" in props:
+            raise TypeError(
+                "Pass formats and numeric to App.table_source, "
+                "the rows loaded on scroll use them too"
+            )
+
+        if rows is not None:
+            following = str(len(rows)) if len(rows) >= source.page_size else ""
+        elif source.is_async:
+            rows, following = [], "0"
+        else:
+            rows, following = source.fetch(0, source.page_size, sort, filter)
+
+        super().__init__(
+            rows=rows,
+            headers=source.headers,
+            formats=source.formats,
+            numeric=source.numeric,
+            **props,
+        )
+        self.source = source
+        self.searchable = searchable
+        self.wrapper_attrs = Attributes(
+            {
+                "class": "virtual-table",
+                "style": f"--virtual-table-height: {height}",
+                "data-url": source.url,
+                "data-next": following,
+                "data-limit": source.page_size,
+                "data-sort": sort or "",
+                "data-filter": filter or "",
+            }
+        )
+
+    def style(self) -> str:
+        return super().style() + """
+        .virtual-table-scroll {
+            max-height: var(--virtual-table-height);
+            overflow-y: auto;
+        }
+        .virtual-table-scroll .data-table {
+            margin: 0;
+        }
+        .virtual-table th {
+            cursor: pointer;
+        }
+        .virtual-table th[aria-sort="ascending"]::after { content: " \\25B2"; }
+        .virtual-table th[aria-sort="descending"]::after { content: " \\25BC"; }
+        .virtual-table-search {
+            width: 100%;
+            margin-bottom: 0.5rem;
+            padding: 0.5rem;
+        }
+        """
+
+    def add_usage(self, usage) -> None:
+        super().add_usage(usage)
+        usage.add("div", self.wrapper_attrs)
+        usage.add("div", {"class": "virtual-table-scroll"})
+        usage.add("input", {"class": "virtual-table-search", "type": "search"})
+        usage.add("script", {"src": SCRIPT_URL})
+
+    def iter_html(self, indent: int = 0, indent_size: int = 2, minify=False):
+        aggressive = minify == AGGRESSIVE
+        pad = "" if minify else " " * indent
+        inner = "" if minify else "\n" + pad + " " * indent_size
+        newline = "" if minify else "\n"
+        script_attrs = Attributes({"src": SCRIPT_URL, "defer": True})
+
+        yield f"{pad}<div{self.wrapper_attrs.html(aggressive)}>"
+        if self.searchable:
+            search = Attributes(
+                {
+                    "class": "virtual-table-search",
+                    "type": "search",
+                    "placeholder": "Filter",
+                    "value": self.wrapper_attrs["data-filter"],
+                }
+            )
+            yield f"{inner}<input{search.html(aggressive)}>"
+        yield f'{inner}<div class="virtual-table-scroll">{newline}'
+        yield from super().iter_html(
+            0 if minify else indent + 2 * indent_size, indent_size, minify
+        )
+        yield f"{inner}</div>" if minify else f"{pad}{' ' * indent_size}</div>"
+        yield f"{inner}<script{script_attrs.html(aggressive)}></script>"
+        yield f"{newline}{pad}</div>{newline}"
@@ -1,6 +1,9 @@
 from .base_css import BASE_CSS
 from ugui.components import Component
+from ugui.components.og.chart import LineChart, Sparkline
+from ugui.components.og.data_table import DataTable
 from ugui.components.og.material_icon import MaterialIcon
+from ugui.components.og.virtual_table import VirtualTable
 from ugui.html import Element
 
 
@@ -78,4 +81,8 @@ class Box(Component):
 __all__ = [
     "BASE_CSS",
     "Box",
+    "DataTable",
+    "LineChart",
+    "Sparkline",
+    "VirtualTable",
 ]
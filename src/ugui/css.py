@@ -1,4 +1,742 @@
+import hashlib
 import re
+from html import unescape
+from functools import lru_cache
+from typing import NamedTuple, Optional, Set, Tuple
+
+
+class Rule(NamedTuple):
+    """A style rule: selector list and (property, value) declarations"""
+
+    selector: str
+    declarations: tuple
+
+
+class AtRule(NamedTuple):
+    """An at-rule with nested rules (@media), declarations (@font-face) or neither"""
+
+    prelude: str
+    rules: Optional[tuple] = None
+    declarations: Optional[tuple] = None
+
+
+# At-rules whose blocks contain style rules that can be tree-shaken
+GROUP_AT_RULES = ("@media", "@supports", "@container", "@layer")
+# Conditional at-rules whose blocks can be merged when their preludes match
+MERGEABLE_AT_RULES = ("@media", "@supports", "@container")
+_NESTED_AT_RULE = re.compile(
+    r"@(?:-\w+-)?(?:media|supports|container|layer|keyframes|document)\b"
+)
+
+
+def _scan(css: str, pos: int, stops: str) -> int:
+    """Return the index of the first stop character outside strings and parens"""
+    depth = 0
+    quote = None
+    while pos < len(css):
+        char = css[pos]
+        if quote:
+            if char == "\\":
+                pos += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif depth <= 0 and char in stops:
+            return pos
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        pos += 1
+    return pos
+
+
+_IMPORTANT = re.compile(r"\s*!\s*important\s*$", re.IGNORECASE)
+
+
+def _collapse(text: str) -> str:
+    """Collapse whitespace unless the text contains a string"""
+    if "'" in text or '"' in text:
+        return text.strip()
+    return " ".join(text.split())
+
+
+def parse_declarations(body: str) -> tuple:
+    """Parse a declaration block into (property, value) pairs"""
+    declarations = []
+    pos = 0
+    while pos < len(body):
+        end = _scan(body, pos, ";")
+        colon = _scan(body, pos, ":")
+        if colon < end:
+            name = body[pos:colon].strip()
+            value = _IMPORTANT.sub(" !important", _collapse(body[colon + 1 : end]))
+            if name:
+                # Custom properties are case-sensitive
+                name = name if name.startswith("--") else name.lower()
+                declarations.append((name, value.strip()))
+        pos = end + 1
+    return tuple(declarations)
+
+
+def _parse_block(css: str, pos: int) -> Tuple[list, int]:
+    rules = []
+    while pos < len(css):
+        while pos < len(css) and css[pos].isspace():
+            pos += 1
+        if pos >= len(css):
+            break
+        if css[pos] == "}":
+            return rules, pos + 1
+
+        stop = _scan(css, pos, "{;}")
+        prelude = _collapse(css[pos:stop])
+        if stop >= len(css) or css[stop] != "{":
+            # Statement at-rules (@import, @charset) or stray declarations
+            if prelude.startswith("@"):
+                rules.append(AtRule(prelude))
+            pos = stop + 1 if stop < len(css) and css[stop] == ";" else stop
+            continue
+
+        if _NESTED_AT_RULE.match(prelude):
+            children, pos = _parse_block(css, stop + 1)
+            rules.append(AtRule(prelude, tuple(children)))
+            continue
+
+        # Find the matching closing brace of the declaration block
+        depth = 1
+        end = stop + 1
+        while end < len(css) and depth:
+            end = _scan(css, end, "{}")
+            if end < len(css):
+                depth += 1 if css[end] == "{" else -1
+                end += 1
+        declarations = parse_declarations(css[stop + 1 : end - 1])
+        if prelude.startswith("@"):
+            rules.append(AtRule(prelude, None, declarations))
+        elif prelude:
+            rules.append(Rule(prelude, declarations))
+        pos = end
+    return rules, pos
+
+
+@lru_cache(maxsize=512)
+def parse_css(css: str) -> tuple:
+    """Parse a style sheet into Rule and AtRule tuples (memoized)"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    return tuple(_parse_block(css, 0)[0])
+
+
+@lru_cache(maxsize=1024)
+def _prelude_key(prelude: str) -> str:
+    """Normalize an at-rule prelude for comparison, e.g. '(max-width:640px)'"""
+    prelude = re.sub(r"\(\s*", "(", prelude)
+    prelude = re.sub(r"\s*\)", ")", prelude)
+    return re.sub(r"\s*:\s*", ":", prelude)
+
+
+_VENDOR_VALUE = re.compile(r"(?:^|[\s(,])-(?:webkit|moz|ms|o)-")
+
+
+def _dedupe_declarations(declarations: tuple) -> tuple:
+    """Drop exact duplicate declarations, keeping the last one
+
+    Repeated properties with different values are kept since they are
+    usually deliberate fallbacks, e.g. ``height: 100vh; height: 100dvh``.
+    """
+    if len(set(declarations)) == len(declarations):
+        return declarations
+    seen = set()
+    kept = []
+    for declaration in reversed(declarations):
+        if declaration not in seen:
+            seen.add(declaration)
+            kept.append(declaration)
+    return tuple(reversed(kept))
+
+
+# Longhands whose shorthand does not share their first word, margin-top -> margin
+# is covered by the prefix
+_SHORTHANDS = {
+    "top": "inset",
+    "right": "inset",
+    "bottom": "inset",
+    "left": "inset",
+    "line-height": "font",
+    "row-gap": "gap",
+    "column-gap": "gap",
+    "align": "place",
+    "justify": "place",
+    "columns": "column",
+    "text-wrap": "white",
+}
+_VENDOR_PREFIX = re.compile(r"^-(?:webkit|moz|ms|o)-")
+_COMBINATOR = re.compile(r"\s*[>+~]\s*|\s+")
+_ATTRIBUTE_SELECTOR = re.compile(r"\[[^\]]*\]")
+_PSEUDO_ELEMENT = re.compile(
+    r"::?(before|after|first-line|first-letter|marker|placeholder|selection|"
+    r"backdrop|file-selector-button)\b"
+)
+
+
+@lru_cache(maxsize=4096)
+def _property_family(name: str) -> str:
+    """Properties that can override each other map to the same family"""
+    if name.startswith("--"):
+        return name
+    name = _VENDOR_PREFIX.sub("", name.lower())
+    if name in _SHORTHANDS:
+        return _SHORTHANDS[name]
+    family = name.split("-")[0]
+    return _SHORTHANDS.get(family, family)
+
+
+@lru_cache(maxsize=4096)
+def _subjects(selector: str) -> Optional[tuple]:
+    """(tag, ids, pseudo-element) of each selector's subject, None if unknown"""
+    if "(" in selector or "\\" in selector:
+        # Functional pseudo-classes may hold selector lists
+        return None
+    subjects = []
+    for part in split_selectors(selector):
+        compound = _COMBINATOR.split(_ATTRIBUTE_SELECTOR.sub("", part))[-1]
+        tag = re.match(r"[a-zA-Z][\w-]*", compound)
+        pseudo = _PSEUDO_ELEMENT.search(compound)
+        subjects.append(
+            (
+                tag.group().lower() if tag else None,
+                frozenset(re.findall(r"#([\w-]+)", compound)),
+                pseudo.group(1) if pseudo else None,
+            )
+        )
+    return tuple(subjects)
+
+
+def _may_match_same(first: str, second: str) -> bool:
+    """Whether two selector lists might match the same element"""
+    if first == second:
+        return True
+    first_subjects, second_subjects = _subjects(first), _subjects(second)
+    if first_subjects is None or second_subjects is None:
+        return True
+    for tag, ids, pseudo in first_subjects:
+        for other_tag, other_ids, other_pseudo in second_subjects:
+            if pseudo != other_pseudo:
+                continue
+            if tag and other_tag and tag != other_tag:
+                continue
+            if ids and other_ids and ids != other_ids:
+                continue
+            return True
+    return False
+
+
+def _rule_properties(rule) -> list:
+    """(selector, property families) of a rule or the rules in an at-rule"""
+    if isinstance(rule, Rule):
+        families = frozenset(_property_family(name) for name, _ in rule.declarations)
+        return [(rule.selector, families)]
+    declared = []
+    for child in rule.rules or ():
+        declared += _rule_properties(child)
+    return declared
+
+
+def _conflicts(first: list, second: list) -> bool:
+    """Whether reordering two groups of rules could change the cascade"""
+    for selector, families in first:
+        for other_selector, other_families in second:
+            if (
+                (not families.isdisjoint(other_families))
+                or "all" in families
+                or "all" in other_families
+            ) and _may_match_same(selector, other_selector):
+                return True
+    return False
+
+
+def _merge_groups(rules: list) -> list:
+    """Merge @media, @supports and @container blocks with the same prelude
+
+    Blocks are merged into the position of the last one. Moving a block past
+    a rule that might match the same elements and set the same properties
+    could change the cascade, so a block is only merged forward while no such
+    rule sits in between.
+    """
+    merged = list(rules)
+    # prelude key -> (index, declared) of the block later ones merge into
+    open_blocks = {}
+    for index, rule in enumerate(rules):
+        if isinstance(rule, AtRule) and (
+            rule.rules is None or "keyframes" in rule.prelude
+        ):
+            continue
+        mergeable = isinstance(rule, AtRule) and rule.prelude.startswith(
+            MERGEABLE_AT_RULES
+        )
+        key = _prelude_key(rule.prelude) if mergeable else None
+        declared = _rule_properties(rule)
+        for other, (block_index, block_declared) in list(open_blocks.items()):
+            if other != key and _conflicts(declared, block_declared):
+                del open_blocks[other]
+        if not mergeable:
+            continue
+        if key in open_blocks:
+            block_index, block_declared = open_blocks[key]
+            rule = rule._replace(rules=merged[block_index].rules + rule.rules)
+            merged[block_index] = None
+            merged[index] = rule
+            declared = block_declared + declared
+        open_blocks[key] = (index, declared)
+    return [rule for rule in merged if rule is not None]
+
+
+def _drop_overridden(rules: list) -> list:
+    """Remove declarations overridden by a later rule with the same selector"""
+    # selector -> {property: important} declared by later rules
+    later = {}
+    kept = []
+    for rule in reversed(rules):
+        if not isinstance(rule, Rule):
+            kept.append(rule)
+            continue
+        overrides = later.setdefault(rule.selector, {})
+        declarations = []
+        for name, value in reversed(rule.declarations):
+            important = value.endswith("!important")
+            if (
+                name in overrides
+                and overrides[name] >= important
+                and not _VENDOR_VALUE.search(value)
+            ):
+                continue
+            declarations.append((name, value))
+        for name, value in rule.declarations:
+            if not _VENDOR_VALUE.search(value):
+                important = value.endswith("!important")
+                overrides[name] = max(overrides.get(name, False), important)
+        if declarations:
+            kept.append(rule._replace(declarations=tuple(reversed(declarations))))
+    kept.reverse()
+    return kept
+
+
+def optimize(rules: tuple) -> tuple:
+    """Deduplicate rules and declarations and merge matching media blocks
+
+    Works per at-rule context: adjacent rules with the same selector are
+    joined, declarations overridden by a later rule with the same selector are
+    dropped (so fully duplicated rules disappear), identical at-rules are
+    emitted once, at their last position for blocks, and @media, @supports and @container blocks with the same
+    condition are merged.
+    """
+    joined = []
+    seen = set()
+    merged = _merge_groups(list(rules))
+    # A repeated block wins the cascade where it last appears, so only its
+    # last copy is kept. Statements such as @import have to stay in front and
+    # @layer blocks fix the layer order where they first appear.
+    last = {
+        rule: index
+        for index, rule in enumerate(merged)
+        if isinstance(rule, AtRule)
+        and (rule.rules is not None or rule.declarations is not None)
+        and not rule.prelude.startswith("@layer")
+    }
+    for index, rule in enumerate(merged):
+        if isinstance(rule, Rule):
+            if joined and isinstance(joined[-1], Rule):
+                if joined[-1].selector == rule.selector:
+                    previous = joined.pop()
+                    rule = rule._replace(
+                        declarations=previous.declarations + rule.declarations
+                    )
+            joined.append(
+                rule._replace(declarations=_dedupe_declarations(rule.declarations))
+            )
+            continue
+        if last.get(rule, index) != index or rule in seen:
+            continue
+        seen.add(rule)
+        if rule.rules is not None:
+            children = optimize(rule.rules)
+            if children:
+                joined.append(rule._replace(rules=children))
+        else:
+            joined.append(rule)
+    return tuple(_drop_overridden(joined))
+
+
+def _strip_pseudo(selector: str) -> str:
+    """Remove pseudo-classes and pseudo-elements including their arguments
+
+    Functional pseudo-classes such as :not(), :is() and :has() are dropped as
+    a whole, which treats them as always matching and keeps shaking safe.
+    """
+    out = []
+    pos = 0
+    while pos < len(selector):
+        char = selector[pos]
+        if char == "[":
+            end = _scan(selector, pos + 1, "]")
+            out.append(selector[pos : end + 1])
+            pos = end + 1
+        elif char == ":":
+            pos += 1
+            while pos < len(selector) and selector[pos] == ":":
+                pos += 1
+            while pos < len(selector) and (
+                selector[pos].isalnum() or selector[pos] in "-_"
+            ):
+                pos += 1
+            if pos < len(selector) and selector[pos] == "(":
+                pos = _scan(selector, pos + 1, ")") + 1
+        else:
+            out.append(char)
+            pos += 1
+    return "".join(out)
+
+
+_ATTRIBUTE = re.compile(r"\[\s*(?:[\w*-]*\|)?([\w:-]+)[^\]]*\]")
+# [name=value], the one operator that pins the whole value
+_ATTRIBUTE_VALUE = re.compile(
+    r"\[\s*(?:[\w*-]*\|)?([\w:-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s\]]+))"
+    r"\s*[iIsS]?\s*\]"
+)
+_CLASS = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_ID = re.compile(r"#(-?[_a-zA-Z][\w-]*)")
+_TAG = re.compile(r"(?:^|[\s>+~])(?:[\w*-]*\|)?([a-zA-Z][\w-]*)")
+
+
+def split_selectors(selector: str) -> list:
+    """Split a selector list on top-level commas"""
+    parts = []
+    pos = 0
+    while pos <= len(selector):
+        end = _scan(selector, pos, ",")
+        parts.append(selector[pos:end].strip())
+        pos = end + 1
+    return [part for part in parts if part]
+
+
+@lru_cache(maxsize=4096)
+def selector_requirements(selector: str) -> tuple:
+    """Return (selector, tags, classes, ids, attributes, values) for each selector
+
+    Values are the (attribute, value) pairs of [name=value] selectors,
+    lowercased since some attributes compare case-insensitively.
+    """
+    requirements = []
+    for part in split_selectors(selector):
+        simple = _strip_pseudo(part)
+        values = frozenset(
+            (name.lower(), (double or single or bare).lower())
+            for name, double, single, bare in _ATTRIBUTE_VALUE.findall(simple)
+        )
+        attributes = frozenset(m.lower() for m in _ATTRIBUTE.findall(simple))
+        simple = _ATTRIBUTE.sub(" ", simple)
+        classes = frozenset(_CLASS.findall(simple))
+        ids = frozenset(_ID.findall(simple))
+        simple = _ID.sub(" ", _CLASS.sub(" ", simple))
+        tags = frozenset(m.lower() for m in _TAG.findall(simple))
+        requirements.append((part, tags, classes, ids, attributes, values))
+    return tuple(requirements)
+
+
+_VARIABLE = re.compile(r"var\(\s*(--[\w-]+)")
+_MARKUP_TAG = re.compile(r"<([a-zA-Z][\w:-]*)([^>]*)>")
+_MARKUP_ATTR = re.compile(
+    r"([^\s\"'>/=]+)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+)))?"
+)
+
+
+class SelectorUsage:
+    """Tag names, classes, ids and attributes present in a document"""
+
+    def __init__(self):
+        # The document element and body always exist in the browser
+        self.tags: Set[str] = {"html", "head", "body"}
+        self.classes: Set[str] = set()
+        self.ids: Set[str] = set()
+        self.attributes: Set[str] = {"lang"}
+        # Lowercased (attribute, value) pairs, for [name=value] selectors
+        self.values: Set[Tuple[str, str]] = set()
+        # Attributes allowed with any value, such as ones set by scripts
+        self.any_values: Set[str] = set()
+        # Custom properties read by inline styles, var(--name)
+        self.variables: Set[str] = set()
+        # Set when some content is only known while rendering, nothing is shaken
+        self.partial = False
+
+    def add(self, tag: str, attrs: dict) -> None:
+        """Record an element"""
+        self.tags.add(tag)
+        for name, value in attrs.items():
+            name = name.lower()
+            self.attributes.add(name)
+            if isinstance(value, str):
+                if name == "class":
+                    self.classes.update(value.split())
+                elif name == "id":
+                    self.ids.add(value)
+                elif name == "style" and "var(" in value:
+                    self.variables.update(_VARIABLE.findall(value))
+            if value is not None and value is not False:
+                value = "" if value is True else str(value)
+                self.values.add((name, value.lower()))
+
+    def add_markup(self, html: str) -> None:
+        """Record the elements of a raw HTML fragment, such as inline SVG"""
+        for tag, attrs in _MARKUP_TAG.findall(html):
+            values = {}
+            for name, double, single, bare in _MARKUP_ATTR.findall(attrs):
+                values[name] = unescape(double or single or bare)
+            self.add(tag.lower(), values)
+
+    def update(self, other: "SelectorUsage") -> None:
+        """Add the usage of another document, e.g. another page"""
+        self.tags |= other.tags
+        self.classes |= other.classes
+        self.ids |= other.ids
+        self.attributes |= other.attributes
+        self.values |= other.values
+        self.any_values |= other.any_values
+        self.variables |= other.variables
+        self.partial |= other.partial
+
+    def allow(self, selector: str) -> None:
+        """Treat what a selector needs as present, e.g. classes added by scripts
+
+        A bare [name] allows the attribute with any value.
+        """
+        for _, tags, classes, ids, attributes, values in selector_requirements(
+            selector
+        ):
+            self.tags |= tags
+            self.classes |= classes
+            self.ids |= ids
+            self.attributes |= attributes
+            self.values |= values
+            self.any_values |= attributes - {name for name, _ in values}
+
+    def may_match(self, tags, classes, ids, attributes, values) -> bool:
+        return (
+            tags <= self.tags
+            and classes <= self.classes
+            and ids <= self.ids
+            and attributes <= self.attributes
+            and (
+                values <= self.values
+                or all(v in self.values or v[0] in self.any_values for v in values)
+            )
+        )
+
+    def filter_selector(self, selector: str) -> str:
+        """Drop the selectors of a list that cannot match, '' if none can"""
+        parts = [
+            part
+            for part, *tokens in selector_requirements(selector)
+            if self.may_match(*tokens)
+        ]
+        return ", ".join(parts)
+
+    def shake(self, rules: tuple) -> list:
+        """Remove rules that cannot match, keeping @keyframes, @font-face etc."""
+        kept = []
+        for rule in rules:
+            if isinstance(rule, Rule):
+                selector = self.filter_selector(rule.selector)
+                if selector:
+                    kept.append(rule._replace(selector=selector))
+            elif rule.rules is not None and rule.prelude.startswith(GROUP_AT_RULES):
+                children = self.shake(rule.rules)
+                if children:
+                    kept.append(rule._replace(rules=tuple(children)))
+            else:
+                kept.append(rule)
+        return kept
+
+
+@lru_cache(maxsize=4096)
+def _minify_selector(selector: str) -> str:
+    if "'" in selector or '"' in selector:
+        return selector
+    return re.sub(r"\s*([,>+~])\s*", r"\1", selector)
+
+
+@lru_cache(maxsize=4096)
+def _minify_value(value: str) -> str:
+    value = value.replace(" !important", "!important")
+    if "'" in value or '"' in value or "url(" in value:
+        return value
+    value = re.sub(r"\s*,\s*", ",", value)
+    # 0.5rem -> .5rem
+    return re.sub(r"(?<![\w.])0\.(\d)", r".\1", value)
+
+
+def _declarations(declarations: tuple, minify: bool, indent: str) -> list:
+    if minify:
+        return [
+            ";".join(f"{name}:{_minify_value(value)}" for name, value in declarations)
+        ]
+    return [f"{indent}{name}: {value};" for name, value in declarations]
+
+
+def serialize(rules, minify: bool = False, indent: str = "") -> str:
+    """Turn parsed rules back into CSS text"""
+    if minify:
+        parts = []
+        for rule in rules:
+            if isinstance(rule, Rule):
+                body = _declarations(rule.declarations, True, "")[0]
+                parts.append(f"{_minify_selector(rule.selector)}{{{body}}}")
+            elif rule.rules is not None:
+                prelude = _prelude_key(rule.prelude)
+                parts.append(f"{prelude}{{{serialize(rule.rules, True)}}}")
+            elif rule.declarations is not None:
+                body = _declarations(rule.declarations, True, "")[0]
+                parts.append(f"{rule.prelude}{{{body}}}")
+            else:
+                parts.append(f"{rule.prelude};")
+        return "".join(parts)
+
+    lines = []
+    inner = indent + "    "
+    for rule in rules:
+        if isinstance(rule, AtRule) and rule.rules is not None:
+            lines.append(f"{indent}{rule.prelude} {{")
+            lines.append(serialize(rule.rules, False, inner))
+            lines.append(f"{indent}}}")
+        elif isinstance(rule, AtRule) and rule.declarations is None:
+            lines.append(f"{indent}{rule.prelude};")
+        else:
+            head = rule.selector if isinstance(rule, Rule) else rule.prelude
+            lines.append(f"{indent}{head} {{")
+            lines += _declarations(rule.declarations, False, inner)
+            lines.append(f"{indent}}}")
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=128)
+def compile_css(blocks: tuple) -> tuple:
+    """Parse and optimize a sequence of style blocks as one sheet (memoized)"""
+    rules = ()
+    for block in blocks:
+        rules += parse_css(block)
+    return optimize(rules)
+
+
+@lru_cache(maxsize=256)
+def css_digest(css: str) -> str:
+    """Content hash of a style sheet, used in cacheable stylesheet URLs"""
+    return hashlib.blake2s(css.encode(), digest_size=8).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def block_digest(css: str) -> str:
+    """css_digest of a registered style block, the same blocks recur on every page"""
+    return css_digest(css)
+
+
+_LICENSE_COMMENT = re.compile(r"/\*!.*?\*/", re.DOTALL)
+
+
+def _sheet_classes(rules) -> Set[str]:
+    classes = set()
+    for rule in rules:
+        if isinstance(rule, Rule):
+            for _, _, names, *_ in selector_requirements(rule.selector):
+                classes |= names
+        elif rule.rules is not None:
+            classes |= _sheet_classes(rule.rules)
+    return classes
+
+
+def _declared(rules):
+    """Yield every declaration of a sheet, at any depth"""
+    for rule in rules:
+        if isinstance(rule, AtRule) and rule.rules is not None:
+            yield from _declared(rule.rules)
+        elif rule.declarations:
+            yield from rule.declarations
+
+
+def _drop_variables(rules, unused: Set[str]) -> list:
+    kept = []
+    for rule in rules:
+        if isinstance(rule, AtRule) and rule.rules is not None:
+            children = _drop_variables(rule.rules, unused)
+            if children:
+                kept.append(rule._replace(rules=tuple(children)))
+        elif isinstance(rule, Rule):
+            declarations = tuple(d for d in rule.declarations if d[0] not in unused)
+            if declarations:
+                kept.append(rule._replace(declarations=declarations))
+        else:
+            kept.append(rule)
+    return kept
+
+
+def prune_variables(rules, keep: Set[str] = frozenset()) -> list:
+    """Drop custom property declarations nothing reads through var()"""
+    custom = {}
+    used = set(keep)
+    for name, value in _declared(rules):
+        if name.startswith("--"):
+            custom.setdefault(name, []).append(value)
+        else:
+            used.update(_VARIABLE.findall(value))
+    # Variables read by the values of variables in use, until nothing changes
+    pending = list(used)
+    while pending:
+        for value in custom.get(pending.pop(), ()):
+            for name in _VARIABLE.findall(value):
+                if name not in used:
+                    used.add(name)
+                    pending.append(name)
+    return _drop_variables(rules, set(custom) - used)
+
+
+def purge_css(css: str, usage: SelectorUsage, safelist=()) -> str:
+    """Minify a third-party sheet down to the rules usage can match
+
+    Custom properties that no remaining rule or inline style reads are
+    dropped too. Safelist entries are selectors whose requirements are kept,
+    such as ".modal-is-open" or "[data-theme]", custom property names, or
+    compiled patterns matched against the class and custom property names
+    in the sheet. /*! license comments are preserved.
+    """
+    rules = parse_css(css)
+    allowed = SelectorUsage()
+    allowed.update(usage)
+    patterns = [entry for entry in safelist if isinstance(entry, re.Pattern)]
+    for entry in safelist:
+        if isinstance(entry, re.Pattern):
+            allowed.classes.update(filter(entry.search, _sheet_classes(rules)))
+        elif entry.startswith("--"):
+            allowed.variables.add(entry)
+        else:
+            allowed.allow(entry)
+    rules = allowed.shake(rules)
+    keep = set(allowed.variables)
+    for pattern in patterns:
+        keep.update(n for n, _ in _declared(rules) if pattern.search(n))
+    purged = serialize(prune_variables(rules, keep), minify=True)
+    notices = "\n".join(_LICENSE_COMMENT.findall(css))
+    if not notices:
+        return purged
+    # @charset has to stay the first thing in the file
+    charset = ""
+    if purged.startswith("@charset"):
+        charset, _, purged = purged.partition(";")
+        charset += ";"
+    return f"{charset}{notices}\n{purged}"
+
+
+@lru_cache(maxsize=256)
+def _render(blocks: tuple, minify: bool) -> str:
+    return serialize(compile_css(blocks), minify)
 
 
 class CSSRegistry:
@@ -36,11 +774,12 @@ class CSSRegistry:
     }
 
     def __init__(self):
-        self._styles = set()
+        # Insertion ordered, so rules of equal priority keep a stable order
+        self._styles = {}
 
     def add(self, css: str) -> None:
         """Add CSS rules to the registry"""
-        self._styles.add(css.strip())
+        self._styles[css.strip()] = None
 
     def _get_rule_priority(self, rule: str) -> int:
         """Get the priority of a CSS rule based on its selector"""
@@ -50,19 +789,29 @@ class CSSRegistry:
                 return priority
         return 100  # Regular CSS rules get higher priority
 
-    def render(self, minify: bool = False) -> str:
+    def render(
+        self, minify: bool = False, usage: Optional[SelectorUsage] = None
+    ) -> str:
         """Render all registered CSS rules
 
         Args:
             minify: If True, removes unnecessary whitespace from the output
+            usage: If given, drop rules whose selectors cannot match it
         """
         # Sort rules by priority
-        sorted_rules = sorted(self._styles, key=self._get_rule_priority)
+        blocks = tuple(sorted(self._styles, key=self._get_rule_priority))
+        if usage is None or usage.partial:
+            return _render(blocks, minify)
+        return serialize(usage.shake(compile_css(blocks)), minify)
 
-        if minify:
-            css = "\n".join(sorted_rules)
-            css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
-            css = re.sub(r"\s+", " ", css)
-            return css.strip()
+    def digests(self) -> list:
+        """Digests of the registered blocks, to tell which ones a client has"""
+        return [block_digest(css) for css in self._styles]
 
-        return "\n".join(rule.strip() for rule in sorted_rules)
+    def without(self, digests) -> "CSSRegistry":
+        """A registry of the blocks whose digests are not in digests"""
+        registry = CSSRegistry()
+        registry._styles = {
+            css: None for css in self._styles if block_digest(css) not in digests
+        }
+        return registry
@@ -0,0 +1,505 @@
+"""Array-backed document tree for very large or deeply nested pages
+
+``Page(flat=True)`` builds elements into a FlatTree instead of one Element
+object per node. Nodes are rows of parallel integer arrays: kind (a tag id,
+or text, raw text or object), data (the offset of the element's attributes
+in the attribute name and value lists, or a text or object index), number
+of attributes, parent, first child, last child and next sibling. Rendering
+walks the arrays with an explicit stack, so nesting depth is not limited by
+the interpreter's recursion limit.
+
+The builder hands out FlatElement handles, which are only an index into the
+tree. Components, <head> and <style> stay regular objects and are stored as
+object nodes.
+"""
+
+from array import array
+from types import MappingProxyType
+from typing import Iterator, List, Optional, Union
+from .css import SelectorUsage
+from .html import (
+    AGGRESSIVE,
+    Element,
+    LazyChildren,
+    Node,
+    TextNode,
+    _COLLAPSIBLE,
+    _WHITESPACE,
+    can_omit_end_tag,
+    defaults,
+    is_lazy_source,
+    minified_attrs,
+    normalize_attributes,
+    quoted_attrs,
+    tag_name,
+)
+from .markup import escape_text
+
+# Kinds of nodes that are not elements; elements store their tag id
+TEXT, RAW, OBJECT, ROOT = -1, -2, -3, -4
+# Tags built as regular elements, the document and styles look for them
+OBJECT_TAGS = {"head", "style"}
+
+
+class FlatElement:
+    """Handle of a node in a FlatTree, returned by the page builder"""
+
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree: "FlatTree", index: int):
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, FlatElement)
+            and other.tree is self.tree
+            and other.index == self.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self) -> str:
+        return f"<FlatElement {self._name or 'root'} #{self.index}>"
+
+    @property
+    def _name(self) -> Optional[str]:
+        kind = self.tree.kind[self.index]
+        return self.tree.names[kind] if kind >= 0 else None
+
+    @property
+    def parent(self) -> Union["FlatElement", "FlatTree"]:
+        parent = self.tree.parents[self.index]
+        return self.tree if parent < 0 else FlatElement(self.tree, parent)
+
+    @property
+    def attrs(self) -> MappingProxyType:
+        """Read-only, attributes are fixed once the element is built"""
+        return MappingProxyType(self.tree.attributes(self.index))
+
+    @property
+    def children(self) -> list:
+        return [self.tree.child(index) for index in self.tree.iter_children(self.index)]
+
+    validate_content = Element.validate_content
+
+    def append(self, child: Union[Node, str]) -> "FlatElement":
+        self.tree.append(self.index, child)
+        return self
+
+    def __enter__(self):
+        page = self.tree.page
+        if page is not None:
+            page._current = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        page = self.tree.page
+        if page is not None and page._current == self:
+            page._current = self.parent
+
+
+class FlatTree(Node):
+    """Elements and text stored as parallel arrays, rendered without recursion"""
+
+    # Output parts joined into each piece of iter_html
+    FLUSH_PARTS = 4096
+
+    def __init__(self, page=None):
+        super().__init__()
+        self.page = page
+        # Tag names by id
+        self.names: List[str] = []
+        self._tag_ids = {}
+        # Attributes of all elements, each element owns a slice
+        self.attr_names: List[str] = []
+        self.attr_values: list = []
+        self.texts: List[str] = []
+        self.objects: List[Node] = []
+        # One row per node, row 0 is the root holding the top-level nodes
+        self.kind = array("i", [ROOT])
+        self.data = array("i", [0])
+        self.attr_count = array("H", [0])
+        self.parents = array("i", [-1])
+        self.first_child = array("i", [-1])
+        self.last_child = array("i", [-1])
+        self.next_sibling = array("i", [-1])
+        self.root = FlatElement(self, 0)
+
+    def __len__(self) -> int:
+        return len(self.kind) - 1
+
+    def _tag_id(self, name: str) -> int:
+        """Id of a tag as written in the builder, page.Div and page.div alike"""
+        tag = self._tag_ids.get(name)
+        if tag is None:
+            tag = self._tag_ids[name] = len(self.names)
+            self.names.append(tag_name(name))
+        return tag
+
+    def _add(self, parent: int, kind: int, data: int, attr_count: int = 0) -> int:
+        index = len(self.kind)
+        self.kind.append(kind)
+        self.data.append(data)
+        self.attr_count.append(attr_count)
+        self.parents.append(parent)
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        last = self.last_child[parent]
+        if last < 0:
+            self.first_child[parent] = index
+        else:
+            self.next_sibling[last] = index
+        self.last_child[parent] = index
+        return index
+
+    def element(self, parent: int, name: str, attrs: dict) -> FlatElement:
+        """Add an element under parent and return its handle"""
+        offset = len(self.attr_names)
+        if attrs:
+            # Later duplicates of a name overwrite, as in a dict
+            fixed = normalize_attributes(attrs)
+            self.attr_names += fixed
+            self.attr_values += fixed.values()
+        tag = self._tag_id(name)
+        index = self._add(parent, tag, offset, len(self.attr_names) - offset)
+        return FlatElement(self, index)
+
+    def attributes(self, index: int) -> dict:
+        start = self.data[index]
+        end = start + self.attr_count[index]
+        return dict(zip(self.attr_names[start:end], self.attr_values[start:end]))
+
+    def _attrs_html(self, index: int, minified: bool = False) -> str:
+        count = self.attr_count[index]
+        if not count:
+            return ""
+        start = self.data[index]
+        pairs = zip(
+            self.attr_names[start : start + count],
+            self.attr_values[start : start + count],
+        )
+        return minified_attrs(pairs) if minified else quoted_attrs(pairs)
+
+    def append(self, parent: int, child: Union[Node, str]) -> None:
+        """Add text or a node under parent"""
+        if is_lazy_source(child):
+            child = LazyChildren(child)
+        if isinstance(child, str):
+            self._add(parent, RAW if self._raw_text(parent) else TEXT, len(self.texts))
+            self.texts.append(child)
+        elif type(child) is TextNode:
+            raw = child.raw or self._raw_text(parent)
+            self._add(parent, RAW if raw else TEXT, len(self.texts))
+            self.texts.append(child.text)
+        elif parent == 0 and isinstance(child, Element) and child._name == "head":
+            # The document reorders the head, so it lives beside the tree
+            document = self.parent
+            document.children.insert(document.children.index(self), child)
+            child.parent = self.root
+        else:
+            self._add(parent, OBJECT, len(self.objects))
+            self.objects.append(child)
+            child.parent = FlatElement(self, parent)
+
+    def _raw_text(self, index: int) -> bool:
+        """Whether text under the node is written unescaped, as in <script>"""
+        kind = self.kind[index]
+        name = self.names[kind] if kind >= 0 else getattr(self.parent, "_name", None)
+        return name in defaults.raw_text_tags
+
+    def child(self, index: int):
+        """The handle, text or object of a node"""
+        kind = self.kind[index]
+        if kind == OBJECT:
+            return self.objects[self.data[index]]
+        if kind < 0:
+            return TextNode(self.texts[self.data[index]], raw=kind == RAW)
+        return FlatElement(self, index)
+
+    def iter_children(self, index: int):
+        child = self.first_child[index]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    @property
+    def leading_name(self) -> Optional[str]:
+        """Tag of the first top-level node, for end tag omission before it"""
+        for index in self.iter_children(0):
+            kind = self.kind[index]
+            if kind >= 0:
+                return self.names[kind]
+            if kind == OBJECT:
+                return getattr(self.objects[self.data[index]], "_name", "")
+            if self._has_output(index):
+                return ""
+        return None
+
+    def add_usage(self, usage: SelectorUsage, index: int = 0) -> None:
+        """Record the nodes under index, the whole tree by default"""
+        if index:
+            self._node_usage(index, usage)
+        stack = [self.first_child[index]]
+        while stack:
+            node = stack.pop()
+            if node >= 0:
+                stack.append(self.next_sibling[node])
+                stack.append(self.first_child[node])
+                self._node_usage(node, usage)
+
+    def _node_usage(self, node: int, usage: SelectorUsage) -> None:
+        kind = self.kind[node]
+        if kind >= 0:
+            usage.add(self.names[kind], self.attributes(node))
+        elif kind == RAW:
+            usage.add_markup(self.texts[self.data[node]])
+        elif kind == TEXT:
+            text = self.texts[self.data[node]]
+            if type(text) is not str and hasattr(text, "__html__"):
+                usage.add_markup(text.__html__())
+        elif kind == OBJECT:
+            pending = [self.objects[self.data[node]]]
+            while pending:
+                child = pending.pop()
+                child.add_usage(usage)
+                pending.extend(child.children)
+
+    def add_critical_usage(self, usage: SelectorUsage, count: int) -> None:
+        """Record the body and its first count child elements"""
+        for index in self.iter_children(0):
+            if self.kind[index] >= 0 and self.names[self.kind[index]] == "body":
+                self._node_usage(index, usage)
+                elements = [
+                    child
+                    for child in self.iter_children(index)
+                    if self.kind[child] >= 0
+                    or isinstance(self.objects[self.data[child]], Element)
+                ]
+                for child in elements[:count]:
+                    if self.kind[child] == OBJECT:
+                        self._node_usage(child, usage)
+                    else:
+                        self.add_usage(usage, child)
+
+    def _has_output(self, index: int) -> bool:
+        kind = self.kind[index]
+        if kind == TEXT:
+            return self.texts[self.data[index]] != ""
+        if kind == RAW:
+            return self.texts[self.data[index]].strip() != ""
+        if kind == OBJECT:
+            node = self.objects[self.data[index]]
+            return not isinstance(node, TextNode) or str(node.text).strip() != ""
+        return True
+
+    def _following(self, index: int) -> Optional[str]:
+        """Tag of the next sibling with output, "" for text, None if none"""
+        sibling = self.next_sibling[index]
+        while sibling >= 0 and not self._has_output(sibling):
+            sibling = self.next_sibling[sibling]
+        if sibling >= 0:
+            kind = self.kind[sibling]
+            if kind >= 0:
+                return self.names[kind]
+            if kind == OBJECT:
+                return getattr(self.objects[self.data[sibling]], "_name", "") or ""
+            return ""
+        if self.parents[index] > 0:
+            return None
+        # Top-level nodes are followed by whatever follows the tree
+        parent = self.parent
+        if parent is None or parent.children[-1] is self:
+            return None
+        return ""
+
+    def _parent_name(self, index: int) -> Optional[str]:
+        parent = self.parents[index]
+        if parent > 0:
+            return self.names[self.kind[parent]]
+        return getattr(self.parent, "_name", None)
+
+    def render(
+        self, indent: int = 0, indent_size: int = 2, minify: bool = False
+    ) -> str:
+        if minify == AGGRESSIVE:
+            return "".join(self._iter_aggressive())
+        if minify:
+            return "".join(self._iter_minified())
+        return self._render_pretty(indent, indent_size)
+
+    def iter_html(
+        self, indent: int = 0, indent_size: int = 2, minify: bool = False
+    ) -> Iterator[str]:
+        """Yield minified output every FLUSH_PARTS parts, indented output whole"""
+        if minify == AGGRESSIVE:
+            yield from self._iter_aggressive(self.FLUSH_PARTS)
+        elif minify:
+            yield from self._iter_minified(self.FLUSH_PARTS)
+        else:
+            yield self._render_pretty(indent, indent_size)
+
+    def _iter_minified(self, flush: int = 0) -> Iterator[str]:
+        kind, data, names = self.kind, self.data, self.names
+        first_child, next_sibling = self.first_child, self.next_sibling
+        texts, objects, attrs_html = self.texts, self.objects, self._attrs_html
+        void_tags = defaults.void_tags
+        out = []
+        open_elements = []
+        node = first_child[0]
+        while True:
+            while node < 0:
+                if not open_elements:
+                    yield "".join(out)
+                    return
+                parent = open_elements.pop()
+                out.append(f"</{names[kind[parent]]}>")
+                node = next_sibling[parent]
+            if flush and len(out) >= flush:
+                yield "".join(out)
+                out = []
+            k = kind[node]
+            if k >= 0:
+                name = names[k]
+                attrs = attrs_html(node)
+                if name in void_tags:
+                    out.append(f"<{name}{attrs}/>")
+                else:
+                    out.append(f"<{name}{attrs}>")
+                    open_elements.append(node)
+                    node = first_child[node]
+                    continue
+            elif k == TEXT:
+                out.append(escape_text(texts[data[node]]).strip())
+            elif k == RAW:
+                out.append(texts[data[node]].strip())
+            else:
+                out.append(objects[data[node]].render(0, 0, True))
+            node = next_sibling[node]
+
+    def _render_pretty(self, indent: int, indent_size: int) -> str:
+        kind, data, names = self.kind, self.data, self.names
+        first_child, next_sibling = self.first_child, self.next_sibling
+        texts, objects, attrs_html = self.texts, self.objects, self._attrs_html
+        void_tags = defaults.void_tags
+        out = []
+        # (node, position of its start tag, output count when opened)
+        open_elements = []
+        # Parts with non-whitespace output, an element without any is empty
+        filled = 0
+        node = first_child[0]
+        while True:
+            while node < 0:
+                if not open_elements:
+                    return "".join(out)
+                parent, position, opened = open_elements.pop()
+                indent -= indent_size
+                spaces = " " * indent
+                name = names[kind[parent]]
+                if filled == opened:
+                    del out[position + 1 :]
+                    attrs = attrs_html(parent)
+                    out[position] = f"{spaces}<{name}{attrs}></{name}>\n"
+                else:
+                    # Same as rstrip() on the joined content
+                    while not out[-1].strip():
+                        out.pop()
+                    out[-1] = out[-1].rstrip()
+                    out.append(f"\n{spaces}</{name}>\n")
+                node = next_sibling[parent]
+
+            k = kind[node]
+            spaces = " " * indent
+            if k >= 0:
+                filled += 1
+                name = names[k]
+                attrs = attrs_html(node)
+                if name in void_tags:
+                    out.append(f"{spaces}<{name}{attrs}/>\n")
+                else:
+                    out.append(f"{spaces}<{name}{attrs}>\n")
+                    open_elements.append((node, len(out) - 1, filled))
+                    indent += indent_size
+                    node = first_child[node]
+                    continue
+            elif k == OBJECT:
+                html = objects[data[node]].render(indent, indent_size, False)
+                if html.strip():
+                    filled += 1
+                out.append(html)
+            else:
+                text = texts[data[node]]
+                text = (text if k == RAW else escape_text(text)).strip()
+                if text:
+                    filled += 1
+                    out.append(f"{spaces}{text}\n")
+            node = next_sibling[node]
+
+    def _iter_aggressive(self, flush: int = 0) -> Iterator[str]:
+        kind, data, names = self.kind, self.data, self.names
+        first_child, next_sibling = self.first_child, self.next_sibling
+        texts, objects, attrs_html = self.texts, self.objects, self._attrs_html
+        void_tags = defaults.void_tags
+        optional_end_tags = defaults.optional_end_tags
+        preformatted_tags = defaults.preformatted_tags
+        out = []
+        open_elements = []
+        # Open <pre>, <textarea>, <script> and <style> elements
+        preformatted = 0
+        ancestor = self.parent
+        while ancestor is not None:
+            if getattr(ancestor, "_name", None) in preformatted_tags:
+                preformatted += 1
+            ancestor = ancestor.parent
+
+        node = first_child[0]
+        while True:
+            while node < 0:
+                if not open_elements:
+                    yield "".join(out)
+                    return
+                parent = open_elements.pop()
+                name = names[kind[parent]]
+                if name in preformatted_tags:
+                    preformatted -= 1
+                if name not in optional_end_tags or not can_omit_end_tag(
+                    name, self._following(parent), self._parent_name(parent)
+                ):
+                    out.append(f"</{name}>")
+                node = next_sibling[parent]
+            if flush and len(out) >= flush:
+                yield "".join(out)
+                out = []
+
+            k = kind[node]
+            if k >= 0:
+                name = names[k]
+                out.append(f"<{name}{attrs_html(node, True)}>")
+                if name not in void_tags:
+                    if name in preformatted_tags:
+                        preformatted += 1
+                    open_elements.append(node)
+                    node = first_child[node]
+                    continue
+            elif k == TEXT:
+                text = escape_text(texts[data[node]])
+                if preformatted or not _COLLAPSIBLE.search(text):
+                    out.append(text)
+                else:
+                    # Keep single spaces, they separate inline content
+                    out.append(_WHITESPACE.sub(" ", text))
+            elif k == RAW:
+                out.append(texts[data[node]].strip())
+            else:
+                child = objects[data[node]]
+                html = child.render(0, 0, AGGRESSIVE)
+                name = getattr(child, "_name", None)
+                if name in optional_end_tags and html:
+                    if can_omit_end_tag(
+                        name, self._following(node), self._parent_name(node)
+                    ):
+                        html = html[: -len(name) - 3]
+                out.append(html)
+            node = next_sibling[node]
@@ -1,9 +1,17 @@
-from typing import List, Optional, Union
+from collections.abc import AsyncIterable, Iterable
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Union
+from time import perf_counter
+import re
 import warnings
-from .css import CSSRegistry
+from .css import CSSRegistry, SelectorUsage, css_digest
+from .markup import escape_html, escape_text
 
 
 class defaults:
+    # Check tags and content as pages are built, off once a production app
+    # has validated its pages at startup
+    validate = True
     remove_first_underscore = True
     replace_single_underscore = False
     replace_double_underscore = True
@@ -175,6 +183,282 @@ class defaults:
         "tt",
         "xmp",
     }
+    # Text inside these keeps its whitespace when minifying aggressively
+    preformatted_tags = {"pre", "textarea", "script", "style"}
+    # Raw text elements, their text is written as is rather than escaped
+    raw_text_tags = {"script", "style"}
+    # https://html.spec.whatwg.org/multipage/syntax.html#optional-tags
+    # Elements whose end tag may be omitted when followed by one of these
+    optional_end_tags = {
+        "head": {"body"},
+        "body": set(),
+        "li": {"li"},
+        "dt": {"dt", "dd"},
+        "dd": {"dt", "dd"},
+        "p": {
+            "address",
+            "article",
+            "aside",
+            "blockquote",
+            "details",
+            "div",
+            "dl",
+            "fieldset",
+            "figcaption",
+            "figure",
+            "footer",
+            "form",
+            "h1",
+            "h2",
+            "h3",
+            "h4",
+            "h5",
+            "h6",
+            "header",
+            "hgroup",
+            "hr",
+            "main",
+            "menu",
+            "nav",
+            "ol",
+            "p",
+            "pre",
+            "section",
+            "table",
+            "ul",
+        },
+        "rt": {"rt", "rp"},
+        "rp": {"rt", "rp"},
+        "optgroup": {"optgroup"},
+        "option": {"option", "optgroup"},
+        "thead": {"tbody", "tfoot"},
+        "tbody": {"tbody", "tfoot"},
+        "tfoot": set(),
+        "tr": {"tr"},
+        "td": {"td", "th"},
+        "th": {"td", "th"},
+    }
+    # ... or when they are the last content of their parent
+    optional_end_tags_at_end = {
+        "body",
+        "li",
+        "dd",
+        "p",
+        "rt",
+        "rp",
+        "optgroup",
+        "option",
+        "tbody",
+        "tfoot",
+        "tr",
+        "td",
+        "th",
+    }
+    # A </p> closing the content of these parents must be kept
+    p_end_required_parents = {"a", "audio", "del", "ins", "map", "noscript", "video"}
+
+
+# Minify level that also drops optional quotes and end tags
+AGGRESSIVE = "aggressive"
+# Client runtime loaded by documents with instant_navigation
+INSTANT_NAVIGATION_URL = "/static/js/instant_nav.js"
+
+_WHITESPACE = re.compile(r"\s+")
+_COLLAPSIBLE = re.compile(r"\s\s|[^\S ]")
+_UNQUOTED_VALUE = re.compile(r"[^\s\"'=<>`]+")
+
+
+def quoted_attrs(attrs) -> str:
+    """Serialize attributes, a dict or (name, value) pairs, with quoted values"""
+    parts = []
+    flags = ""
+    for k, v in attrs.items() if isinstance(attrs, dict) else attrs:
+        if isinstance(v, bool):
+            flags += f" {k}"
+        else:
+            v = escape_html(v)
+            # Only safe Markup values still contain quotes
+            quote = "'" if '"' in v else '"'
+            parts.append(f" {k}={quote}{v}{quote}")
+    return "".join(parts) + flags
+
+
+def minified_attrs(attrs) -> str:
+    """Serialize attributes with quotes only where the value needs them"""
+    parts = []
+    flags = ""
+    for k, v in attrs.items() if isinstance(attrs, dict) else attrs:
+        if isinstance(v, bool):
+            flags += f" {k}"
+            continue
+        v = escape_html(v)
+        if _UNQUOTED_VALUE.fullmatch(v):
+            parts.append(f" {k}={v}")
+        elif '"' in v and "'" not in v:
+            # Only safe Markup values still contain quotes
+            parts.append(f" {k}='{v}'")
+        else:
+            parts.append(f' {k}="{v}"')
+    return "".join(parts) + flags
+
+
+def _invalidates(method):
+    def wrapper(self, *args, **kwargs):
+        self._html = None
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class Attributes(dict):
+    """Element attributes that cache their serialized form until modified
+
+    Values mutated in place, such as a list, do not invalidate the cache.
+    """
+
+    # {minified: attribute string}, created on first use
+    _html = None
+
+    def html(self, minified: bool = False) -> str:
+        """Return the escaped attribute string, ' class="x" required'"""
+        cache = self._html
+        if cache is None:
+            cache = self._html = {}
+        html = cache.get(minified)
+        if html is None:
+            html = minified_attrs(self) if minified else quoted_attrs(self)
+            cache[minified] = html
+        return html
+
+    __setitem__ = _invalidates(dict.__setitem__)
+    __delitem__ = _invalidates(dict.__delitem__)
+    __ior__ = _invalidates(dict.__ior__)
+    clear = _invalidates(dict.clear)
+    pop = _invalidates(dict.pop)
+    popitem = _invalidates(dict.popitem)
+    setdefault = _invalidates(dict.setdefault)
+    update = _invalidates(dict.update)
+
+
+def render_minified_children(node: "Node") -> str:
+    """Render children aggressively minified, dropping optional end tags"""
+    children = node.children
+    rendered = [child.render(0, 0, AGGRESSIVE) for child in children]
+    parent = getattr(node, "_name", None)
+    # Walk backwards so each element knows the next sibling with output
+    following = None
+    for index in range(len(rendered) - 1, -1, -1):
+        if not rendered[index]:
+            continue
+        child = children[index]
+        name = getattr(child, "_name", None)
+        if name in defaults.optional_end_tags:
+            if can_omit_end_tag(name, following, parent):
+                rendered[index] = rendered[index][: -len(name) - 3]
+        # A flat tree continues with the tag of its first node
+        following = getattr(child, "leading_name", name) or ""
+    return "".join(rendered)
+
+
+def pieces(node: "Node", indent: int, indent_size: int, minify) -> Iterable[str]:
+    """node.iter_html(), or its render() whole when its children are leaves
+
+    Pieces only pay off for larger subtrees, a paragraph or list item is
+    cheaper rendered at once. Children with their own hook are no leaves.
+    """
+    if _default_hook(node) and all(
+        not child.children and _default_hook(child) for child in node.children
+    ):
+        return (node.render(indent, indent_size, minify),)
+    return node.iter_html(indent, indent_size, minify)
+
+
+def _default_hook(node: "Node") -> bool:
+    iter_html = type(node).iter_html
+    return iter_html is Element.iter_html or iter_html is Node.iter_html
+
+
+def iter_minified_children(nodes, parent: Optional[str], following=None):
+    """Yield nodes aggressively minified in pieces, dropping optional end tags
+
+    The last piece of an element ends with its end tag, so it is held back
+    until the next node with output shows whether the tag can go. following
+    is what comes after the nodes, as for can_omit_end_tag.
+    """
+    pending = None
+    for node in nodes:
+        name = getattr(node, "_name", None)
+        last = None
+        for piece in pieces(node, 0, 0, AGGRESSIVE):
+            if not piece:
+                continue
+            if last is None and pending is not None:
+                leading = getattr(node, "leading_name", name) or ""
+                yield _omit_end_tag(*pending, leading, parent)
+                pending = None
+            if last is not None:
+                yield last
+            last = piece
+        if last is not None:
+            pending = (name, last)
+    if pending is not None:
+        yield _omit_end_tag(*pending, following, parent)
+
+
+def can_omit_end_tag(name: str, following: Optional[str], parent: Optional[str]):
+    """Whether the end tag of name can be dropped before the following tag
+
+    following is "" for text and None when the element is the last content
+    of its parent.
+    """
+    if following is None:
+        if name == "p":
+            return parent not in defaults.p_end_required_parents
+        return name in defaults.optional_end_tags_at_end
+    return following in defaults.optional_end_tags[name]
+
+
+@lru_cache(maxsize=1024)
+def tag_name(name: str) -> str:
+    """Map a tag as written to its name, warning once for unknown tags"""
+    if defaults.remove_first_underscore and name.startswith("_"):
+        name = name[1:]
+    name = name.lower()
+    if not defaults.validate:
+        return name
+    if name in defaults.deprecated_tags:
+        warnings.warn(
+            f"The {name!r} tag is deprecated. "
+            "See: https://developer.mozilla.org/en-US/docs/Web/HTML/Element"
+        )
+    if name not in defaults.tags and name not in defaults.void_tags:
+        warnings.warn(f"Unknown tag {name!r}")
+    return name
+
+
+@lru_cache(maxsize=1024)
+def attribute_name(name: str) -> str:
+    """Map a keyword argument to an attribute name, aria_label -> aria-label"""
+    if name == "cls" or name == "className":
+        return "class"
+    elif name.endswith("_"):
+        return name[:-1]
+    elif "__" in name:
+        return name.replace("__", "-")
+    elif "_" in name:
+        return name.replace("_", "-")
+    return name
+
+
+@lru_cache(maxsize=1024)
+def attribute_names(names: tuple) -> tuple:
+    """attribute_name of every keyword of an element, cached per set of names"""
+    return tuple(map(attribute_name, names))
+
+
+def normalize_attributes(attrs: dict) -> dict:
+    """Map keyword arguments to attributes, later duplicates win"""
+    return dict(zip(attribute_names(tuple(attrs)), attrs.values()))
 
 
 class Node:
@@ -185,10 +469,16 @@ class Node:
     def append(self, child: "Node") -> "Node":
         if isinstance(child, str):
             child = TextNode(child)
+        elif not isinstance(child, Node) and is_lazy_source(child):
+            child = LazyChildren(child)
         child.parent = self
         self.children.append(child)
         return self
 
+    def add_usage(self, usage: SelectorUsage) -> None:
+        """Record what this node contributes to the rendered markup"""
+        pass
+
     def render(
         self, indent: int = 0, indent_size: int = 2, minify: bool = False
     ) -> str:
@@ -197,6 +487,20 @@ class Node:
             parts.append(child.render(indent, indent_size, minify))
         return "".join(parts)
 
+    def iter_html(
+        self, indent: int = 0, indent_size: int = 2, minify: bool = False
+    ) -> Iterator[str]:
+        """Yield the output of render() in pieces, for streaming large subtrees
+
+        Nodes with their own render() are rendered whole unless they override
+        this too.
+        """
+        if type(self).render is not Node.render:
+            yield self.render(indent, indent_size, minify)
+            return
+        for child in self.children:
+            yield from pieces(child, indent, indent_size, minify)
+
 
 class TextNode(Node):
     def __init__(self, text: str, raw: bool = False):
@@ -204,10 +508,34 @@ class TextNode(Node):
         self.text = text
         self.raw = raw
 
+    def _preformatted(self) -> bool:
+        node = self.parent
+        while node is not None:
+            if getattr(node, "_name", None) in defaults.preformatted_tags:
+                return True
+            node = node.parent
+        return False
+
+    def _in_raw_text(self) -> bool:
+        return getattr(self.parent, "_name", None) in defaults.raw_text_tags
+
+    def add_usage(self, usage: SelectorUsage) -> None:
+        if self.raw:
+            usage.add_markup(str(self.text))
+        elif hasattr(self.text, "__html__"):
+            # Markup is written as it is, like raw text
+            usage.add_markup(self.text.__html__())
+
     def render(
         self, indent: int = 0, indent_size: int = 2, minify: bool = False
     ) -> str:
-        text = self.text if self.raw else str(self.text)
+        raw = self.raw or self._in_raw_text()
+        text = str(self.text) if raw else escape_text(self.text)
+        if minify == AGGRESSIVE and not raw:
+            if not _COLLAPSIBLE.search(text) or self._preformatted():
+                return text
+            # Keep single spaces, they separate inline content
+            return _WHITESPACE.sub(" ", text)
         if minify:
             return text.strip()
 
@@ -217,34 +545,155 @@ class TextNode(Node):
         return " " * indent + text + "\n"
 
 
+def is_lazy_source(content) -> bool:
+    """Whether content is an iterable of children rather than text or a node"""
+    return isinstance(content, (Iterable, AsyncIterable)) and not isinstance(
+        content, (str, bytes, dict, Node)
+    )
+
+
+def _run_sync(awaitable):
+    """Run an awaitable that never suspends, as async iterators over sync data"""
+    try:
+        awaitable.send(None)
+    except StopIteration as done:
+        return done.value
+    awaitable.close()
+    raise TypeError(
+        "Async iterable children that await I/O can only be streamed, "
+        "use Document.astream()"
+    )
+
+
+class LazyChildren(Node):
+    """Children made from an iterable while the document is serialized
+
+    Each item is passed through template, if given, and may be text, a node
+    or None to skip it. Items are consumed once, as the output is produced,
+    so a generator or database cursor is never held in memory as nodes.
+    Async iterables are consumed by Document.astream().
+
+    With a page, tags the template builds through it are collected instead
+    of being added to the page, and used when the template returns None.
+    """
+
+    def __init__(self, source, template: Optional[Callable] = None, page=None):
+        super().__init__()
+        self.source = source
+        self.template = template
+        self.page = page
+        # Tag of the first item with output, known once rendered
+        self.leading_name: Optional[str] = None
+
+    def add_usage(self, usage: SelectorUsage) -> None:
+        # The items are unknown until rendered
+        usage.partial = True
+
+    def _apply(self, item):
+        if self.page is None:
+            return self.template(item)
+        page, collected = self.page, Node()
+        current, page._current = page._current, collected
+        try:
+            item = self.template(item)
+        finally:
+            page._current = current
+        if item is None and collected.children:
+            return collected.children[0] if len(collected.children) == 1 else collected
+        return item
+
+    def _node(self, item) -> Optional[Node]:
+        if self.template is not None:
+            item = self._apply(item)
+        if item is None:
+            return None
+        if isinstance(item, str):
+            item = TextNode(item)
+        item.parent = self
+        return item
+
+    def iter_nodes(self):
+        """Yield the item nodes, running async sources that never suspend"""
+        if isinstance(self.source, AsyncIterable):
+            iterator = aiter(self.source)
+            while True:
+                try:
+                    item = _run_sync(anext(iterator))
+                except StopAsyncIteration:
+                    return
+                node = self._node(item)
+                if node is not None:
+                    yield node
+        else:
+            for item in self.source:
+                node = self._node(item)
+                if node is not None:
+                    yield node
+
+    async def anodes(self) -> AsyncIterator[Node]:
+        """Yield the item nodes, awaiting async sources"""
+        if isinstance(self.source, AsyncIterable):
+            async for item in self.source:
+                node = self._node(item)
+                if node is not None:
+                    yield node
+        else:
+            for node in self.iter_nodes():
+                yield node
+
+    def iter_html(
+        self, indent: int = 0, indent_size: int = 2, minify: bool = False
+    ) -> Iterator[str]:
+        if minify == AGGRESSIVE:
+            # The leading tag has to be known before the first piece
+            yield self.render(indent, indent_size, minify)
+            return
+        for node in self.iter_nodes():
+            yield from pieces(node, indent, indent_size, minify)
+
+    def following(self) -> Optional[str]:
+        """The tag after the items, "" if unknown, None at the end of the parent"""
+        parent = self.parent
+        if parent is None or parent.children[-1] is self:
+            return None
+        return ""
+
+    def render(
+        self, indent: int = 0, indent_size: int = 2, minify: bool = False
+    ) -> str:
+        if minify != AGGRESSIVE:
+            return "".join(
+                node.render(indent, indent_size, minify) for node in self.iter_nodes()
+            )
+        parts = []
+        parent = getattr(self.parent, "_name", None)
+        pending = None
+        for node in self.iter_nodes():
+            html = node.render(0, 0, AGGRESSIVE)
+            if not html:
+                continue
+            name = getattr(node, "_name", None)
+            if pending is None:
+                self.leading_name = name or ""
+            else:
+                parts.append(_omit_end_tag(*pending, name or "", parent))
+            pending = (name, html)
+        if pending is not None:
+            parts.append(_omit_end_tag(*pending, self.following(), parent))
+        return "".join(parts)
+
+
+def _omit_end_tag(name, html: str, following, parent) -> str:
+    if name in defaults.optional_end_tags and can_omit_end_tag(name, following, parent):
+        return html[: -len(name) - 3]
+    return html
+
+
 class Element(Node):
     def __init__(self, _name: str, **attrs):
         super().__init__()
-        if defaults.remove_first_underscore and _name.startswith("_"):
-            _name = _name[1:]
-        self._name = _name.lower()
-
-        # Validate tag
-        if self._name in defaults.deprecated_tags:
-            warnings.warn(
-                f"The {self._name!r} tag is deprecated. "
-                "See: https://developer.mozilla.org/en-US/docs/Web/HTML/Element"
-            )
-        if self._name not in defaults.tags and self._name not in defaults.void_tags:
-            warnings.warn(f"Unknown tag {self._name!r}")
-
-        # Fix attribute names
-        self.attrs = {}
-        for k, v in attrs.items():
-            if k == "cls" or k == "className":
-                k = "class"
-            elif k.endswith("_"):
-                k = k[:-1]
-            elif "__" in k:
-                k = k.replace("__", "-")
-            elif "_" in k:
-                k = k.replace("_", "-")
-            self.attrs[k] = v
+        self._name = tag_name(_name)
+        self._attrs = Attributes(normalize_attributes(attrs) if attrs else {})
 
         self._page = None
 
@@ -256,15 +705,25 @@ class Element(Node):
             if isinstance(root, Document):
                 root.styles.add(attrs.get("content", ""))
 
+    @property
+    def attrs(self) -> Attributes:
+        return self._attrs
+
+    @attrs.setter
+    def attrs(self, attrs: dict) -> None:
+        self._attrs = attrs if isinstance(attrs, Attributes) else Attributes(attrs)
+
     def validate_content(self, content: any) -> bool:
         """Validate content can be added to this element"""
         if content is None:
             return False
-        if isinstance(content, (str, Element, Document, TextNode)):  # Added TextNode
+        if isinstance(content, (str, Element, Document, TextNode, LazyChildren)):
+            return True
+        if is_lazy_source(content):
             return True
         raise TypeError(
             f"Invalid content for {self._name!r}: {content!r}, "
-            "expected str, Element, Document or TextNode"
+            "expected str, Element, Document, TextNode or an iterable"
         )
 
     def append(self, child: Union[Node, str]) -> None:
@@ -278,13 +737,20 @@ class Element(Node):
         else:
             super().append(child)
 
+    def add_usage(self, usage: SelectorUsage) -> None:
+        usage.add(self._name, self.attrs)
+
     def render(
         self, indent: int = 0, indent_size: int = 2, minify: bool = False
     ) -> str:
-        attrs = "".join(
-            f' {k}="{v}"' for k, v in self.attrs.items() if not isinstance(v, bool)
-        )
-        attrs += "".join(f" {k}" for k, v in self.attrs.items() if isinstance(v, bool))
+        if minify == AGGRESSIVE:
+            attrs = self._attrs.html(True)
+            if self._name in defaults.void_tags:
+                return f"<{self._name}{attrs}>"
+            content = render_minified_children(self)
+            return f"<{self._name}{attrs}>{content}</{self._name}>"
+
+        attrs = self._attrs.html()
 
         if minify:
             if self._name.lower() in defaults.void_tags:
@@ -304,6 +770,49 @@ class Element(Node):
         content = content.rstrip()
         return f"{spaces}<{self._name}{attrs}>\n{content}\n{spaces}</{self._name}>\n"
 
+    def iter_html(
+        self, indent: int = 0, indent_size: int = 2, minify: bool = False
+    ) -> Iterator[str]:
+        name = self._name
+        if (
+            type(self).render is not Element.render
+            or name in defaults.void_tags
+            or not self.children
+        ):
+            yield self.render(indent, indent_size, minify)
+            return
+        if minify == AGGRESSIVE:
+            yield f"<{name}{self._attrs.html(True)}>"
+            yield from iter_minified_children(self.children, name)
+            yield f"</{name}>"
+            return
+        if minify:
+            yield f"<{name}{self._attrs.html()}>"
+            for child in self.children:
+                yield from pieces(child, 0, 0, True)
+            yield f"</{name}>"
+            return
+
+        # Whitespace is held back, render() strips it from the end of the
+        # content and writes an element with none as empty
+        spaces = " " * indent
+        start = f"{spaces}<{name}{self._attrs.html()}>"
+        opened = False
+        trailing = ""
+        for child in self.children:
+            for piece in pieces(child, indent + indent_size, indent_size, False):
+                content = piece.rstrip()
+                if not content:
+                    trailing += piece
+                    continue
+                if opened:
+                    yield trailing + content
+                else:
+                    opened = True
+                    yield f"{start}\n{trailing}{content}"
+                trailing = piece[len(content) :]
+        yield f"\n{spaces}</{name}>\n" if opened else f"{start}</{name}>\n"
+
     def __enter__(self):
         if self._page:
             self._page._current = self
@@ -315,7 +824,14 @@ class Element(Node):
 
 
 class Document(Node):
-    def __init__(self, minify=True, style: bool | str = True, indent_size: int = 2):
+    def __init__(
+        self,
+        minify=True,
+        style: bool | str = True,
+        indent_size: int = 2,
+        tree_shake: bool = False,
+        critical_css: Optional[int] = None,
+    ):
         super().__init__()
         self.doctype = "html"
         self.lang = "en"
@@ -323,7 +839,26 @@ class Document(Node):
         self.minify = minify
         self.styles_enabled = style
         self.indent_size = indent_size
+        # Only emit CSS rules whose selectors can match the rendered tree
+        self.tree_shake = tree_shake
+        # Inline only the CSS of the first N body children and load the full
+        # sheet from css_url without blocking rendering
+        self.critical_css = critical_css
+        self.css_url = "/_ugui/css"
+        # Digest of the full sheet the client reports as cached, if any
+        self.cached_css = None
+        # (digest, css) of the full sheet once rendered in critical mode
+        self.external_css = None
         self._link_stylesheets = []
+        # Purged copies to link instead of linked stylesheets, by original href
+        self.stylesheet_map = {}
+        # Optional RenderTimer, set by the page when instrumentation is enabled
+        self.timer = None
+        # Load the instant navigation runtime and tag the style blocks, see
+        # static/js/instant_nav.js
+        self.instant_navigation = False
+        # Style digests of a client navigating in place, set for partial renders
+        self.known_styles = None
 
         # Define default meta tags
         self.default_meta = [
@@ -337,26 +872,89 @@ class Document(Node):
         """Add a link to an external stylesheet"""
         self._link_stylesheets.append(href)
 
-    def collect_styles(self) -> str:
-        """Collect all styles and render them"""
+    def collect_usage(self) -> SelectorUsage:
+        """Index the tags, classes, ids and attributes used in the document"""
+        usage = SelectorUsage()
+        usage.add("html", {"lang": self.lang})
+        pending = list(self.children)
+        while pending:
+            node = pending.pop()
+            node.add_usage(usage)
+            pending.extend(node.children)
+        return usage
+
+    def collect_styles(
+        self, usage: Optional[SelectorUsage] = None, known: Iterable = ()
+    ) -> str:
+        """Collect all styles and render them, leaving out the known digests"""
         if not self.styles_enabled or not self.styles:
             return ""
-        if not self.styles._styles:
+        styles = self.styles.without(known) if known else self.styles
+        if not styles._styles:
+            return ""
+
+        # Unshaken blocks are tagged so a navigating client can skip them
+        digests = styles.digests() if self.instant_navigation and not usage else None
+        return self._style_tag(styles.render(minify=self.minify, usage=usage), digests)
+
+    def critical_usage(self) -> SelectorUsage:
+        """Index the body and its first critical_css child elements"""
+        usage = SelectorUsage()
+        usage.add("html", {"lang": self.lang})
+        pending = []
+        for child in self.children:
+            if isinstance(child, Element) and child._name == "body":
+                child.add_usage(usage)
+                elements = [c for c in child.children if isinstance(c, Element)]
+                pending += elements[: self.critical_css]
+            elif hasattr(child, "add_critical_usage"):
+                # A flat tree holding the body
+                child.add_critical_usage(usage, self.critical_css)
+        while pending:
+            node = pending.pop()
+            node.add_usage(usage)
+            pending.extend(node.children)
+        return usage
+
+    def collect_critical_styles(self) -> str:
+        """Inline the critical CSS and link the full sheet without blocking
+
+        Clients that report the sheet as cached just get a regular link.
+        """
+        if not self.styles_enabled or not self.styles._styles:
             return ""
+        full = self.styles.render(minify=self.minify)
+        digest = css_digest(full)
+        self.external_css = (digest, full)
+        href = f"{self.css_url}/{digest}.css"
+        if self.cached_css == digest:
+            return f'<link rel="stylesheet" href="{href}">'
+
+        critical = self.styles.render(minify=self.minify, usage=self.critical_usage())
+        return (
+            f"{self._style_tag(critical)}"
+            f'<link rel="preload" href="{href}" as="style"'
+            f" onload=\"this.onload=null;this.rel='stylesheet'\">"
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>'
+        )
 
-        styles = self.styles.render(minify=self.minify)
+    def _style_tag(self, styles: str, digests: Optional[list] = None) -> str:
+        if not styles:
+            return ""
+        start = "<style>"
+        if digests:
+            start = f'<style data-ugui-styles="{" ".join(digests)}">'
         if self.minify:
-            return f"<style>{styles}</style>"
+            return f"{start}{styles}</style>"
 
         # Indent the style tag content while preserving our sorting
         indent = " " * self.indent_size
         style_lines = [line for line in styles.split("\n") if line.strip()]
         style_content = "\n".join(f"{indent}{line}" for line in style_lines)
-        return f"<style>\n{style_content}\n</style>"
+        return f"{start}\n{style_content}\n</style>"
 
-    def render(self) -> str:
-        # Find or create head element
-        head = next(
+    def _head(self) -> Optional[Element]:
+        return next(
             (
                 child
                 for child in self.children
@@ -364,6 +962,11 @@ class Document(Node):
             ),
             None,
         )
+
+    def _prepare(self) -> str:
+        """Order the head and add the styles, return the output before the body"""
+        # Find or create head element
+        head = self._head()
         if not head:
             head = Element("head")
             self.children.insert(0, head)
@@ -409,20 +1012,201 @@ class Document(Node):
             head.children.append(title_tag)
 
         # Add styles
-        styles = self.collect_styles()
+        start = perf_counter() if self.timer is not None else None
+        if self.critical_css is not None and self.styles_enabled is True:
+            styles = self.collect_critical_styles()
+        else:
+            usage = self.collect_usage() if self.tree_shake else None
+            styles = self.collect_styles(usage)
+        if start is not None:
+            self.timer.add("css", perf_counter() - start)
         if styles:
             head.children.append(TextNode(styles, raw=True))
 
         # Add external stylesheets
         for stylesheet in self._link_stylesheets:
-            head.children.append(Element("link", rel="stylesheet", href=stylesheet))
+            href = self.stylesheet_map.get(stylesheet, stylesheet)
+            head.children.append(Element("link", rel="stylesheet", href=href))
 
         head.children.extend(other_tags)
+        if self.instant_navigation:
+            script = Element("script", src=INSTANT_NAVIGATION_URL, defer=True)
+            head.children.append(script)
 
+        if self.minify == AGGRESSIVE:
+            # </html> is optional too
+            return (
+                f"<!DOCTYPE {self.doctype}><html{minified_attrs({'lang': self.lang})}>"
+            )
         if self.minify:
-            html = f"<!DOCTYPE {self.doctype}><html lang='{self.lang}'>"
-            return html + super().render(0, 0, True) + "</html>"
+            return f"<!DOCTYPE {self.doctype}><html lang='{self.lang}'>"
+        return f"<!DOCTYPE {self.doctype}>\n<html lang='{self.lang}'>\n"
 
-        html = f"<!DOCTYPE {self.doctype}>\n<html lang='{self.lang}'>\n"
+    def _closing(self) -> str:
+        if self.minify == AGGRESSIVE:
+            return ""
+        return "</html>" if self.minify else "</html>\n"
+
+    def render(self) -> str:
+        if self.known_styles is not None:
+            return self.render_partial()
+        html = self._prepare()
+        if self.minify == AGGRESSIVE:
+            return html + render_minified_children(self)
+        if self.minify:
+            return html + super().render(0, 0, True) + "</html>"
         content = super().render(self.indent_size, self.indent_size, False)
         return html + content + "</html>\n"
+
+    def render_partial(self) -> str:
+        """The title, missing styles and body, for a client keeping its head
+
+        Style blocks whose digests are in known_styles are left out, as are
+        the meta tags and other head content.
+        """
+        html, body = self._prepare_partial()
+        if self.minify == AGGRESSIVE:
+            return html + render_minified_children(body)
+        if self.minify:
+            return html + body.render(0, 0, True)
+        return html + body.render(0, self.indent_size, False)
+
+    def _prepare_partial(self) -> tuple:
+        """The title and missing styles, and a node holding the rest"""
+        head = self._head()
+        parts = []
+        if head is not None:
+            parts += [
+                child.render(0, 0, self.minify)
+                for child in head.children
+                if isinstance(child, Element) and child._name == "title"
+            ]
+        styles = self.collect_styles(known=self.known_styles)
+        parts.append(styles if self.minify or not styles else styles + "\n")
+        for stylesheet in self._link_stylesheets:
+            href = self.stylesheet_map.get(stylesheet, stylesheet)
+            link = Element("link", rel="stylesheet", href=href)
+            parts.append(link.render(0, 0, self.minify))
+
+        body = Node()
+        body.children = [child for child in self.children if child is not head]
+        return "".join(parts), body
+
+    def _lazy_ancestors(self) -> set:
+        """ids of the nodes holding lazy children, streamed tag by tag"""
+        found = set()
+        pending = list(self.children)
+        while pending:
+            node = pending.pop()
+            if isinstance(node, LazyChildren):
+                node = node.parent
+                while node is not None and id(node) not in found:
+                    found.add(id(node))
+                    node = node.parent
+            else:
+                pending.extend(node.children)
+        return found
+
+    async def astream(self, chunk_size: int = 16384) -> AsyncIterator[str]:
+        """Serialize the document in chunks of about chunk_size characters
+
+        Lazy children are consumed as the output is produced, awaiting async
+        iterables. Subtrees without them are written through Node.iter_html,
+        so components such as DataTable send their rows as they go; elements
+        holding them are written tag by tag and keep their end tags when
+        minified aggressively, unless they end their parent. Lazy children in a flat tree
+        are consumed synchronously. With known_styles set, streams render_partial.
+        """
+        lazy = self._lazy_ancestors()
+        if self.known_styles is not None:
+            html, node = self._prepare_partial()
+        else:
+            html, node = self._prepare(), self
+        buffer = [html]
+        size = len(buffer[0])
+        indent = self.indent_size if node is self and not self.minify else 0
+        async for chunk in self._stream_children(node, lazy, indent):
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if node is self:
+            buffer.append(self._closing())
+        yield "".join(buffer)
+
+    async def _stream_children(self, node: Node, lazy: set, indent: int):
+        minify, indent_size = self.minify, self.indent_size
+        parent = getattr(node, "_name", None)
+        # Aggressive output waits for the next tag to drop its end tag
+        pending = None
+        async for child in _child_nodes(node):
+            name = getattr(child, "_name", None)
+            if id(child) in lazy and type(child).render in (
+                Node.render,
+                Element.render,
+            ):
+                if pending is not None:
+                    yield _omit_end_tag(*pending, name or "", parent)
+                    pending = None
+                # Only the end of the parent is known before the content
+                omit = (
+                    minify == AGGRESSIVE
+                    and node.children[-1] is child
+                    and name in defaults.optional_end_tags
+                    and can_omit_end_tag(name, None, parent)
+                )
+                async for chunk in self._stream_element(child, lazy, indent, omit):
+                    yield chunk
+            elif minify == AGGRESSIVE:
+                # As iter_minified_children, with lazy children in between
+                last = None
+                for piece in pieces(child, 0, 0, AGGRESSIVE):
+                    if not piece:
+                        continue
+                    if last is None and pending is not None:
+                        following = getattr(child, "leading_name", name) or ""
+                        yield _omit_end_tag(*pending, following, parent)
+                        pending = None
+                    if last is not None:
+                        yield last
+                    last = piece
+                if last is not None:
+                    pending = (name, last)
+            else:
+                for piece in pieces(child, indent, indent_size, minify):
+                    yield piece
+        if pending is not None:
+            yield _omit_end_tag(*pending, None, parent)
+
+    async def _stream_element(
+        self, node: Node, lazy: set, indent: int, omit_end_tag: bool = False
+    ):
+        if not isinstance(node, Element):
+            async for chunk in self._stream_children(node, lazy, indent):
+                yield chunk
+            return
+        name = node._name
+        if self.minify:
+            yield f"<{name}{node._attrs.html(self.minify == AGGRESSIVE)}>"
+            async for chunk in self._stream_children(node, lazy, 0):
+                yield chunk
+            if not omit_end_tag:
+                yield f"</{name}>"
+            return
+        spaces = " " * indent
+        yield f"{spaces}<{name}{node._attrs.html()}>\n"
+        inner = indent + self.indent_size
+        async for chunk in self._stream_children(node, lazy, inner):
+            yield chunk
+        yield f"{spaces}</{name}>\n"
+
+
+async def _child_nodes(node: Node) -> AsyncIterator[Node]:
+    """The children of node, with the items of lazy children in their place"""
+    for child in node.children:
+        if isinstance(child, LazyChildren):
+            async for item in child.anodes():
+                yield item
+        else:
+            yield child
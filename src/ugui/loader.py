@@ -0,0 +1,125 @@
+"""Batched, cached data loading for the lifetime of a page
+
+    async def users(ids):
+        rows = await db.fetch("SELECT * FROM users WHERE id = ANY($1)", ids)
+        return {row["id"]: row for row in rows}
+
+    @app.page("/")
+    async def index(page):
+        user = page.loader(users)
+        for post in posts:
+            author = await user.load(post.author_id)
+
+Keys loaded while the event loop runs one round of ready callbacks, such as
+by sections gathered with asyncio.gather, are passed to one call of the
+batch function. Results are cached by key until the page is done, so
+components can load the data of a single item without a round trip each.
+"""
+
+import asyncio
+import inspect
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class Loader:
+    """Collect the keys loaded in one event-loop tick into one batch_fn call
+
+    batch_fn takes a list of keys and returns, or resolves to, a list of
+    values in the same order or a mapping from key to value, where missing
+    keys load None. A value that is an exception is raised by its load().
+    Synchronous batch functions run in a worker thread.
+    """
+
+    def __init__(self, batch_fn: Callable, max_batch_size: Optional[int] = None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[tuple] = []
+        # Running batches, referenced so they are not collected
+        self._tasks = set()
+
+    async def load(self, key: Hashable) -> Any:
+        """The value of key, from the cache or the next batch"""
+        future = self._cache.get(key)
+        if future is None or future.cancelled():
+            loop = asyncio.get_running_loop()
+            future = self._cache[key] = loop.create_future()
+            self._queue.append((key, future))
+            if len(self._queue) == 1:
+                # Runs after the callbacks already scheduled, which may load more
+                loop.call_soon(self._dispatch)
+        # Shared by every load of the key, a cancelled waiter leaves it running
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*map(self.load, keys)))
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Cache a value fetched some other way"""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    def clear(self, key: Hashable) -> None:
+        """Forget a key so the next load fetches it again"""
+        self._cache.pop(key, None)
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        size = self.max_batch_size or len(queue)
+        for start in range(0, len(queue), size):
+            task = asyncio.ensure_future(self._run(queue[start : start + size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]) -> None:
+        keys = [key for key, _ in batch]
+        self.batches += 1
+        try:
+            values = await self._call(keys)
+            if isinstance(values, Mapping):
+                values = [values.get(key) for key in keys]
+            else:
+                values = list(values)
+            if len(values) != len(keys):
+                raise ValueError(
+                    f"{self.batch_fn.__name__} returned {len(values)} values "
+                    f"for {len(keys)} keys"
+                )
+        except asyncio.CancelledError:
+            # The page is done, the keys load again if anything still asks
+            for key, future in batch:
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+                future.cancel()
+            raise
+        except Exception as error:
+            for key, future in batch:
+                # Not cached, a later load tries again; a key cleared and
+                # loaded or primed meanwhile keeps its new future
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), value in zip(batch, values):
+            if future.done():
+                continue
+            if isinstance(value, Exception):
+                future.set_exception(value)
+            else:
+                future.set_result(value)
+
+    async def _call(self, keys: list):
+        if inspect.iscoroutinefunction(self.batch_fn):
+            return await self.batch_fn(keys)
+        # Imported here to keep asgiref out of render-only imports
+        from asgiref.sync import sync_to_async
+
+        values = await sync_to_async(self.batch_fn)(keys)
+        if inspect.isawaitable(values):
+            values = await values
+        return values
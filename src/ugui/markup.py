@@ -0,0 +1,64 @@
+from typing import Any, Iterable
+
+
+class Markup(str):
+    """A string of safe HTML that is never escaped again
+
+    Anything combined with a Markup string is escaped first, so
+    ``Markup("<b>") + "<i>"`` gives ``<b>&lt;i&gt;``.
+    """
+
+    __slots__ = ()
+
+    def __html__(self) -> "Markup":
+        return self
+
+    def __add__(self, other: Any) -> "Markup":
+        if not isinstance(other, str) and not hasattr(other, "__html__"):
+            return NotImplemented
+        return Markup(str.__add__(self, escape(other)))
+
+    def __radd__(self, other: Any) -> "Markup":
+        if not isinstance(other, str) and not hasattr(other, "__html__"):
+            return NotImplemented
+        return Markup(str.__add__(escape(other), self))
+
+    def join(self, iterable: Iterable[Any]) -> "Markup":
+        return Markup(str.join(self, (escape(item) for item in iterable)))
+
+    def __repr__(self) -> str:
+        return f"Markup({str.__repr__(self)})"
+
+    @classmethod
+    def escape(cls, value: Any) -> "Markup":
+        return escape(value)
+
+
+def escape_html(value: Any) -> str:
+    """Escape a value for text or a quoted attribute, leaving safe HTML as is"""
+    if type(value) is not str:
+        if hasattr(value, "__html__"):
+            return value.__html__()
+        value = str(value)
+    # Chained str.replace beats str.translate with multi-character mappings
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&#34;")
+        .replace("'", "&#39;")
+    )
+
+
+def escape_text(value: Any) -> str:
+    """Escape a value for element content, where quotes need no escaping"""
+    if type(value) is not str:
+        if hasattr(value, "__html__"):
+            return value.__html__()
+        value = str(value)
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape(value: Any) -> Markup:
+    """Escape a value and mark the result as safe"""
+    return Markup(escape_html(value))
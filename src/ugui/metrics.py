@@ -0,0 +1,136 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+
+class RenderTimer:
+    """Collect phase durations for a single page render"""
+
+    # Human readable descriptions used in the Server-Timing header
+    DESCRIPTIONS = {
+        "page": "page function",
+        "build": "tree build",
+        "css": "css collection",
+        "html": "html serialization",
+    }
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.size = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add time (in seconds) to a phase"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the wrapped block as the given phase"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def server_timing(self) -> str:
+        """Format the phases as a Server-Timing header value"""
+        metrics = []
+        for name, seconds in self.phases.items():
+            desc = self.DESCRIPTIONS.get(name, name)
+            metrics.append(f'{name};desc="{desc}";dur={seconds * 1000:.3f}')
+        metrics.append(f'size;desc="{self.size} bytes"')
+        return ", ".join(metrics)
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Return (le, count) pairs including the +Inf bucket"""
+        pairs = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((f"{bound:g}", total))
+        pairs.append(("+Inf", total + self.counts[-1]))
+        return pairs
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Per-route render histograms exposed in Prometheus text format"""
+
+    SECONDS_BUCKETS = (
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+    )
+    BYTES_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000)
+
+    def __init__(self):
+        self._seconds: Dict[Tuple[str, str], Histogram] = {}
+        self._bytes: Dict[str, Histogram] = {}
+
+    def observe(self, route: str, timer: RenderTimer) -> None:
+        """Record all phases and the response size of a render"""
+        for phase, seconds in timer.phases.items():
+            key = (route, phase)
+            if key not in self._seconds:
+                self._seconds[key] = Histogram(self.SECONDS_BUCKETS)
+            self._seconds[key].observe(seconds)
+
+        if route not in self._bytes:
+            self._bytes[route] = Histogram(self.BYTES_BUCKETS)
+        self._bytes[route].observe(timer.size)
+
+    def render(self) -> str:
+        """Render all histograms in the Prometheus text exposition format"""
+        lines = [
+            "# HELP ugui_render_seconds Time spent in each phase of a page render",
+            "# TYPE ugui_render_seconds histogram",
+        ]
+        for (route, phase), histogram in sorted(self._seconds.items()):
+            labels = f'route="{_escape_label(route)}",phase="{phase}"'
+            self._render_histogram(lines, "ugui_render_seconds", labels, histogram)
+
+        lines += [
+            "# HELP ugui_response_bytes Size of rendered pages",
+            "# TYPE ugui_response_bytes histogram",
+        ]
+        for route, histogram in sorted(self._bytes.items()):
+            labels = f'route="{_escape_label(route)}"'
+            self._render_histogram(lines, "ugui_response_bytes", labels, histogram)
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(
+        lines: List[str], name: str, labels: str, histogram: Histogram
+    ) -> None:
+        for le, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:g}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
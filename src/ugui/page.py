@@ -1,8 +1,16 @@
 from .html import defaults
+import logging
 import warnings
+from time import perf_counter
 from typing import List, Optional, Union
-from .html import Element, TextNode, Document
-from .components import get_component, _component_packs
+from .html import Element, LazyChildren, TextNode, Document
+from .build import build
+from .flat import FlatElement, FlatTree, OBJECT_TAGS
+from .components import get_component, get_pack
+from .metrics import RenderTimer
+from .profiler import ComponentProfiler
+
+logger = logging.getLogger(__name__)
 
 
 class PageUI:
@@ -21,9 +29,15 @@ class PageUI:
             component_class = get_component(self._component_pack, name)
 
             def wrapper(*args, **kwargs):
+                page = self._page
+                instrumented = page.timer is not None or page.profiler is not None
+                start = perf_counter() if instrumented else None
                 component = component_class(*args, **kwargs)
                 self._init_component(component)
-                return component(self._page)
+                component = component(page)
+                if start is not None:
+                    page._record_build(component_class.__name__, start)
+                return component
 
             return wrapper
         except ValueError:
@@ -35,16 +49,47 @@ class PageUI:
         if component_name not in self._initialized_components:
             self._page.style(component.style())
             self._initialized_components.add(component_name)
+        # Parametrized components add a small rule per distinct variant
+        instance_style = component.instance_style()
+        if instance_style:
+            self._page.style(instance_style)
 
 
 class Page:
     def __init__(
-        self, minify: bool = True, style: bool | str = True, component_pack: str = "og"
+        self,
+        minify: bool = True,
+        style: bool | str = True,
+        component_pack: str = "og",
+        timer: Optional[RenderTimer] = None,
+        profiler: Optional[ComponentProfiler] = None,
+        tree_shake: bool = False,
+        critical_css: Optional[int] = None,
+        flat: bool = False,
+        stream: bool = False,
     ):
-        self.document = Document(minify=minify, style=style)
+        self.timer = timer
+        self.profiler = profiler
+        self.document = Document(
+            minify=minify,
+            style=style,
+            tree_shake=tree_shake,
+            critical_css=critical_css,
+        )
+        self.document.timer = timer
         self._current = self.document
+        # Build elements into arrays instead of objects, see ugui.flat
+        self.flat = flat
+        if flat:
+            tree = FlatTree(self)
+            self.document.append(tree)
+            self._current = tree.root
+        # Served in chunks as serialized, see Document.astream
+        self.stream = stream
         self._ui = None
         self._component_instances = {}
+        # Request-scoped data loaders, by batch function
+        self._loaders = {}
         self._component_pack = component_pack
         self._init_styles(style)
 
@@ -57,14 +102,15 @@ class Page:
             self.style(BASE_CSS)
 
             # Then add pack-specific base styles if any
-            if self.ui._component_pack in _component_packs:
-                pack_module = _component_packs[self.ui._component_pack]
-                print(f"Found component pack {self.ui._component_pack!r}")
+            try:
+                pack_module = get_pack(self.ui._component_pack)
+            except ValueError:
+                logger.warning("Component pack %r not found", self.ui._component_pack)
+            else:
+                logger.debug("Found component pack %r", self.ui._component_pack)
                 if hasattr(pack_module, "BASE_CSS"):
-                    print(f"Adding base styles for {self.ui._component_pack!r}")
+                    logger.debug("Adding base styles for %r", self.ui._component_pack)
                     self.style(pack_module.BASE_CSS)
-            else:
-                print(f"Component pack {self.ui._component_pack!r} not found")
         elif isinstance(style, str):
             self.document.link_stylesheet(style)
 
@@ -81,55 +127,116 @@ class Page:
         self._ui.use(pack_name)
 
     def __str__(self):
+        if self.profiler is not None:
+            return self.profiler.render(self.document)
         return self.document.render()
 
     def __getattr__(self, _name: str):
-        """First try to get a component, fall back to HTML element"""
+        """Build known HTML tags as elements, look other names up as components"""
         # First check if we have a stored instance
         if _name in self._component_instances:
             return self._component_instances[_name]
 
-        # Try to get component first
-        from .components import get_component
-
-        try:
-            component_class = get_component(self.ui._component_pack, _name)
-
-            def component_wrapper(*args, **kwargs):
-                component = component_class(*args, **kwargs)
-                # Initialize component CSS
-                component_name = component.__class__.__name__
-                if component_name not in self.ui._initialized_components:
-                    self.style(component.style())
-                    self.ui._initialized_components.add(component_name)
-                # Add to page
-                component._page = self
-                self._current.append(component)
-                # Store the instance
-                self._component_instances[_name.lower()] = component
-                return component
-
-            return component_wrapper
-
-        except (ValueError, ImportError):
-            # Fall back to HTML element behavior
-            def element_wrapper(*contents, **attrs):
-                if _name.lower() in defaults.void_tags and contents:
-                    warnings.warn(f"Void tag {_name!r} cannot have content")
+        tag = _name.lower()
+        if defaults.remove_first_underscore and tag.startswith("_"):
+            tag = tag[1:]
+
+        if tag not in defaults.tags and tag not in defaults.void_tags:
+            try:
+                return self._component_wrapper(_name)
+            except (ValueError, ImportError):
+                pass
+
+        # Fall back to HTML element behavior
+        def element_wrapper(*contents, **attrs):
+            instrumented = self.timer is not None or self.profiler is not None
+            start = perf_counter() if instrumented else None
+            if defaults.validate and tag in defaults.void_tags and contents:
+                warnings.warn(f"Void tag {_name!r} cannot have content")
+            parent = self._current
+            if isinstance(parent, FlatElement) and tag not in OBJECT_TAGS:
+                elem = parent.tree.element(parent.index, _name, attrs)
+            else:
                 elem = Element(_name, **attrs)
                 elem._page = self
-                self._current.append(elem)
+                parent.append(elem)
+            if defaults.validate:
                 for content in contents:
                     if elem.validate_content(content):
                         elem.append(content)
-                return elem
-
-            return element_wrapper
+            else:
+                for content in contents:
+                    if content is not None:
+                        elem.append(content)
+            if start is not None:
+                self._record_build(f"<{tag}>", start)
+            return elem
+
+        return element_wrapper
+
+    def _component_wrapper(self, _name: str):
+        component_class = get_component(self.ui._component_pack, _name)
+
+        def component_wrapper(*args, **kwargs):
+            instrumented = self.timer is not None or self.profiler is not None
+            start = perf_counter() if instrumented else None
+            component = component_class(*args, **kwargs)
+            # Initialize component CSS
+            component_name = component.__class__.__name__
+            self.ui._init_component(component)
+            # Add to page
+            component._page = self
+            self._current.append(component)
+            # Store the instance
+            self._component_instances[_name.lower()] = component
+            if start is not None:
+                self._record_build(component_name, start)
+            return component
+
+        return component_wrapper
+
+    def _record_build(self, key: str, start: float) -> None:
+        """Attribute build time since start to the timer and profiler"""
+        elapsed = perf_counter() - start
+        if self.timer is not None:
+            self.timer.add("build", elapsed)
+        if self.profiler is not None:
+            self.profiler.record_build(key, elapsed)
 
     def text(self, content: str) -> None:
         """Add text content as a paragraph"""
         return self.p(content)
 
+    def build(self, spec) -> Optional[Element]:
+        """Add elements from nested lists, ["ul", {"cls": "menu"}, ["li", "Home"]]
+
+        Returns the element of an element spec. See ugui.build for the format.
+        """
+        instrumented = self.timer is not None or self.profiler is not None
+        start = perf_counter() if instrumented else None
+        element = build(spec, self._current, self)
+        if start is not None:
+            self._record_build("build()", start)
+        return element
+
+    def loader(self, batch_fn, max_batch_size: Optional[int] = None):
+        """The page's batching loader for batch_fn, see ugui.loader"""
+        loader = self._loaders.get(batch_fn)
+        if loader is None:
+            # Imported here, asyncio is slow to import and rendering needs none
+            from .loader import Loader
+
+            loader = self._loaders[batch_fn] = Loader(batch_fn, max_batch_size)
+        return loader
+
+    def each(self, source, template=None) -> LazyChildren:
+        """Children made from source while rendering, pass to a tag to add them
+
+        template turns each item into text or a node; tags it builds through
+        the page belong to the item rather than the page.
+        """
+        return LazyChildren(source, template, page=self)
+
     def raw(self, content: str) -> None:
         """Add raw unescaped text content"""
         self._current.append(TextNode(content, raw=True))
@@ -0,0 +1,232 @@
+import cProfile
+import inspect
+from abc import ABC, abstractmethod
+import io
+import pstats
+import threading
+import tracemalloc
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Tuple
+from asgiref.sync import sync_to_async
+
+_PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+@lru_cache(maxsize=1024)
+def module_group(filename: str) -> str:
+    """Group a source file by ugui module, everything else is '(other)'"""
+    if filename.startswith("~") or filename.startswith("<"):
+        return "(builtins)"
+    try:
+        return Path(filename).resolve().relative_to(_PACKAGE_DIR).as_posix()
+    except ValueError:
+        return "(other)"
+
+
+class Probe(ABC):
+    """Profile the next N renders of a route
+
+    Probes are armed through App.probe() or the admin endpoint and are only
+    consulted by App.handle_page while armed, so they cost nothing otherwise.
+    cProfile and tracemalloc are process-wide, so one request is probed at a
+    time across all probes; concurrent requests are served normally.
+    """
+
+    mode = ""
+    # Held by the probe of the request being profiled
+    _running = threading.Lock()
+
+    def __init__(self, route: str, requests: int = 1, limit: int = 25):
+        self.route = route
+        self.requests = requests
+        self.limit = limit
+        self.completed = 0
+        self._lock = threading.Lock()
+        self._busy = False
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.requests
+
+    def acquire(self) -> bool:
+        """Claim the probe for one request"""
+        with self._lock:
+            if self._busy or self.done:
+                return False
+            if not Probe._running.acquire(blocking=False):
+                return False
+            self._busy = True
+            return True
+
+    def release(self) -> None:
+        if self._busy:
+            self._busy = False
+            Probe._running.release()
+
+    @abstractmethod
+    async def call(self, func, page) -> None:
+        """Run the page function under the probe"""
+
+    @abstractmethod
+    def render(self, page) -> str:
+        """Render the page under the probe and count the request"""
+
+    @abstractmethod
+    def report(self) -> str:
+        """The results so far, as text"""
+
+    @staticmethod
+    def _format_groups(title: str, groups: Dict[str, float], unit: str) -> list:
+        lines = [title]
+        for group, value in sorted(groups.items(), key=lambda i: i[1], reverse=True):
+            lines.append(f"  {group:<40}{value:>14.3f} {unit}")
+        return lines
+
+
+class CPUProbe(Probe):
+    """cProfile the page function and render of the next N requests
+
+    An async page function is profiled across its awaits, while the event
+    loop also runs other requests, so their code shows up in the profile
+    too. Profile a quiet server, or a sync page function, which is profiled
+    in its own thread, for numbers of this route alone.
+    """
+
+    mode = "cpu"
+
+    def __init__(self, route: str, requests: int = 1, limit: int = 25):
+        super().__init__(route, requests, limit)
+        self.profile = cProfile.Profile()
+
+    async def call(self, func, page) -> None:
+        if inspect.iscoroutinefunction(func):
+            self.profile.enable()
+            try:
+                await func(page)
+            finally:
+                self.profile.disable()
+        else:
+            # cProfile only sees the thread it was enabled in
+            await sync_to_async(self._profiled(func))(page)
+
+    def _profiled(self, func):
+        def profiled(page):
+            self.profile.enable()
+            try:
+                return func(page)
+            finally:
+                self.profile.disable()
+
+        return profiled
+
+    def render(self, page) -> str:
+        self.profile.enable()
+        try:
+            html = str(page)
+        finally:
+            self.profile.disable()
+        self.completed += 1
+        return html
+
+    def report(self) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+
+        groups: Dict[str, float] = {}
+        for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+            group = module_group(filename)
+            groups[group] = groups.get(group, 0.0) + tottime * 1000
+
+        lines = [f"cProfile of {self.completed} request(s) to {self.route!r}", ""]
+        lines += self._format_groups("Own time by module:", groups, "ms")
+        lines.append("")
+        stats.sort_stats("cumulative").print_stats(self.limit)
+        return "\n".join(lines) + "\n" + stream.getvalue()
+
+
+class MemoryProbe(Probe):
+    """tracemalloc snapshot of what the next N requests keep allocated
+
+    The snapshot is taken after rendering, while the page tree and the HTML
+    are still alive, and compared with one taken before the page function.
+    tracemalloc traces the whole process, so allocations of requests running
+    concurrently are included. Tracing started by the host is left running.
+    """
+
+    mode = "memory"
+
+    def __init__(self, route: str, requests: int = 1, limit: int = 25):
+        super().__init__(route, requests, limit)
+        self.groups: Dict[str, Tuple[int, int]] = {}
+        self.lines: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        # Whether this probe started tracing, and the snapshot before the page
+        self._started = False
+        self._before = None
+
+    async def call(self, func, page) -> None:
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        self._before = tracemalloc.take_snapshot()
+        if inspect.iscoroutinefunction(func):
+            await func(page)
+        else:
+            await sync_to_async(func)(page)
+
+    def render(self, page) -> str:
+        html = str(page)
+        snapshot = tracemalloc.take_snapshot()
+        self._stop()
+        filters = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        before, self._before = self._before.filter_traces(filters), None
+        snapshot = snapshot.filter_traces(filters)
+
+        for stat in snapshot.compare_to(before, "lineno"):
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            size, count = self.lines.get((frame.filename, frame.lineno), (0, 0))
+            self.lines[(frame.filename, frame.lineno)] = (
+                size + stat.size_diff,
+                count + max(stat.count_diff, 0),
+            )
+            group = module_group(frame.filename)
+            size, count = self.groups.get(group, (0, 0))
+            self.groups[group] = (
+                size + stat.size_diff,
+                count + max(stat.count_diff, 0),
+            )
+
+        self.completed += 1
+        return html
+
+    def _stop(self) -> None:
+        if self._started and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started = False
+
+    def release(self) -> None:
+        # Stop tracing if the page function raised before rendering
+        self._stop()
+        self._before = None
+        super().release()
+
+    def report(self) -> str:
+        requests = max(self.completed, 1)
+        groups = {
+            group: size / requests / 1024 for group, (size, _) in self.groups.items()
+        }
+        lines = [f"tracemalloc of {self.completed} request(s) to {self.route!r}", ""]
+        lines += self._format_groups("Allocated per request by module:", groups, "KiB")
+        lines += ["", "Top allocation sites per request:"]
+        top = sorted(self.lines.items(), key=lambda i: i[1][0], reverse=True)
+        for (filename, lineno), (size, count) in top[: self.limit]:
+            lines.append(
+                f"  {size / requests / 1024:>10.1f} KiB {count // requests:>8} blocks"
+                f"  {module_group(filename)}: {filename}:{lineno}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+PROBES = {"cpu": CPUProbe, "memory": MemoryProbe}
@@ -0,0 +1,178 @@
+from time import perf_counter
+from typing import Dict, List, Optional
+from .components import Component
+from .html import Document, Element, Node, TextNode
+
+
+class ComponentStats:
+    """Cost attributed to one component class or tag"""
+
+    __slots__ = (
+        "count",
+        "nodes",
+        "self_bytes",
+        "total_bytes",
+        "build",
+        "self_render",
+        "total_render",
+    )
+
+    def __init__(self):
+        self.count = 0  # instances rendered
+        self.nodes = 0  # element and text nodes owned by this key
+        self.self_bytes = 0  # output excluding nested elements
+        self.total_bytes = 0  # output including nested elements
+        self.build = 0.0
+        self.self_render = 0.0
+        self.total_render = 0.0
+
+    def merge(self, other: "ComponentStats") -> None:
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class ComponentProfiler:
+    """Attribute build time, render time, nodes and bytes to components
+
+    Components are keyed by class name (``Card``, ``MaterialIcon``) and plain
+    elements by tag (``<div>``). Text nodes are charged to their parent, so the
+    inline SVG of a ``MaterialIcon`` shows up under ``MaterialIcon``. Self
+    numbers exclude nested elements, total numbers include them. Output not
+    produced by any element, such as the inline CSS, is charged to
+    ``(document)``.
+    """
+
+    COLUMNS = {
+        "count": "count",
+        "nodes": "nodes",
+        "bytes": "self_bytes",
+        "total_bytes": "total_bytes",
+        "build": "build",
+        "render": "self_render",
+        "total_render": "total_render",
+    }
+
+    def __init__(self):
+        self.stats: Dict[str, ComponentStats] = {}
+        self.pages = 0
+        # [child render time, child bytes] of the elements being rendered
+        self._stack: List[List[float]] = []
+        self._active: Dict[str, int] = {}
+
+    def _get(self, key: str) -> ComponentStats:
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = ComponentStats()
+        return stats
+
+    def record_build(self, key: str, seconds: float) -> None:
+        """Add construction time for a component or tag"""
+        self._get(key).build += seconds
+
+    @staticmethod
+    def key(node: Node) -> Optional[str]:
+        """Return the profile key of an element, None for other nodes"""
+        if not isinstance(node, Element):
+            return None
+        if isinstance(node, Component):
+            return node.__class__.__name__
+        return f"<{node._name}>"
+
+    def render(self, document: Document) -> str:
+        """Render the document while measuring every element"""
+        wrapped = []
+        pending = [(child, None) for child in document.children]
+        while pending:
+            node, owner = pending.pop()
+            key = self.key(node)
+            if key is not None:
+                stats = self._get(key)
+                stats.count += 1
+                stats.nodes += 1
+                node.render = self._measure(node, key, stats)
+                wrapped.append(node)
+                owner = stats
+            elif owner is not None and isinstance(node, TextNode):
+                owner.nodes += 1
+            pending.extend((child, owner) for child in node.children)
+
+        # The document itself owns whatever its elements did not produce:
+        # doctype, the generated head and the inline CSS
+        self._stack.append([0.0, 0])
+        start = perf_counter()
+        try:
+            html = document.render()
+        finally:
+            elapsed = perf_counter() - start
+            child_time, child_bytes = self._stack.pop()
+            for node in wrapped:
+                del node.render
+
+        stats = self._get("(document)")
+        size = len(html.encode())
+        stats.count += 1
+        stats.self_bytes += size - child_bytes
+        stats.total_bytes += size
+        stats.self_render += elapsed - child_time
+        stats.total_render += elapsed
+        self.pages += 1
+        return html
+
+    def _measure(self, node: Element, key: str, stats: ComponentStats):
+        render = type(node).render
+        stack = self._stack
+        active = self._active
+
+        def measured(*args, **kwargs):
+            stack.append([0.0, 0])
+            active[key] = active.get(key, 0) + 1
+            start = perf_counter()
+            try:
+                output = render(node, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                child_time, child_bytes = stack.pop()
+                active[key] -= 1
+
+            size = len(output.encode())
+            stats.self_render += elapsed - child_time
+            stats.self_bytes += size - child_bytes
+            # Only the outermost instance counts towards totals for nested keys
+            if not active[key]:
+                stats.total_render += elapsed
+                stats.total_bytes += size
+            if stack:
+                stack[-1][0] += elapsed
+                stack[-1][1] += size
+            return output
+
+        return measured
+
+    def merge(self, other: "ComponentProfiler") -> None:
+        """Aggregate another profile into this one"""
+        for key, stats in other.stats.items():
+            self._get(key).merge(stats)
+        self.pages += other.pages
+
+    def rows(self, sort: str = "bytes") -> List[tuple]:
+        """Return (key, stats) pairs sorted by the given column, largest first"""
+        attr = self.COLUMNS[sort]
+        return sorted(
+            self.stats.items(), key=lambda item: getattr(item[1], attr), reverse=True
+        )
+
+    def report(self, sort: str = "bytes", limit: Optional[int] = None) -> str:
+        """Format the profile as a plain text table"""
+        rows = self.rows(sort)[:limit]
+        header = (
+            f"{'component':<24}{'count':>8}{'nodes':>8}{'bytes':>10}"
+            f"{'total':>10}{'build ms':>10}{'render ms':>11}{'total ms':>10}"
+        )
+        lines = [f"{self.pages} page(s), sorted by {sort}", header]
+        for key, s in rows:
+            lines.append(
+                f"{key:<24}{s.count:>8}{s.nodes:>8}{s.self_bytes:>10}"
+                f"{s.total_bytes:>10}{s.build * 1000:>10.3f}"
+                f"{s.self_render * 1000:>11.3f}{s.total_render * 1000:>10.3f}"
+            )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,142 @@
+"""Purge linked stylesheets down to the selectors an app's pages use
+
+Renders every registered page without route parameters, collects the tags,
+classes, ids and attributes each linked stylesheet can see, and writes a
+minified, content-hashed copy of the sheet next to a manifest. Apps created
+with ``App(purged_css=True)`` link the copies instead of the originals.
+
+    python -m ugui.purge examples/picocss/main.py \
+        --safelist "[data-theme]" --safelist-pattern "^modal-is-"
+
+Classes and attributes set by scripts at runtime don't appear in the
+rendered pages, so list them in the safelist.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import runpy
+from pathlib import Path
+from typing import Dict, Iterable
+from .css import SelectorUsage, css_digest, purge_css, _MARKUP_ATTR, _MARKUP_TAG
+
+logger = logging.getLogger(__name__)
+
+# Attributes browsers toggle themselves, <details open> and <dialog open>
+DEFAULT_SAFELIST = ("[open]",)
+MANIFEST = "manifest.json"
+
+
+def _output_dir(app, output: str) -> Path:
+    return Path(app.static_folder) / output
+
+
+def _linked_stylesheets(html: str) -> list:
+    hrefs = []
+    for tag, attrs in _MARKUP_TAG.findall(html):
+        if tag.lower() != "link":
+            continue
+        values = {}
+        for name, double, single, bare in _MARKUP_ATTR.findall(attrs):
+            values[name.lower()] = double or single or bare
+        if values.get("rel") == "stylesheet" and values.get("href"):
+            hrefs.append(values["href"])
+    return hrefs
+
+
+async def collect_usage(app) -> Dict[str, SelectorUsage]:
+    """Render the app's pages and index their markup by linked stylesheet"""
+    usages: Dict[str, SelectorUsage] = {}
+    # Scan the originals, not copies from an earlier purge
+    previous, app.stylesheet_map = app.stylesheet_map, {}
+    try:
+        for route, wrapper in app._pages:
+            if "<" in route:
+                logger.info("Skipping %r, it has route parameters", route)
+                continue
+            async with app.test_request_context(route):
+                html = await wrapper()
+            if isinstance(html, tuple):
+                html = html[0]
+            usage = SelectorUsage()
+            usage.add_markup(html)
+            for href in _linked_stylesheets(html):
+                usages.setdefault(href, SelectorUsage()).update(usage)
+    finally:
+        app.stylesheet_map = previous
+    return usages
+
+
+async def purge_stylesheets(
+    app, safelist: Iterable = DEFAULT_SAFELIST, output: str = "purged"
+) -> Dict[str, str]:
+    """Write purged copies of the stylesheets linked from static files
+
+    Returns the map of original to purged href, also saved as the manifest
+    in the output directory under the static folder, and installs it.
+    """
+    safelist = list(safelist)
+    directory = _output_dir(app, output)
+    prefix = app.static_url_path.rstrip("/") + "/"
+    stylesheets = {}
+    for href, usage in (await collect_usage(app)).items():
+        if not href.startswith(prefix):
+            logger.info("Skipping %r, it is not a static file", href)
+            continue
+        source = Path(app.static_folder) / href[len(prefix) :]
+        css = source.read_text(encoding="utf-8")
+        purged = purge_css(css, usage, safelist)
+
+        name = f"{source.name.removesuffix('.css')}.{css_digest(purged)}.css"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / name).write_text(purged, encoding="utf-8")
+        stylesheets[href] = f"{prefix}{output}/{name}"
+        logger.info("%s: %d -> %d bytes", href, len(css.encode()), len(purged.encode()))
+
+    if stylesheets:
+        manifest = json.dumps(stylesheets, indent=2, sort_keys=True)
+        (directory / MANIFEST).write_text(manifest + "\n", encoding="utf-8")
+    app.stylesheet_map = stylesheets
+    return stylesheets
+
+
+def load_manifest(app, output: str = "purged") -> Dict[str, str]:
+    """Read the map of original to purged href written by purge_stylesheets"""
+    path = _output_dir(app, output) / MANIFEST
+    if not path.exists():
+        logger.warning("No purged stylesheets at %r, linking the originals", str(path))
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="Python file that creates the app")
+    parser.add_argument("--app", default="app", help="Name of the App in the file")
+    parser.add_argument(
+        "--safelist",
+        action="append",
+        default=[],
+        help="Selector whose classes, tags and attributes to keep",
+    )
+    parser.add_argument(
+        "--safelist-pattern",
+        action="append",
+        default=[],
+        help="Regular expression for class names to keep",
+    )
+    parser.add_argument("--output", default="purged", help="Static subdirectory")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    # Not run as __main__, so a guarded app.run() does not start the server
+    app = runpy.run_path(args.path, run_name="ugui_purge")[args.app]
+    safelist = [*DEFAULT_SAFELIST, *args.safelist]
+    safelist += [re.compile(pattern) for pattern in args.safelist_pattern]
+    asyncio.run(purge_stylesheets(app, safelist, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Hot reload of page modules for development
+
+Instead of restarting the process on every change, the reloader polls the
+files that define @app.page functions and re-imports only those that
+changed. Their pages replace the old ones in App._pages and the route table,
+while the imported packs and the CSS and icon caches stay warm. Open pages
+listen on an event stream and refresh once the reload is done.
+
+A module that creates its App is run again with a fresh App, whose pages
+and table sources the running app adopts. Everything else the module sets
+up on it, such as extensions, hooks and routes, stays on the fresh App and
+is dropped, so a reload does not register them twice. Changes to that
+setup and to other modules, such as components, still need a restart.
+"""
+
+import asyncio
+import importlib
+import inspect
+import logging
+import os
+import runpy
+import sys
+from typing import Dict, Optional
+from .app import App
+
+logger = logging.getLogger(__name__)
+
+# Added to every page, refreshes it when the server reloads its module. Run
+# again by each instant navigation, which keeps the first connection
+SCRIPT = (
+    "<script>window.uguiReload=window.uguiReload||new EventSource({url!r});"
+    "uguiReload.onmessage=function(){{location.reload()}}</script>"
+)
+
+
+class Reloader:
+    """Re-import changed page modules in place and notify open pages"""
+
+    def __init__(self, app, url: str = "/_ugui/reload", interval: float = 0.5):
+        self.app = app
+        self.url = url
+        self.interval = interval
+        self.script = SCRIPT.format(url=url)
+        # Modification times of the page module files, by path
+        self._mtimes: Dict[str, float] = {}
+        # Replaced after each reload, the pages waiting on it are notified
+        self._reloaded: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def install(self) -> None:
+        """Add the event stream route and poll while serving"""
+        self.app.add_url_rule(self.url, "ugui_reload", self._events_view)
+        self.app.before_serving(self._start)
+        self.app.after_serving(self._stop)
+        self.check()
+
+    def modules(self) -> Dict[str, str]:
+        """Module names of the page functions, by source file"""
+        modules = {}
+        for _, wrapper in self.app._pages:
+            func = wrapper.__wrapped__
+            path = _source_file(func)
+            if path is not None:
+                modules[path] = func.__module__
+        return modules
+
+    def check(self) -> bool:
+        """Reload the page modules changed since the last check"""
+        reloaded = False
+        for path, name in self.modules().items():
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            previous = self._mtimes.setdefault(path, mtime)
+            if mtime != previous:
+                self._mtimes[path] = mtime
+                reloaded |= self.reload(path, name)
+        return reloaded
+
+    def reload(self, path: str, name: str) -> bool:
+        """Re-import a page module, its pages replace those of the same route
+
+        Pages of the module that it no longer defines are removed.
+        """
+        previous = {
+            route: wrapper
+            for route, wrapper in self.app._pages
+            if _source_file(wrapper.__wrapped__) == path
+        }
+        cls = type(self.app)
+        cls._reloading = self.app
+        try:
+            if name in sys.modules and name != "__main__":
+                namespace = vars(importlib.reload(sys.modules[name]))
+            else:
+                # The script that was run, run again without its main block
+                namespace = runpy.run_path(path, run_name="__ugui_reload__")
+            copies = [
+                value
+                for value in namespace.values()
+                if isinstance(value, App) and value._reload_copy
+            ]
+            for copy in copies:
+                self.app._adopt(copy)
+                _replace_globals(copy, self.app)
+        except Exception:
+            logger.exception("Reloading %s failed, keeping the old pages", path)
+            return False
+        finally:
+            cls._reloading = None
+        # Pages defined again were replaced, the rest are gone from the module
+        self.app._remove_pages(
+            route
+            for route, wrapper in list(self.app._pages)
+            if previous.get(route) is wrapper
+        )
+        logger.info("Reloaded %s", path)
+        return True
+
+    async def _start(self) -> None:
+        self._reloaded = asyncio.Event()
+        self._task = asyncio.create_task(self._watch())
+
+    async def _stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.check():
+                self._reloaded.set()
+                self._reloaded = asyncio.Event()
+
+    async def _events_view(self):
+        async def events():
+            yield b": connected\n\n"
+            while self._reloaded is not None:
+                await self._reloaded.wait()
+                yield b"data: reload\n\n"
+
+        response = self.app.response_class(events(), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        # Open for as long as the page is
+        response.timeout = None
+        return response
+
+
+def _replace_globals(copy, app) -> None:
+    """Point the reloaded pages' globals naming the copy at the running app"""
+    for _, wrapper in copy._pages:
+        namespace = wrapper.__wrapped__.__globals__
+        for name, value in list(namespace.items()):
+            if value is copy:
+                namespace[name] = app
+
+
+def _source_file(func) -> Optional[str]:
+    try:
+        path = inspect.getsourcefile(func)
+    except TypeError:
+        return None
+    return None if path is None else os.path.abspath(path)
@@ -0,0 +1,167 @@
+/*
+ * Instant navigation
+ *
+ * Follows same-origin links in place: the next page is fetched with the
+ * X-Ugui-Partial header, so the server sends its title, body and only the
+ * style blocks this document does not have yet. The body, or the element
+ * marked data-ugui-region when both pages have one, is swapped and the new
+ * styles are added to the head. Links are prefetched on hover, and nav items
+ * and links marked data-ugui-prefetch="viewport" when they scroll into view.
+ * Links marked data-ugui-prefetch="off" are not prefetched, those marked
+ * data-ugui-reload load the whole page. Anything unexpected falls back to a
+ * full load. Scripts swapped in run, except external ones already loaded;
+ * components re-initialize on the ugui:navigate event.
+ */
+
+(() => {
+    if (window.uguiInstantNav) return;
+    window.uguiInstantNav = true;
+
+    // Prefetched responses are used for this long
+    const MAX_AGE = 30000;
+    const cache = new Map();
+    // External scripts run once per document, like on a full load
+    const loadedScripts = new Set([...document.scripts].map((script) => script.src));
+    // The page shown, history entries differing only in their hash keep it
+    let current = location.pathname + location.search;
+
+    const target = (link) => {
+        if (!link || link.hasAttribute("download") || link.hasAttribute("data-ugui-reload")) return null;
+        if (link.target && link.target !== "_self") return null;
+        const url = new URL(link.href, location.href);
+        if (url.origin !== location.origin || !/^https?:$/.test(url.protocol)) return null;
+        // Jumps within the page are left to the browser
+        if (url.pathname === location.pathname && url.search === location.search && url.hash) return null;
+        url.hash = "";
+        return url.href;
+    };
+
+    const knownStyles = () =>
+        [...document.querySelectorAll("style[data-ugui-styles]")]
+            .map((style) => style.dataset.uguiStyles)
+            .join(" ");
+
+    const fetchPage = (url) => {
+        const cached = cache.get(url);
+        if (cached && Date.now() - cached.time < MAX_AGE) return cached.page;
+        const page = fetch(url, {
+            headers: { "X-Ugui-Partial": "1", "X-Ugui-Styles": knownStyles() },
+        }).then(async (response) => {
+            if (!response.ok || !response.headers.get("X-Ugui-Partial")) throw new Error(response.status);
+            return { url: response.url, html: await response.text() };
+        });
+        cache.set(url, { page, time: Date.now() });
+        // Failures are not kept, the next attempt loads the page normally
+        page.catch(() => cache.delete(url));
+        return page;
+    };
+
+    const prefetch = (link) => {
+        if (link.dataset.uguiPrefetch === "off") return;
+        const url = target(link);
+        if (url && url !== location.href.split("#")[0]) fetchPage(url).catch(() => {});
+    };
+
+    const mergeHead = (head) => {
+        const title = head.ownerDocument.querySelector("title");
+        if (title) document.title = title.textContent;
+        head.querySelectorAll("style").forEach((style) => document.head.append(style));
+        head.querySelectorAll("link[rel=stylesheet]").forEach((link) => {
+            const present = [...document.querySelectorAll("link[rel=stylesheet]")].some(
+                (existing) => existing.href === link.href
+            );
+            if (!present) document.head.append(link);
+        });
+    };
+
+    const runScripts = (root) => {
+        root.querySelectorAll("script").forEach((old) => {
+            if (old.src && loadedScripts.has(old.src)) return;
+            const script = document.createElement("script");
+            for (const { name, value } of old.attributes) script.setAttribute(name, value);
+            script.textContent = old.textContent;
+            if (script.src) loadedScripts.add(script.src);
+            old.replaceWith(script);
+        });
+    };
+
+    const swap = (next) => {
+        const region = document.querySelector("[data-ugui-region]");
+        const replacement = next.querySelector("[data-ugui-region]");
+        if (region && replacement) {
+            region.replaceWith(replacement);
+            runScripts(replacement);
+        } else {
+            document.body.replaceWith(next.body);
+            runScripts(document.body);
+        }
+    };
+
+    const navigate = async (href, push) => {
+        const url = new URL(href, location.href);
+        const hash = url.hash;
+        url.hash = "";
+        let page;
+        try {
+            page = await fetchPage(url.href);
+        } catch {
+            location.href = href;
+            return;
+        }
+        // A page is swapped in once, later visits fetch it fresh
+        cache.delete(url.href);
+        if (push) history.pushState({ ugui: true }, "", new URL(hash, page.url).href);
+        current = location.pathname + location.search;
+        const next = new DOMParser().parseFromString(page.html, "text/html");
+        mergeHead(next.head);
+        swap(next);
+        const anchor = hash && document.getElementById(decodeURIComponent(hash.slice(1)));
+        if (anchor) anchor.scrollIntoView();
+        else if (push) window.scrollTo(0, 0);
+        observeLinks();
+        document.dispatchEvent(new CustomEvent("ugui:navigate", { detail: { url: location.href } }));
+    };
+
+    document.addEventListener("click", (event) => {
+        if (event.defaultPrevented || event.button !== 0) return;
+        if (event.metaKey || event.ctrlKey || event.shiftKey || event.altKey) return;
+        const link = event.target.closest("a[href]");
+        const url = link && target(link);
+        if (!url) return;
+        event.preventDefault();
+        navigate(link.href, true);
+    });
+
+    const hovered = (event) => {
+        const link = event.target.closest?.("a[href]");
+        if (link) prefetch(link);
+    };
+    document.addEventListener("mouseover", hovered);
+    document.addEventListener("touchstart", hovered, { passive: true });
+
+    const observer =
+        "IntersectionObserver" in window &&
+        new IntersectionObserver((entries) =>
+            entries.forEach((entry) => {
+                if (!entry.isIntersecting) return;
+                observer.unobserve(entry.target);
+                prefetch(entry.target);
+            })
+        );
+    const observeLinks = () => {
+        if (!observer) return;
+        document
+            .querySelectorAll('a.nav-item:not([data-ugui-prefetch]), a[data-ugui-prefetch="viewport"]')
+            .forEach((link) => observer.observe(link));
+    };
+
+    // Entries pushed by navigate and the page first loaded
+    history.replaceState({ ugui: true }, "");
+    window.addEventListener("popstate", (event) => {
+        if (event.state?.ugui && location.pathname + location.search !== current) {
+            navigate(location.href, false);
+        }
+    });
+
+    observeLinks();
+})();
@@ -0,0 +1,85 @@
+/*
+ * Virtual table
+ *
+ * Loads further windows of a VirtualTable from its fragment endpoint when
+ * the end of the table scrolls into view. Header clicks sort and the search
+ * box filters; both reload the rows from the first window.
+ */
+
+(() => {
+    if (window.uguiVirtualTable) return;
+    window.uguiVirtualTable = true;
+
+    const load = async (root) => {
+        const next = root.dataset.next;
+        if (root.loading || !next) return;
+        root.loading = true;
+        const generation = root.generation;
+        const params = new URLSearchParams({ next, limit: root.dataset.limit });
+        if (root.dataset.sort) params.set("sort", root.dataset.sort);
+        if (root.dataset.filter) params.set("q", root.dataset.filter);
+        try {
+            const response = await fetch(`${root.dataset.url}?${params}`);
+            if (!response.ok) throw new Error(`${response.status} ${response.statusText}`);
+            const rows = await response.text();
+            // Drop windows requested before a sort or filter change
+            if (generation !== root.generation) return;
+            root.querySelector("tbody").insertAdjacentHTML("beforeend", rows);
+            root.dataset.next = response.headers.get("X-Ugui-Next") || "";
+        } finally {
+            if (generation === root.generation) root.loading = false;
+        }
+        // Keep loading while the end of the table is still visible
+        root.observer.unobserve(root.sentinel);
+        root.observer.observe(root.sentinel);
+    };
+
+    const reload = (root) => {
+        root.generation += 1;
+        root.loading = false;
+        root.querySelector("tbody").replaceChildren();
+        root.dataset.next = "0";
+        load(root);
+    };
+
+    const sort = (root, th) => {
+        const name = th.textContent;
+        const descending = root.dataset.sort === name;
+        root.dataset.sort = descending ? `-${name}` : name;
+        for (const cell of th.parentElement.children) cell.removeAttribute("aria-sort");
+        th.setAttribute("aria-sort", descending ? "descending" : "ascending");
+        reload(root);
+    };
+
+    const init = (root) => {
+        if (root.observer) return;
+        const scroll = root.querySelector(".virtual-table-scroll");
+        root.generation = 0;
+        root.sentinel = document.createElement("div");
+        scroll.append(root.sentinel);
+        root.observer = new IntersectionObserver(
+            (entries) => entries.some((entry) => entry.isIntersecting) && load(root),
+            { root: scroll, rootMargin: "200px" }
+        );
+        root.observer.observe(root.sentinel);
+
+        root.querySelectorAll("thead th").forEach((th) =>
+            th.addEventListener("click", () => sort(root, th))
+        );
+
+        const search = root.querySelector(".virtual-table-search");
+        let timer = null;
+        search?.addEventListener("input", () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                root.dataset.filter = search.value;
+                reload(root);
+            }, 250);
+        });
+    };
+
+    const initAll = () => document.querySelectorAll(".virtual-table").forEach(init);
+    initAll();
+    // Tables in a page swapped in by instant navigation
+    document.addEventListener("ugui:navigate", initAll);
+})();
@@ -0,0 +1,97 @@
+import inspect
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+class TableSource:
+    """Server-side rows for a VirtualTable, registered with App.table_source
+
+    The callback is called with offset and limit, and with sort (a header
+    name, prefixed with "-" for descending), filter and cursor when it accepts
+    them, so the database does the sorting and filtering. It returns a list
+    of row tuples, or a (rows, next_cursor) tuple to page by cursor instead
+    of offset. Async callbacks are supported.
+
+    formats and numeric apply to the first window and to every window loaded
+    on scroll alike. numeric lists the right-aligned columns, by header or
+    index; without it they are told from the first window, so pass it when
+    that window is loaded by the client.
+    """
+
+    MAX_LIMIT = 1000
+
+    def __init__(
+        self,
+        func: Callable,
+        name: str,
+        headers: List[str],
+        page_size: int = 50,
+        url: str = "",
+        formats: Optional[Dict[Union[str, int], Any]] = None,
+        numeric: Optional[Iterable[Union[str, int]]] = None,
+    ):
+        self.func = func
+        self.name = name
+        self.headers = list(headers)
+        self.page_size = page_size
+        self.url = url
+        self.formats = dict(formats or {})
+        self.numeric = None if numeric is None else tuple(numeric)
+        self.is_async = inspect.iscoroutinefunction(func)
+
+        parameters = inspect.signature(func).parameters
+        self._accepts_any = any(
+            p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values()
+        )
+        self._accepts = set(parameters)
+
+    def valid_sort(self, sort: Optional[str]) -> bool:
+        return not sort or sort.removeprefix("-") in self.headers
+
+    def _arguments(self, offset, limit, sort, filter, cursor) -> dict:
+        arguments = {
+            "offset": offset,
+            "limit": min(limit or self.page_size, self.MAX_LIMIT),
+            "sort": sort or None,
+            "filter": filter or None,
+            "cursor": cursor,
+        }
+        if self._accepts_any:
+            return arguments
+        return {k: v for k, v in arguments.items() if k in self._accepts}
+
+    @staticmethod
+    def _window(result: Any, offset: int, limit: int) -> Tuple[list, str]:
+        """Return (rows, next token), the token is '' once rows run out"""
+        if isinstance(result, tuple):
+            rows, cursor = result
+            return list(rows), "" if cursor is None else f"c:{cursor}"
+        rows = list(result)
+        return rows, "" if len(rows) < limit else str(offset + len(rows))
+
+    @staticmethod
+    def parse_next(token: str) -> Tuple[int, Optional[str]]:
+        """Split a next token from the client into (offset, cursor)"""
+        if token.startswith("c:"):
+            return 0, token[2:]
+        return max(int(token or 0), 0), None
+
+    def fetch(self, offset=0, limit=None, sort=None, filter=None, cursor=None):
+        """Call a sync callback, returning (rows, next token)"""
+        arguments = self._arguments(offset, limit, sort, filter, cursor)
+        limit = min(limit or self.page_size, self.MAX_LIMIT)
+        return self._window(self.func(**arguments), offset, limit)
+
+    async def fetch_async(
+        self, offset=0, limit=None, sort=None, filter=None, cursor=None
+    ):
+        """Call the callback from the event loop, returning (rows, next token)"""
+        arguments = self._arguments(offset, limit, sort, filter, cursor)
+        limit = min(limit or self.page_size, self.MAX_LIMIT)
+        if self.is_async:
+            result = await self.func(**arguments)
+        else:
+            # Imported here, rendering a table page needs no server stack
+            from asgiref.sync import sync_to_async
+
+            result = await sync_to_async(self.func)(**arguments)
+        return self._window(result, offset, limit)
@@ -1,8 +1,20 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List
+from .optional import numpy
+
+FNV_PRIME = 0x01000193
+FNV_OFFSET = 0x811C9DC5
+
+# Multiple golden ratios for better distribution
+GOLDEN_RATIO1 = 0.618033988749895
+GOLDEN_RATIO2 = 0.517638090205041  # Another golden mean variant
+
+# Colours registered with preload_palette, looked up before the cache
+_palette: Dict[str, str] = {}
+
+
 def hash_string(s: str) -> int:
     """FNV-1a hashing algorithm for better distribution"""
-    FNV_PRIME = 0x01000193
-    FNV_OFFSET = 0x811C9DC5
-
     hash_value = FNV_OFFSET
     for char in s.encode():
         hash_value = ((hash_value ^ char) * FNV_PRIME) & 0xFFFFFFFF
@@ -11,20 +23,94 @@ def hash_string(s: str) -> int:
 
 def colorhash(text: str) -> str:
     """Generate a bright, readable color from text input"""
-    hash_value = hash_string(text)
+    try:
+        return _palette[text]
+    except KeyError:
+        return _colorhash(text)
 
-    # Multiple golden ratios for better distribution
-    golden_ratio1 = 0.618033988749895
-    golden_ratio2 = 0.517638090205041  # Another golden mean variant
+
+@lru_cache(maxsize=4096)
+def _colorhash(text: str) -> str:
+    hash_value = hash_string(text)
 
     # Use text length to vary starting point
     start_hue = (0.314159265 + (len(text) * 0.1)) % 1.0
 
     # Generate hue with dual golden ratio influence
-    hue = ((start_hue + (hash_value * golden_ratio1 / golden_ratio2)) % 1.0) * 360
+    hue = ((start_hue + (hash_value * GOLDEN_RATIO1 / GOLDEN_RATIO2)) % 1.0) * 360
 
     # More varied saturation and lightness based on text characteristics
     saturation = 65 + ((hash_value + len(text)) % 25)  # 65-90%
     lightness = 35 + ((hash_value ^ len(text)) % 20)  # 35-55%
 
     return f"hsl({hue}, {saturation}%, {lightness}%)"
+
+
+def _hash_many(encoded: List[bytes]):
+    """FNV-1a of every string at once, one byte position at a time
+
+    Strings are ordered longest first, so those still being hashed at a
+    position are a prefix, and their bytes are gathered from the joined
+    buffer instead of padding every string to the longest one.
+    """
+    np = numpy()
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    order = np.argsort(-lengths, kind="stable")
+    longest_first = lengths[order]
+    starts = (np.cumsum(lengths) - lengths)[order]
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    # How many strings are longer than each position
+    width = int(longest_first[0]) if len(encoded) else 0
+    active = np.searchsorted(-longest_first, -np.arange(width), side="left")
+    hashes = np.full(len(encoded), FNV_OFFSET, dtype=np.uint64)
+    for position, count in enumerate(active.tolist()):
+        byte = data[starts[:count] + position]
+        hashes[:count] = ((hashes[:count] ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+    result = np.empty_like(hashes)
+    result[order] = hashes
+    return result
+
+
+def colorhash_many(labels: Iterable[str]) -> List[str]:
+    """colorhash for many labels at once, vectorised when NumPy is installed
+
+    Gives exactly the colours colorhash gives; duplicate labels are
+    computed once.
+    """
+    labels = list(labels)
+    unique = list(dict.fromkeys(labels))
+    # Small sets are not worth importing NumPy for
+    if len(unique) < 16 or numpy() is None:
+        return [colorhash(label) for label in labels]
+    np = numpy()
+
+    hashes = _hash_many([label.encode() for label in unique])
+    sizes = np.fromiter(map(len, unique), dtype=np.int64, count=len(unique))
+    # Same float operations in the same order as colorhash, so hues match
+    start_hue = (0.314159265 + (sizes * 0.1)) % 1.0
+    hue = (
+        (start_hue + (hashes.astype(float) * GOLDEN_RATIO1 / GOLDEN_RATIO2)) % 1.0
+    ) * 360
+    sizes = sizes.astype(np.uint64)
+    saturation = 65 + (hashes + sizes) % 25
+    lightness = 35 + (hashes ^ sizes) % 20
+
+    colors = {
+        label: f"hsl({h}, {s}%, {l}%)"
+        for label, h, s, l in zip(
+            unique, hue.tolist(), saturation.tolist(), lightness.tolist()
+        )
+    }
+    return [colors[label] for label in labels]
+
+
+def preload_palette(labels: Iterable[str]) -> Dict[str, str]:
+    """Compute the colours of a known label set up front, e.g. at startup
+
+    Later colorhash calls for these labels are plain dict lookups that never
+    leave the cache. Returns the label to colour mapping.
+    """
+    labels = list(dict.fromkeys(labels))
+    palette = dict(zip(labels, colorhash_many(labels)))
+    _palette.update(palette)
+    return palette
@@ -0,0 +1,81 @@
+from typing import Optional, Sequence, Tuple
+from .optional import numpy
+
+
+def lttb(y: Sequence[float], threshold: int, x: Optional[Sequence[float]] = None):
+    """Downsample a series to threshold points with largest-triangle-three-buckets
+
+    Keeps the first and last point and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks and troughs. Returns
+    (x, y); x defaults to the point index. Uses NumPy when it is installed.
+    threshold must be at least 3, room for both ends and one bucket.
+    """
+    if threshold < 3:
+        raise ValueError(f"threshold must be at least 3, got {threshold}")
+    n = len(y)
+    if x is None:
+        x = range(n)
+    if threshold >= n:
+        return list(x), list(y)
+    np = numpy()
+    if np is not None:
+        return _lttb_numpy(
+            np.asarray(x, dtype=float), np.asarray(y, dtype=float), threshold
+        )
+    return _lttb_python(list(x), list(y), threshold)
+
+
+def _buckets(n: int, threshold: int) -> list:
+    """Start indices of the threshold - 2 inner buckets, plus the end"""
+    every = (n - 2) / (threshold - 2)
+    return [int(i * every) + 1 for i in range(threshold - 1)]
+
+
+def _lttb_python(x: list, y: list, threshold: int) -> Tuple[list, list]:
+    n = len(y)
+    edges = _buckets(n, threshold) + [n]
+    kept = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+        count = next_end - next_start
+        avg_x = sum(x[next_start:next_end]) / count
+        avg_y = sum(y[next_start:next_end]) / count
+        ax, ay = x[a], y[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (y[j] - ay) - (ax - x[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return [x[i] for i in kept], [y[i] for i in kept]
+
+
+def _lttb_numpy(x, y, threshold: int) -> Tuple[list, list]:
+    np = numpy()
+    n = len(y)
+    edges = np.array(_buckets(n, threshold) + [n])
+    # Average of every bucket in one pass; the last bucket is the last point
+    starts = edges[1:-1]
+    counts = np.diff(edges[1:])
+    avg_x = np.add.reduceat(x, starts) / counts
+    avg_y = np.add.reduceat(y, starts) / counts
+
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        areas = np.abs(
+            (ax - avg_x[i]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (avg_y[i] - ay)
+        )
+        a = start + int(areas.argmax())
+        kept[i + 1] = a
+    return x[kept].tolist(), y[kept].tolist()
@@ -0,0 +1,19 @@
+"""Optional dependencies, imported on first use to keep ``import ugui`` fast"""
+
+import sys
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def numpy():
+    """The numpy module, or None when it is not installed"""
+    try:
+        import numpy
+    except ImportError:  # NumPy is optional
+        return None
+    return numpy
+
+
+def loaded_numpy():
+    """numpy if something imported it already, there are no arrays otherwise"""
+    return sys.modules.get("numpy")
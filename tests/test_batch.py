@@ -0,0 +1,62 @@
+import pytest
+from ugui import render_many
+
+
+def greeting(page, name):
+    page.h1(f"Hello {name}")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pages_come_back_in_input_order(workers):
+    names = [f"name {index}" for index in range(30)]
+    report = render_many(greeting, names, workers=workers, chunksize=2)
+    assert report.pages == 30
+    assert report.workers == workers
+    assert [html.count(name + "<") for html, name in zip(report.results, names)] == [
+        1
+    ] * 30
+    assert report.bytes == sum(len(html.encode()) for html in report.results)
+
+
+def test_pages_are_written_to_output(tmp_path):
+    report = render_many(
+        greeting, ["a", "b"], workers=2, output=str(tmp_path / "{item}.html")
+    )
+    assert report.results == []
+    assert "Hello b" in (tmp_path / "b.html").read_text()
+
+
+def test_inputs_are_read_a_bounded_distance_ahead():
+    read = []
+
+    def names():
+        for index in range(200):
+            read.append(index)
+            yield str(index)
+
+    seen = []
+
+    def callback(index, item, html):
+        # Two workers with chunks of one keep 8 inputs in flight while one is
+        # written
+        seen.append(len(read) - index)
+
+    render_many(greeting, names(), workers=2, chunksize=1, callback=callback)
+    assert max(seen) <= 9
+    # The pool is refilled as pages come back, not a window at a time
+    assert min(seen[:190]) >= 8
+    assert len(read) == 200
+
+
+def test_page_options_are_passed_on():
+    report = render_many(greeting, ["x"], workers=1, minify=False)
+    assert "\n" in report.results[0]
+
+
+def failing(page, item):
+    raise ValueError(item)
+
+
+def test_errors_stop_the_batch():
+    with pytest.raises(ValueError):
+        render_many(failing, ["bad"], workers=2)
@@ -0,0 +1,78 @@
+import pytest
+from ugui import Page
+
+LINKS = [("Home", "/"), ("Docs", "/docs?a=1&b=2")]
+
+
+def with_tags(page: Page) -> None:
+    with page.body():
+        with page.ul(cls="menu"):
+            for label, url in LINKS:
+                with page.li():
+                    page.a(label, href=url)
+        page.p("a < b")
+
+
+def with_build(page: Page) -> None:
+    with page.body():
+        page.build(
+            [
+                [
+                    "ul",
+                    {"cls": "menu"},
+                    [["li", ["a", {"href": url}, label]] for label, url in LINKS],
+                ],
+                None,
+                ("p", "a < b"),
+            ]
+        )
+
+
+@pytest.mark.parametrize("flat", (False, True))
+def test_build_matches_tag_calls(flat):
+    tags, built = Page(style=False), Page(style=False, flat=flat)
+    with_tags(tags)
+    with_build(built)
+    assert str(built) == str(tags)
+
+
+def test_build_returns_the_element():
+    page = Page(style=False)
+    with page.body():
+        element = page.build(["div", {"id": "root"}, "text"])
+    assert element.attrs["id"] == "root"
+
+
+def test_build_accepts_nodes():
+    page = Page(style=False)
+    with page.body():
+        with page.div():
+            node = page.span("made")
+        page.build(["section", node])
+    assert "<section><span>made</span></section>" in str(page)
+
+
+def test_build_handles_deep_nesting():
+    spec = "leaf"
+    for _ in range(5000):
+        spec = ["div", spec]
+    # Built without recursing, the flat tree renders it the same way
+    page = Page(style=False, flat=True)
+    with page.body():
+        page.build(spec)
+    assert str(page).count("<div>") == 5000
+
+
+@pytest.mark.parametrize("flat", (False, True))
+def test_nested_attributes_name_the_spec(flat):
+    page = Page(style=False, flat=flat)
+    with page.body():
+        with pytest.raises(TypeError, match="'href'"):
+            page.build(["ul", ["li", "Home", {"href": "/"}]])
+
+
+def test_invalid_children_are_rejected():
+    page = Page(style=False)
+    with page.body():
+        with pytest.raises(TypeError, match="Invalid spec 42"):
+            page.build(["p", 42])
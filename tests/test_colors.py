@@ -0,0 +1,42 @@
+import pytest
+import tracemalloc
+from ugui.utils import colors
+from ugui.utils.colors import colorhash, colorhash_many, hash_string, preload_palette
+from ugui.utils.optional import numpy
+
+LABELS = ["", "a", "api", "émoji 🎨", "x" * 300] + [f"label {i}" for i in range(200)]
+
+
+def test_hash_string_is_fnv1a():
+    assert hash_string("") == 0x811C9DC5
+    assert hash_string("a") == 0xE40C292C
+    assert hash_string("foobar") == 0xBF9CF968
+
+
+@pytest.mark.parametrize("count", (3, len(LABELS)))
+def test_colorhash_many_matches_colorhash(count):
+    labels = LABELS[:count] * 2
+    assert colorhash_many(labels) == [colorhash(label) for label in labels]
+
+
+def test_preloaded_labels_keep_their_colours(monkeypatch):
+    monkeypatch.setattr(colors, "_palette", {})
+    expected = {label: colorhash(label) for label in LABELS}
+    assert preload_palette(LABELS + LABELS[:5]) == expected
+    colors._colorhash.cache_clear()
+    assert [colorhash(label) for label in LABELS] == list(expected.values())
+    assert colors._colorhash.cache_info().currsize == 0
+
+
+@pytest.mark.skipif(numpy() is None, reason="NumPy is not installed")
+def test_one_long_label_does_not_pad_the_others():
+    labels = ["x" * 5000] + [f"label {i}" for i in range(1000)]
+    tracemalloc.start()
+    try:
+        hashes = colors._hash_many([label.encode() for label in labels])
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert hashes.tolist() == [hash_string(label) for label in labels]
+    # Padding to the longest label took 40 MB here
+    assert peak < 1_000_000
@@ -0,0 +1,57 @@
+import pytest
+from ugui import Page
+from ugui.components import Component, get_component
+from ugui.components.og import Button, NavItem
+from ugui.html import Element
+
+
+def test_tag_names_build_plain_elements():
+    page = Page()
+    with page.body():
+        button = page.button("Go")
+        form = page.form()
+    assert type(button) is Element and button.render().startswith("<button")
+    assert type(form) is Element and form.render().startswith("<form")
+
+
+def test_components_are_reached_through_ui():
+    page = Page()
+    with page.body():
+        button = page.ui.button("Go")
+    assert isinstance(button, Button)
+
+
+def test_non_tag_names_still_find_components():
+    page = Page()
+    with page.body():
+        card = page.card(title="A card")
+    assert isinstance(card, get_component("og", "card"))
+
+
+def test_snake_case_lookup():
+    assert get_component("og", "nav_item") is NavItem
+    assert get_component("og", "NavItem") is NavItem
+    with pytest.raises(ValueError):
+        get_component("og", "nav_items")
+
+
+def test_pack_components_share_the_base_class():
+    assert issubclass(get_component("og", "card"), Component)
+    assert issubclass(NavItem, Component)
+
+
+@pytest.mark.parametrize(
+    "name, args, props",
+    [
+        ("nav_item", ("Home", "/home"), {"label": "Home", "url": "/home"}),
+        ("link", ("Docs", "/docs"), {"text": "Docs", "url": "/docs"}),
+        ("field", ("Name",), {"label": "Name"}),
+    ],
+)
+def test_label_and_url_can_be_positional(name, args, props):
+    page = Page()
+    with page.body():
+        positional = getattr(page.ui, name)(*args)
+        keywords = getattr(page.ui, name)(**props)
+    assert positional.render() == keywords.render()
+    assert args[0] in positional.render()
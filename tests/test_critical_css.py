@@ -0,0 +1,89 @@
+import asyncio
+import re
+from pathlib import Path
+from ugui import App
+
+
+def make_app(css_dir) -> App:
+    app = App(__name__, css_dir=css_dir)
+
+    @app.page("/", critical_css=1)
+    def index(page):
+        with page.body():
+            page.h1("Above the fold")
+            page.ui.card(title="Below the fold")
+
+    app._register_pages()
+    return app
+
+
+def get(app, path, **kwargs):
+    async def request():
+        response = await app.test_client().get(path, **kwargs)
+        return response, await response.get_data(as_text=True)
+
+    return asyncio.run(request())
+
+
+def stylesheet_url(html: str) -> str:
+    return re.search(r'href="(/_ugui/css/[0-9a-f]+\.css)"', html).group(1)
+
+
+def test_page_inlines_critical_css_and_varies(tmp_path):
+    response, html = get(make_app(tmp_path), "/")
+    assert "<style>" in html
+    assert 'rel="preload"' in html
+    assert response.headers["Vary"] == "Cookie, X-Ugui-CSS"
+
+
+def test_stylesheet_is_served_by_other_workers(tmp_path):
+    _, html = get(make_app(tmp_path), "/")
+    # A second app shares only the directory, like another worker or a restart
+    response, css = get(make_app(tmp_path), stylesheet_url(html))
+    assert response.status_code == 200
+    assert ".card" in css
+    assert "immutable" in response.headers["Cache-Control"]
+
+
+def test_cached_stylesheet_is_linked(tmp_path):
+    app = make_app(tmp_path)
+    _, html = get(app, "/")
+    url = stylesheet_url(html)
+    digest = url.rsplit("/", 1)[1].removesuffix(".css")
+    _, html = get(app, "/", headers={"X-Ugui-CSS": digest})
+    assert "<style>" not in html
+    assert f'<link rel="stylesheet" href="{url}">' in html
+
+
+def test_unknown_stylesheet_is_not_found(tmp_path):
+    response, _ = get(make_app(tmp_path), "/_ugui/css/0123456789abcdef.css")
+    assert response.status_code == 404
+    response, _ = get(make_app(tmp_path), "/_ugui/css/..%2Fsecret.css")
+    assert response.status_code == 404
+
+
+def test_planted_stylesheet_is_not_served(tmp_path):
+    _, html = get(make_app(tmp_path), "/")
+    url = stylesheet_url(html)
+    path = tmp_path / url.rsplit("/", 1)[1]
+    path.write_text("body{background:url(//evil.example)}")
+    # A fresh app has only the file, whose content does not match the digest
+    response, _ = get(make_app(tmp_path), url)
+    assert response.status_code == 404
+
+
+def test_stylesheet_replaces_an_existing_file(tmp_path):
+    _, html = get(make_app(tmp_path), "/")
+    path = tmp_path / stylesheet_url(html).rsplit("/", 1)[1]
+    css = path.read_text()
+    path.write_text("planted")
+    get(make_app(tmp_path), "/")
+    assert path.read_text() == css
+    assert [file.suffix for file in tmp_path.iterdir()] == [".css"]
+
+
+def test_stylesheets_default_to_a_private_app_directory(tmp_path):
+    app = App(__name__)
+    assert app.css_dir == Path(app.instance_path) / "ugui-css"
+    get(make_app(tmp_path / "css"), "/")
+    assert (tmp_path / "css").stat().st_mode & 0o777 == 0o700
@@ -0,0 +1,123 @@
+import pytest
+from ugui.css import CSSRegistry, SelectorUsage, optimize, parse_css, serialize
+
+
+def optimized(css: str) -> str:
+    return serialize(optimize(parse_css(css)), True)
+
+
+def test_duplicate_rules_are_dropped():
+    assert optimized(".a{color:red}.a{color:red}") == ".a{color:red}"
+
+
+def test_overridden_declarations_are_dropped():
+    assert optimized(".a{color:red;margin:0}.b{}.a{color:blue}") == (
+        ".a{margin:0}.a{color:blue}"
+    )
+
+
+def test_fallback_declarations_are_kept():
+    css = ".a{height:100vh;height:100dvh}"
+    assert optimized(css) == css
+
+
+def test_media_blocks_are_merged():
+    css = "@media (min-width:1px){.a{color:red}}@media (min-width: 1px){.b{margin:0}}"
+    assert optimized(css) == "@media (min-width:1px){.a{color:red}.b{margin:0}}"
+
+
+@pytest.mark.parametrize(
+    "between",
+    [
+        # Same selector
+        ".a{color:blue}",
+        # Another class on the same element, .a.primary
+        ".primary{color:blue}",
+        # A shorthand of a property in the block
+        ".primary{margin:0}",
+    ],
+)
+def test_media_blocks_are_not_moved_across_the_cascade(between):
+    block = "@media (min-width:1px){.a{color:red;margin-top:1px}}"
+    css = f"{block}{between}@media (min-width:1px){{.nav{{padding:0}}}}"
+    assert optimized(css).startswith(block)
+    assert optimized(css).count("@media") == 2
+
+
+@pytest.mark.parametrize(
+    "between",
+    [
+        # Different properties
+        ".primary{padding:0}",
+        # Elements of different tags
+        "p{color:blue}",
+        # A pseudo-element is a different box
+        ".primary::before{color:blue}",
+    ],
+)
+def test_media_blocks_merge_past_unrelated_rules(between):
+    css = (
+        "@media (min-width:1px){a{color:red}}"
+        f"{between}@media (min-width:1px){{.nav{{margin:0}}}}"
+    )
+    assert optimized(css).endswith("@media (min-width:1px){a{color:red}.nav{margin:0}}")
+
+
+def test_repeated_blocks_keep_their_last_position():
+    css = (
+        "@media (max-width:640px){.a{color:red}}.a{color:blue}"
+        ".b{margin:0}@media (max-width:640px){.a{color:red}}"
+    )
+    assert optimized(css) == (
+        ".a{color:blue}.b{margin:0}@media (max-width:640px){.a{color:red}}"
+    )
+
+
+def test_repeated_keyframes_keep_the_last_definition():
+    css = "@keyframes s{to{top:0}}@keyframes t{to{top:1px}}@keyframes s{to{top:0}}"
+    assert optimized(css) == "@keyframes t{to{top:1px}}@keyframes s{to{top:0}}"
+
+
+def test_registry_orders_by_priority():
+    registry = CSSRegistry()
+    registry.add(".card{padding:0}")
+    registry.add(":root{--x:1}")
+    assert registry.render(minify=True).startswith(":root")
+
+
+def test_tree_shaking_keeps_used_selectors():
+    registry = CSSRegistry()
+    registry.add(".used{color:red}.unused{color:blue}div>.used{margin:0}")
+    usage = SelectorUsage()
+    usage.add("div", {"class": "used"})
+    css = registry.render(minify=True, usage=usage)
+    assert ".used{color:red}" in css
+    assert "div>.used" in css
+    assert ".unused" not in css
+
+
+def test_tree_shaking_looks_inside_media_and_pseudo_classes():
+    registry = CSSRegistry()
+    registry.add(
+        ".a:hover{color:red}.b:hover{color:red}[data-x]{margin:0}"
+        "input[type=text]{border:0}"
+        "@media (max-width:40em){.a{top:0}.b{top:1px}}"
+        "@keyframes spin{to{transform:rotate(1turn)}}.a{animation:spin 1s}"
+    )
+    usage = SelectorUsage()
+    usage.add("div", {"class": "a", "data-x": "1"})
+    css = registry.render(minify=True, usage=usage)
+    assert ".a:hover{color:red}[data-x]{margin:0}" in css
+    assert "@media (max-width:40em){.a{top:0}}" in css
+    assert "@keyframes spin" in css
+    assert ".b" not in css and "input" not in css
+
+
+def test_tree_shaking_keeps_everything_for_partial_usage():
+    registry = CSSRegistry()
+    registry.add(".used{color:red}.unused{color:blue}")
+    usage = SelectorUsage()
+    usage.add("div", {"class": "used"})
+    # Lazy children leave part of the markup unknown until rendered
+    usage.partial = True
+    assert ".unused{color:blue}" in registry.render(minify=True, usage=usage)
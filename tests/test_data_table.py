@@ -0,0 +1,120 @@
+import asyncio
+from array import array
+import pytest
+from ugui import Markup, Page
+from ugui.components.og.data_table import format_column
+from ugui.html import AGGRESSIVE
+from ugui.utils.optional import numpy
+
+
+def table(minify=True, **props) -> str:
+    page = Page(style=False, minify=minify)
+    with page.body():
+        page.ui.data_table(**props)
+    html = str(page)
+    return html[html.index("<table") : html.rindex("</table>") + 8]
+
+
+def test_rows_are_formatted_and_escaped():
+    html = table(
+        rows=[("a<b", 1, None), ("c", 2.5, Markup("<i>x</i>"))],
+        headers=["name", "n", "note"],
+        formats={"n": ".1f"},
+    )
+    assert html.endswith(
+        "<thead><tr><th>name</th><th>n</th><th>note</th></tr></thead><tbody>"
+        "<tr><td>a&lt;b</td><td>1.0</td><td></td></tr>"
+        "<tr><td>c</td><td>2.5</td><td><i>x</i></td></tr></tbody></table>"
+    )
+
+
+def test_columns_render_like_rows():
+    columns = {"name": ["a", "b"], "n": array("i", [1, 2])}
+    rows = [("a", 1), ("b", 2)]
+    assert table(columns=columns) == table(rows=rows, headers=["name", "n"])
+
+
+def test_numeric_columns_are_right_aligned():
+    page = Page(minify=True)
+    with page.body():
+        page.ui.data_table(rows=[("a", 1, 2.0)], headers=["name", "n", "x"])
+        page.ui.data_table(rows=[("a", 1)], headers=["name", "n"], numeric=["name"])
+    html = str(page)
+    assert "td:nth-child(2),.data-table-" in html
+    assert "td:nth-child(3){text-align:right}" in html
+    assert "td:nth-child(1){text-align:right}" in html
+
+
+def test_rows_are_read_a_chunk_at_a_time():
+    read = []
+
+    def rows():
+        for index in range(10):
+            read.append(index)
+            yield (index,)
+
+    page = Page(style=False)
+    with page.body():
+        data_table = page.ui.data_table(rows=rows(), headers=["n"], chunk_size=3)
+    assert len(read) == 3
+    chunks = list(data_table.iter_rows(minify=True))
+    assert len(chunks) == 4
+    assert "".join(chunks).count("<tr>") == 10
+
+
+def test_aggressive_leaves_out_end_tags():
+    html = table(minify=AGGRESSIVE, rows=[("a", 1)], headers=["name", "n"])
+    assert html.endswith("<thead><tr><th>name<th>n<tbody><tr><td>a<td>1</table>")
+
+
+def test_format_column_accepts_printf_and_callables():
+    assert format_column([1, 2.5], "%.2f") == ["1.00", "2.50"]
+    assert format_column(["<", ">"], lambda value: value * 2) == [
+        "&lt;&lt;",
+        "&gt;&gt;",
+    ]
+
+
+def test_format_applies_to_cells_next_to_markup():
+    cells = format_column([1.25, Markup("<i>n/a</i>"), None, 3], ".1f")
+    assert cells == ["1.2", "<i>n/a</i>", "", "3.0"]
+    assert format_column([None, Markup("<i>-</i>"), "a<b"]) == [
+        "",
+        "<i>-</i>",
+        "a&lt;b",
+    ]
+
+
+def test_uneven_columns_are_rejected():
+    with pytest.raises(ValueError, match="different lengths"):
+        table(columns={"name": ["a", "b"], "n": [1]})
+
+
+@pytest.mark.skipif(numpy() is None, reason="NumPy is not installed")
+def test_numpy_columns_match_lists():
+    np = numpy()
+    values = [1.5, 2.25, 3.0]
+    assert format_column(np.array(values), ".2f") == format_column(values, ".2f")
+    assert format_column(np.array(values), "%.1f") == format_column(values, "%.1f")
+    assert format_column(np.array(["<a>", "b"])) == ["&lt;a&gt;", "b"]
+
+
+def test_streamed_tables_arrive_in_chunks():
+    def rows():
+        for index in range(20000):
+            yield (f"name {index}", index)
+
+    page = Page(style=False)
+    with page.body():
+        with page.div():
+            page.ui.data_table(rows=rows(), headers=["name", "n"], chunk_size=500)
+    sizes = []
+
+    async def stream():
+        async for chunk in page.document.astream():
+            sizes.append(len(chunk))
+
+    asyncio.run(stream())
+    assert len(sizes) >= 40
+    # About one chunk of rows at a time, not the whole table
+    assert max(sizes) < sum(sizes) / 20
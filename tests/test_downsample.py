@@ -0,0 +1,75 @@
+import math
+import random
+import re
+import pytest
+from ugui import Page
+from ugui.utils.downsample import _lttb_numpy, _lttb_python, lttb
+from ugui.utils.optional import numpy
+
+
+def series(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [math.sin(i / 50) * 10 + rng.random() for i in range(n)]
+
+
+def test_short_series_are_returned_as_is():
+    assert lttb([3, 1, 2], 10) == ([0, 1, 2], [3, 1, 2])
+    assert lttb([3, 1, 2, 5], 4, x=[1, 2, 3, 4]) == ([1, 2, 3, 4], [3, 1, 2, 5])
+
+
+@pytest.mark.parametrize("threshold", (0, 1, 2))
+def test_thresholds_below_three_are_rejected(threshold):
+    with pytest.raises(ValueError, match="at least 3"):
+        lttb([3, 1, 2, 5], threshold)
+
+
+@pytest.mark.parametrize("threshold", (3, 10, 257))
+def test_keeps_threshold_points_with_both_ends(threshold):
+    y = series(5000)
+    xs, ys = lttb(y, threshold)
+    assert len(xs) == len(ys) == threshold
+    assert (xs[0], ys[0]) == (0, y[0])
+    assert (xs[-1], ys[-1]) == (4999, y[-1])
+    assert xs == sorted(set(xs))
+    assert ys == [y[int(x)] for x in xs]
+
+
+def test_keeps_peaks_and_troughs():
+    y = [0.0] * 10000
+    y[1234], y[7777] = 100.0, -100.0
+    _, ys = lttb(y, 50)
+    assert 100.0 in ys and -100.0 in ys
+
+
+def test_uses_x_values():
+    x = [i * 0.5 for i in range(1000)]
+    xs, _ = lttb(series(1000), 20, x)
+    assert xs[0] == 0 and xs[-1] == 499.5
+    assert all(value in x for value in xs)
+
+
+@pytest.mark.skipif(numpy() is None, reason="NumPy is not installed")
+@pytest.mark.parametrize("n, threshold", ((5000, 100), (101, 100), (1000, 3), (7, 5)))
+def test_numpy_picks_the_same_points(n, threshold):
+    np = numpy()
+    x, y = [i * 1.5 for i in range(n)], series(n, seed=n)
+    expected = _lttb_python(x, y, threshold)
+    assert _lttb_numpy(np.asarray(x), np.asarray(y), threshold) == expected
+
+
+def test_sparkline_draws_at_most_one_point_per_pixel():
+    page = Page(style=False)
+    with page.body():
+        sparkline = page.ui.sparkline(series(100000), width=80)
+    assert sparkline.points == 80
+    points = re.search(r'points="([^"]*)"', str(page)).group(1)
+    assert len(points.split()) == 80
+
+
+def test_narrow_charts_are_still_downsampled():
+    page = Page(style=False)
+    with page.body():
+        sparkline = page.ui.sparkline(series(1000), width=2)
+        chart = page.ui.line_chart(series={"a": series(1000)}, width=50)
+    assert sparkline.points == 3
+    assert chart.points == 3
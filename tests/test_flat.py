@@ -0,0 +1,40 @@
+from contextlib import ExitStack
+import pytest
+from ugui import Page
+from ugui.html import AGGRESSIVE
+
+
+def build(page: Page) -> None:
+    with page.body():
+        with page.ul(cls="menu"):
+            for index in range(3):
+                page.li(f"item {index} < {index + 1}")
+        page.pre("  keep\n  spacing  ")
+        page.script("if (a < b && c) {}")
+        page.p("a & b")
+
+
+@pytest.mark.parametrize("minify", (True, False, AGGRESSIVE))
+def test_flat_matches_tree(minify):
+    tree, flat = Page(minify=minify), Page(minify=minify, flat=True)
+    build(tree)
+    build(flat)
+    assert str(flat) == str(tree)
+
+
+@pytest.mark.parametrize("minify", (True, False, AGGRESSIVE))
+def test_flat_script_is_not_escaped(minify):
+    page = Page(minify=minify, flat=True, style=False)
+    with page.body():
+        page.script("if (a < b && c) {}")
+    assert "if (a < b && c) {}" in str(page)
+
+
+def test_flat_renders_deep_nesting():
+    page = Page(flat=True, style=False)
+    with ExitStack() as stack:
+        stack.enter_context(page.body())
+        for _ in range(5000):
+            stack.enter_context(page.div())
+    # Deeper than the recursion limit, rendered without recursing
+    assert str(page).count("<div>") == 5000
@@ -0,0 +1,47 @@
+import re
+from ugui import Page
+
+
+def grid_classes(html: str) -> list:
+    return re.findall(r'<div class="(grid[^"]*)"', html)
+
+
+def test_grids_keep_their_own_layout():
+    page = Page()
+    with page.body():
+        with page.ui.grid(cols=3, gap="2rem"):
+            page.p("a")
+        with page.ui.grid(cols=2, min_width="10rem"):
+            page.p("b")
+    html = str(page)
+    first, second = [classes.split()[1] for classes in grid_classes(html)]
+    assert (
+        f".{first}{{grid-template-columns:repeat(3,minmax(250px,1fr));gap:2rem}}"
+        in html
+    )
+    assert (
+        f".{second}{{grid-template-columns:repeat(2,minmax(10rem,1fr));gap:1rem}}"
+        in html
+    )
+
+
+def test_default_grids_use_the_shared_rule():
+    page = Page()
+    with page.body():
+        with page.ui.grid():
+            page.p("a")
+    assert grid_classes(str(page)) == ["grid"]
+
+
+def test_same_parameters_share_a_class():
+    pages = []
+    for _ in range(2):
+        page = Page()
+        with page.body():
+            for _ in range(2):
+                with page.ui.grid(cols=4):
+                    page.p("a")
+        pages.append(str(page))
+    classes = grid_classes(pages[0]) + grid_classes(pages[1])
+    assert len(set(classes)) == 1
+    assert pages[0].count(f".{classes[0].split()[1]}{{") == 1
@@ -0,0 +1,104 @@
+import pytest
+from ugui import Markup, Page
+from ugui.html import AGGRESSIVE
+
+MINIFY = (True, False, AGGRESSIVE)
+
+
+def body(page: Page) -> str:
+    html = str(page)
+    return html[html.index("<body") :]
+
+
+@pytest.mark.parametrize("minify", MINIFY)
+def test_text_is_escaped(minify):
+    page = Page(minify=minify, style=False)
+    with page.body():
+        page.p("a < b & c")
+        page.a("link", href='/?q="x"&y=1')
+    html = body(page)
+    assert "a &lt; b &amp; c" in html
+    assert "&#34;x&#34;&amp;y=1" in html
+
+
+@pytest.mark.parametrize("minify", MINIFY)
+def test_markup_is_not_escaped(minify):
+    page = Page(minify=minify, style=False)
+    with page.body():
+        page.p(Markup("<b>bold</b>"))
+    assert "<b>bold</b>" in body(page)
+
+
+@pytest.mark.parametrize("minify", MINIFY)
+def test_script_text_is_not_escaped(minify):
+    page = Page(minify=minify, style=False)
+    with page.body():
+        page.script("if (a < b && c) {}")
+    assert "if (a < b && c) {}" in body(page)
+
+
+def test_aggressive_script_keeps_newlines():
+    page = Page(minify=AGGRESSIVE, style=False)
+    with page.body():
+        page.script("// comment\ngo()")
+    assert "// comment\ngo()" in body(page)
+
+
+def test_aggressive_drops_optional_syntax():
+    page = Page(minify=AGGRESSIVE, style=False)
+    with page.body():
+        with page.ul():
+            page.li("one")
+            page.li("two")
+        page.input(type="text", value="a b")
+        page.a("x", href="/a", title="it's")
+    assert body(page) == (
+        "<body><ul><li>one<li>two</ul>"
+        '<input type=text value="a b">'
+        "<a href=/a title=it&#39;s>x</a>"
+    )
+
+
+def test_aggressive_collapses_whitespace_outside_pre():
+    page = Page(minify=AGGRESSIVE, style=False)
+    with page.body():
+        page.p("a   lot\n of   space")
+        page.pre("  keep\n  this ")
+    assert "<p>a lot of space<pre>  keep\n  this </pre>" in body(page)
+
+
+def test_aggressive_keeps_end_tags_that_matter():
+    page = Page(minify=AGGRESSIVE, style=False)
+    with page.body():
+        with page.div():
+            page.p("text")
+            page.span("after")
+            page.p("last")
+        with page.a(href="/"):
+            page.p("link")
+    # A p followed by phrasing content, or last in an a, keeps its end tag
+    assert "<div><p>text</p><span>after</span><p>last</div>" in body(page)
+    assert "<a href=/><p>link</p></a>" in body(page)
+
+
+@pytest.mark.parametrize("flat", (False, True))
+def test_tree_shaking_sees_markup_children(flat):
+    page = Page(tree_shake=True, flat=flat)
+    page.style(".promo{color:red}.unused{color:blue}")
+    with page.body():
+        page.p(Markup('<span class="promo">Sale</span>'))
+    html = str(page)
+    assert ".promo{color:red}" in html
+    assert ".unused" not in html
+
+
+def test_tree_shaking_sees_markup_table_cells():
+    page = Page(tree_shake=True)
+    page.style(".promo{color:red}.unused{color:blue}")
+    with page.body():
+        page.ui.data_table(
+            rows=[("a", Markup('<b class="promo">1</b>'))], headers=["name", "n"]
+        )
+    html = str(page)
+    assert ".promo{color:red}" in html
+    assert ".unused" not in html
@@ -0,0 +1,34 @@
+import importlib.util
+import os
+import pytest
+from pathlib import Path
+
+# The checks live with the import benchmark, which is not a package
+spec = importlib.util.spec_from_file_location(
+    "imports_benchmark", Path(__file__).parent.parent / "benchmarks" / "imports.py"
+)
+benchmark = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(benchmark)
+
+
+def test_importing_loads_no_web_stack_or_component_pack():
+    assert benchmark.loaded_after("import ugui") == []
+
+
+def test_rendering_does_not_import_the_web_stack():
+    _, loaded = benchmark.measure()
+    assert loaded == []
+
+
+def test_importing_the_app_leaves_component_packs_unloaded():
+    assert benchmark.loaded_after("from ugui import App", benchmark.PACKS) == []
+
+
+@pytest.mark.skipif(
+    "UGUI_IMPORT_BUDGET_MS" not in os.environ,
+    reason="set UGUI_IMPORT_BUDGET_MS to check the import time",
+)
+def test_import_is_within_budget():
+    budget = float(os.environ["UGUI_IMPORT_BUDGET_MS"])
+    best = min(benchmark.measure()[0] for _ in range(3))
+    assert best < budget, f"import ugui took {best:.1f} ms"
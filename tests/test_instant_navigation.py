@@ -0,0 +1,115 @@
+import asyncio
+import re
+import pytest
+from ugui import App, Page
+from ugui.css import CSSRegistry
+from ugui.html import AGGRESSIVE, INSTANT_NAVIGATION_URL
+
+
+def make_app() -> App:
+    app = App(__name__, instant_navigation=True)
+
+    @app.page("/")
+    def index(page):
+        page.title("Home")
+        with page.body():
+            page.h1("Home")
+
+    @app.page("/cards")
+    def cards(page):
+        page.title("Cards")
+        with page.body():
+            page.ui.card(title="A card")
+
+    @app.page("/stream", stream=True)
+    def stream(page):
+        page.title("Stream")
+        with page.body():
+            page.ul(page.each(range(3), lambda item: page.li(str(item))))
+
+    app._register_pages()
+    return app
+
+
+def get(app, path, **headers):
+    async def request():
+        response = await app.test_client().get(path, headers=headers)
+        return response, await response.get_data(as_text=True)
+
+    return asyncio.run(request())
+
+
+def style_digests(html: str) -> str:
+    return " ".join(re.findall(r'data-ugui-styles="([^"]*)"', html))
+
+
+def test_full_page_loads_the_runtime():
+    response, html = get(make_app(), "/")
+    assert f'<script src="{INSTANT_NAVIGATION_URL}" defer></script>' in html
+    assert style_digests(html)
+    assert "X-Ugui-Partial" not in response.headers
+    assert response.headers["Vary"] == "X-Ugui-Partial, X-Ugui-Styles"
+
+
+def test_partial_page_has_no_head():
+    response, html = get(make_app(), "/cards", **{"X-Ugui-Partial": "1"})
+    assert response.headers["X-Ugui-Partial"] == "1"
+    assert response.headers["Vary"] == "X-Ugui-Partial, X-Ugui-Styles"
+    assert not html.startswith("<!DOCTYPE")
+    assert "<meta" not in html
+    assert "<title>Cards</title>" in html
+    assert "A card" in html
+
+
+def test_partial_page_skips_known_styles():
+    app = make_app()
+    _, home = get(app, "/")
+    known = style_digests(home)
+    _, everything = get(app, "/cards", **{"X-Ugui-Partial": "1"})
+    _, missing = get(app, "/cards", **{"X-Ugui-Partial": "1", "X-Ugui-Styles": known})
+    assert len(missing) < len(everything)
+    assert ".card" in missing
+    assert ":root" not in missing
+    assert not set(style_digests(missing).split()) & set(known.split())
+
+
+def test_partial_page_streams():
+    response, html = get(make_app(), "/stream", **{"X-Ugui-Partial": "1"})
+    assert response.headers["X-Ugui-Partial"] == "1"
+    assert html.endswith("<ul><li>0</li><li>1</li><li>2</li></ul></body>")
+
+
+@pytest.mark.parametrize("minify", (True, False, AGGRESSIVE))
+def test_render_partial_matches_full_body(minify):
+    page = Page(minify=minify)
+    page.title("Title")
+    with page.body():
+        page.p("text")
+    page.document.instant_navigation = True
+    page.document.known_styles = set(page.document.styles.digests())
+    partial = str(page)
+    assert "<style" not in partial
+    assert "Title" in partial and "text" in partial
+
+
+def test_registry_subsets_by_digest():
+    registry = CSSRegistry()
+    registry.add(".a{color:red}")
+    registry.add(".b{color:blue}")
+    first, second = registry.digests()
+    assert registry.without({first}).render(minify=True) == ".b{color:blue}"
+    assert registry.without({first, second}).digests() == []
+
+
+def test_off_by_default():
+    app = App(__name__)
+
+    @app.page("/")
+    def index(page):
+        page.p("text")
+
+    app._register_pages()
+    response, html = get(app, "/", **{"X-Ugui-Partial": "1"})
+    assert html.startswith("<!DOCTYPE")
+    assert INSTANT_NAVIGATION_URL not in html
+    assert "Vary" not in response.headers
@@ -0,0 +1,142 @@
+import asyncio
+import pytest
+from ugui import App, Page
+from ugui.html import AGGRESSIVE
+
+MINIFY = (True, False, AGGRESSIVE)
+ITEMS = ["one", "two < three", "four"]
+
+
+def eager(page: Page) -> None:
+    with page.body():
+        with page.ul():
+            for item in ITEMS:
+                page.li(item)
+        page.p("after")
+
+
+def lazy(page: Page) -> None:
+    with page.body():
+        page.ul(page.each(ITEMS, lambda item: page.li(item)))
+        page.p("after")
+
+
+async def collect(chunks) -> str:
+    return "".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.parametrize("flat", (False, True))
+@pytest.mark.parametrize("minify", MINIFY)
+def test_lazy_children_match_the_eager_tree(minify, flat):
+    expected, page = Page(minify=minify), Page(minify=minify, flat=flat)
+    eager(expected)
+    lazy(page)
+    assert str(page) == str(expected)
+
+
+@pytest.mark.parametrize("minify", MINIFY)
+def test_astream_matches_str(minify):
+    expected, page = Page(minify=minify), Page(minify=minify)
+    eager(expected)
+    lazy(page)
+    assert asyncio.run(collect(page.document.astream(chunk_size=64))) == str(expected)
+
+
+def test_generators_are_consumed_while_rendering():
+    read = []
+
+    def items():
+        for item in ITEMS:
+            read.append(item)
+            yield item
+
+    page = Page(style=False)
+    with page.body():
+        page.ol(items())
+    assert read == []
+    assert "<ol>onetwo &lt; threefour</ol>" in str(page)
+    assert read == ITEMS
+
+
+async def slow_items():
+    for item in ITEMS:
+        await asyncio.sleep(0)
+        yield item
+
+
+def test_async_sources_that_suspend_need_astream():
+    page = Page(style=False)
+    with page.body():
+        page.ol(page.each(slow_items(), lambda item: page.li(item)))
+    with pytest.raises(TypeError, match="astream"):
+        str(page)
+
+    page = Page(style=False)
+    with page.body():
+        page.ol(page.each(slow_items(), lambda item: page.li(item)))
+    html = asyncio.run(collect(page.document.astream()))
+    assert "<ol><li>one</li><li>two &lt; three</li><li>four</li></ol>" in html
+
+
+def test_streamed_pages_send_the_whole_document():
+    app = App(__name__)
+
+    @app.page("/", stream=True)
+    def index(page):
+        with page.body():
+            page.ol(page.each(slow_items(), lambda item: page.li(item)))
+
+    app._register_pages()
+
+    async def get():
+        response = await app.test_client().get("/")
+        return response.status_code, await response.get_data(as_text=True)
+
+    status, html = asyncio.run(get())
+    assert status == 200
+    assert "<li>four</li></ol>" in html and html.endswith("</html>")
+
+
+def mixed(page: Page) -> None:
+    with page.body():
+        with page.div(cls="box"):
+            page.p("first   paragraph")
+            page.p("second")
+            with page.ul():
+                page.li("a")
+                page.li("b")
+            page.span("  ")
+        page.div()
+        page.pre("  keep\n  spacing ")
+        page.p("last")
+
+
+@pytest.mark.parametrize("flat", (False, True))
+@pytest.mark.parametrize("minify", MINIFY)
+def test_iter_html_joins_to_render(minify, flat):
+    page = Page(minify=minify, flat=flat, style=False)
+    mixed(page)
+    for node in page.document.children:
+        expected = node.render(0, 2, minify)
+        assert "".join(node.iter_html(0, 2, minify)) == expected
+
+
+@pytest.mark.parametrize("flat", (False, True))
+@pytest.mark.parametrize("minify", (True, AGGRESSIVE))
+def test_large_subtrees_are_streamed_in_pieces(minify, flat):
+    page = Page(minify=minify, flat=flat, style=False)
+    with page.body():
+        with page.div():
+            with page.ul():
+                for index in range(20000):
+                    page.li(f"item {index}")
+    chunks = []
+
+    async def stream():
+        async for chunk in page.document.astream(chunk_size=4096):
+            chunks.append(chunk)
+
+    asyncio.run(stream())
+    assert "".join(chunks) == str(page)
+    assert len(chunks) > 10
+    assert max(map(len, chunks)) < len(str(page)) / 5
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from ugui.loader import Loader
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_loads_in_one_batch():
+    calls = []
+
+    async def batch(keys):
+        calls.append(keys)
+        return [key * 2 for key in keys]
+
+    async def main():
+        loader = Loader(batch)
+        return await asyncio.gather(*(loader.load(key) for key in (1, 2, 3, 2)))
+
+    assert run(main()) == [2, 4, 6, 4]
+    assert calls == [[1, 2, 3]]
+
+
+def test_max_batch_size_and_mapping_results():
+    calls = []
+
+    def batch(keys):
+        calls.append(keys)
+        return {key: str(key) for key in keys if key != 3}
+
+    async def main():
+        loader = Loader(batch, max_batch_size=2)
+        return await loader.load_many([1, 2, 3])
+
+    assert run(main()) == ["1", "2", None]
+    assert calls == [[1, 2], [3]]
+
+
+def test_values_are_cached():
+    calls = []
+
+    async def batch(keys):
+        calls.append(keys)
+        return keys
+
+    async def main():
+        loader = Loader(batch)
+        loader.prime("primed", "value")
+        first = await loader.load("a")
+        again = await loader.load("a")
+        return first, again, await loader.load("primed")
+
+    assert run(main()) == ("a", "a", "value")
+    assert calls == [["a"]]
+
+
+def test_exceptions_are_per_key_and_not_cached():
+    attempts = []
+
+    async def batch(keys):
+        attempts.append(keys)
+        if len(attempts) == 1:
+            raise RuntimeError("down")
+        return [KeyError(key) if key == "bad" else key for key in keys]
+
+    async def main():
+        loader = Loader(batch)
+        with pytest.raises(RuntimeError):
+            await loader.load("a")
+        results = await asyncio.gather(
+            loader.load("a"), loader.load("bad"), return_exceptions=True
+        )
+        return results
+
+    good, bad = run(main())
+    assert good == "a"
+    assert isinstance(bad, KeyError)
+
+
+def test_cancelled_waiter_leaves_others_loading():
+    async def batch(keys):
+        await asyncio.sleep(0.01)
+        return keys
+
+    async def main():
+        loader = Loader(batch)
+        cancelled = asyncio.ensure_future(loader.load("key"))
+        waiting = asyncio.ensure_future(loader.load("key"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        value = await waiting
+        return value, await loader.load("key"), cancelled.cancelled()
+
+    assert run(main()) == ("key", "key", True)
+
+
+def test_timed_out_load_does_not_poison_the_key():
+    async def batch(keys):
+        await asyncio.sleep(0.02)
+        return keys
+
+    async def main():
+        loader = Loader(batch)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(loader.load("key"), 0.001)
+        return await loader.load("key")
+
+    assert run(main()) == "key"
+
+
+def test_failed_batch_keeps_a_key_primed_meanwhile():
+    calls = []
+
+    async def batch(keys):
+        calls.append(keys)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("down")
+
+    async def main():
+        loader = Loader(batch)
+        failing = asyncio.ensure_future(loader.load("key"))
+        await asyncio.sleep(0)
+        loader.clear("key")
+        loader.prime("key", "fresh")
+        with pytest.raises(RuntimeError):
+            await failing
+        return await loader.load("key")
+
+    assert run(main()) == "fresh"
+    assert calls == [["key"]]
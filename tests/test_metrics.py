@@ -0,0 +1,56 @@
+import asyncio
+from ugui import App
+from ugui.metrics import Histogram, MetricsRegistry, RenderTimer
+
+
+def make_app() -> App:
+    app = App(__name__, metrics=True)
+
+    @app.page("/")
+    def index(page):
+        with page.body():
+            page.h1("Hello")
+
+    app._register_pages()
+    return app
+
+
+def get(app, path):
+    async def request():
+        response = await app.test_client().get(path)
+        return response, await response.get_data(as_text=True)
+
+    return asyncio.run(request())
+
+
+def test_pages_send_server_timing():
+    response, html = get(make_app(), "/")
+    timing = response.headers["Server-Timing"]
+    for phase in ("page", "build", "css", "html"):
+        assert f"{phase};desc=" in timing
+    assert f'size;desc="{len(html.encode())} bytes"' in timing
+
+
+def test_metrics_endpoint_has_route_histograms():
+    app = make_app()
+    get(app, "/")
+    get(app, "/")
+    _, text = get(app, "/_ugui/metrics")
+    assert 'ugui_render_seconds_count{route="/",phase="page"} 2' in text
+    assert 'ugui_response_bytes_bucket{route="/",le="+Inf"} 2' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("1", 2), ("10", 3), ("+Inf", 4)]
+    assert (histogram.count, histogram.sum) == (4, 56.5)
+
+
+def test_route_labels_are_escaped():
+    registry = MetricsRegistry()
+    timer = RenderTimer()
+    timer.add("page", 0.001)
+    registry.observe('/a"b', timer)
+    assert 'route="/a\\"b",phase="page"' in registry.render()
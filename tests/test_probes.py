@@ -0,0 +1,114 @@
+import asyncio
+import tracemalloc
+import pytest
+from ugui import App
+from ugui.probes import CPUProbe, MemoryProbe, Probe
+
+
+def make_app() -> App:
+    app = App(__name__, admin_token="secret")
+
+    @app.page("/")
+    def index(page):
+        with page.body():
+            for index in range(200):
+                page.p(f"paragraph {index}")
+
+    app._register_pages()
+    return app
+
+
+def run_probe(app, mode):
+    async def main():
+        client = app.test_client()
+        auth = {"Authorization": "Bearer secret"}
+        armed = await client.post(f"/_ugui/profile?route=/&mode={mode}", headers=auth)
+        assert armed.status_code == 202
+        page = await client.get("/")
+        assert page.status_code == 200
+        report = await client.get("/_ugui/profile?route=/", headers=auth)
+        return report.status_code, await report.get_data(as_text=True)
+
+    return asyncio.run(main())
+
+
+def test_probe_is_abstract():
+    with pytest.raises(TypeError):
+        Probe("/")
+
+
+def test_cpu_probe_reports_by_module():
+    status, report = run_probe(make_app(), "cpu")
+    assert status == 200
+    assert "cProfile of 1 request(s) to '/'" in report
+    assert "html.py" in report
+
+
+def test_memory_probe_reports_by_module():
+    status, report = run_probe(make_app(), "memory")
+    assert status == 200
+    assert "tracemalloc of 1 request(s) to '/'" in report
+    assert "html.py" in report
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_probe_leaves_host_tracing_running():
+    tracemalloc.start()
+    try:
+        status, report = run_probe(make_app(), "memory")
+        assert status == 200
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_probe_endpoint_needs_the_token():
+    async def main():
+        response = await make_app().test_client().post("/_ugui/profile?route=/")
+        return response.status_code
+
+    assert asyncio.run(main()) == 403
+
+
+@pytest.mark.parametrize("probe", [CPUProbe, MemoryProbe])
+def test_probe_counts_requests(probe):
+    instance = probe("/", requests=2)
+    assert instance.acquire()
+    assert not instance.acquire()
+    instance.release()
+    assert not instance.done
+
+
+@pytest.mark.parametrize("mode", ("memory", "cpu"))
+def test_one_request_is_probed_at_a_time(mode):
+    app = App(__name__)
+    started = []
+
+    async def overlapping(page):
+        started.append(page)
+        # Both requests are inside their page functions before either renders
+        while len(started) < 2:
+            await asyncio.sleep(0)
+        page.p("text")
+
+    @app.page("/a")
+    async def first_page(page):
+        await overlapping(page)
+
+    @app.page("/b")
+    async def second_page(page):
+        await overlapping(page)
+    app._register_pages()
+    first, second = app.probe("/a", mode=mode), app.probe("/b", mode=mode)
+
+    async def main():
+        client = app.test_client()
+        return await asyncio.gather(client.get("/a"), client.get("/b"))
+
+    responses = asyncio.run(main())
+    assert [response.status_code for response in responses] == [200, 200]
+    assert first.completed + second.completed == 1
+    assert not tracemalloc.is_tracing()
+    # Released, so the other route is probed by its next request
+    assert Probe._running.acquire(blocking=False)
+    Probe._running.release()
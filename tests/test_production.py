@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import pytest
+from ugui import App
+from ugui.html import Element, defaults
+
+
+@pytest.fixture
+def validate():
+    """Restore validation, production warm-up turns it off"""
+    yield
+    defaults.validate = True
+
+
+def make_app(**options) -> App:
+    app = App(__name__, **options)
+
+    @app.page("/")
+    def index(page):
+        with page.body():
+            page.document.append(Element("madeup"))
+
+    @app.page("/about")
+    def about(page):
+        page.p("about")
+
+    app._register_pages()
+    return app
+
+
+def test_page_endpoints_are_named_after_the_page_function():
+    app = make_app()
+    rules = {rule.rule: rule.endpoint for rule in app.url_map.iter_rules()}
+    assert rules["/"] == "index"
+    assert rules["/about"] == "about"
+
+
+def test_mode_defaults_to_development(monkeypatch):
+    monkeypatch.delenv("UGUI_MODE", raising=False)
+    assert not make_app().production
+    monkeypatch.setenv("UGUI_MODE", "production")
+    assert make_app().production
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        App(__name__, mode="prod")
+
+
+def test_warm_up_validates_tags_seen_before(validate, caplog):
+    app = make_app(mode="production")
+    # Built once with validation off, which caches the tag name
+    defaults.validate = False
+    Element("madeup")
+    with caplog.at_level(logging.WARNING, logger="ugui.app"):
+        asyncio.run(app._warm_up())
+    assert "/: Unknown tag 'madeup'" in caplog.text
+    assert defaults.validate is False
+
+
+def test_warm_up_logs_failing_pages(validate, caplog):
+    app = make_app(mode="production")
+
+    @app.page("/broken")
+    def broken(page):
+        raise RuntimeError("broken")
+
+    with caplog.at_level(logging.ERROR, logger="ugui.app"):
+        asyncio.run(app._warm_up())
+    assert "Rendering '/broken' at startup failed" in caplog.text
@@ -0,0 +1,77 @@
+import asyncio
+from ugui import App, Page
+from ugui.profiler import ComponentProfiler
+
+
+def build(page: Page) -> None:
+    with page.body():
+        with page.div():
+            with page.div():
+                page.p("nested")
+        page.ui.button("Go", material_icon="send")
+
+
+def profiled() -> tuple:
+    profiler = ComponentProfiler()
+    page = Page(profiler=profiler)
+    build(page)
+    return profiler, str(page)
+
+
+def test_profiling_does_not_change_the_page():
+    page = Page()
+    build(page)
+    _, html = profiled()
+    assert html == str(page)
+
+
+def test_self_bytes_add_up_to_the_page():
+    profiler, html = profiled()
+    stats = profiler.stats
+    assert sum(s.self_bytes for s in stats.values()) == len(html.encode())
+    assert stats["(document)"].total_bytes == len(html.encode())
+
+
+def test_nested_elements_are_counted_once_in_totals():
+    profiler, html = profiled()
+    divs = profiler.stats["<div>"]
+    assert divs.count == 2
+    outer = html[html.index("<div>") : html.index("</div></div>") + 12]
+    assert divs.total_bytes == len(outer.encode())
+    assert divs.self_bytes == len("<div></div><div></div>")
+
+
+def test_components_are_keyed_by_class():
+    profiler, _ = profiled()
+    assert profiler.stats["Button"].count == 1
+    assert profiler.stats["Button"].build > 0
+    assert "Button" in profiler.report(sort="build")
+
+
+def test_profiles_merge():
+    first, _ = profiled()
+    second, _ = profiled()
+    first.merge(second)
+    assert first.pages == 2
+    assert first.stats["<div>"].count == 4
+
+
+def test_endpoint_rejects_unknown_sort_columns():
+    app = App(__name__, component_profile=True)
+
+    @app.page("/")
+    def index(page):
+        build(page)
+
+    app._register_pages()
+
+    async def requests():
+        client = app.test_client()
+        await client.get("/")
+        report = await client.get("/_ugui/components?sort=nodes")
+        bad = await client.get("/_ugui/components?sort=nope")
+        return await report.get_data(as_text=True), bad.status_code
+
+    report, status = asyncio.run(requests())
+    assert report.startswith("# /\n1 page(s), sorted by nodes")
+    assert status == 400
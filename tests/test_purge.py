@@ -0,0 +1,85 @@
+import asyncio
+import json
+import logging
+import re
+from ugui import App
+from ugui.css import SelectorUsage, purge_css
+from ugui.purge import purge_stylesheets
+
+CSS = """/*! License */
+:root { --used: red; --unused: blue; --theme-accent: green }
+.card { color: var(--used) }
+.modal-is-open { overflow: hidden }
+.nav a { color: red }
+p { margin: 0 }
+[data-theme=dark] { color: #fff }
+"""
+
+
+def usage(html: str) -> SelectorUsage:
+    usage = SelectorUsage()
+    usage.add_markup(html)
+    return usage
+
+
+def test_unused_rules_and_properties_are_dropped():
+    purged = purge_css(CSS, usage('<div class="card"><p>x</p></div>'))
+    assert (
+        purged == "/*! License */\n:root{--used:red}.card{color:var(--used)}p{margin:0}"
+    )
+
+
+def test_safelist_keeps_selectors_patterns_and_properties():
+    safelist = ["[data-theme]", re.compile("^modal-"), re.compile("^--theme-")]
+    purged = purge_css(CSS, usage("<p>x</p>"), safelist)
+    assert ".modal-is-open{overflow:hidden}" in purged
+    assert "[data-theme=dark]{color:#fff}" in purged
+    assert "--theme-accent:green" in purged
+    assert ".card" not in purged and "--unused" not in purged
+
+
+def test_apps_link_the_purged_copies(tmp_path):
+    (tmp_path / "site.css").write_text(CSS)
+    app = App(__name__, static_folder=str(tmp_path))
+
+    @app.page("/", style="/static/site.css")
+    def index(page):
+        with page.body():
+            page.div("card", cls="card")
+
+    app._register_pages()
+
+    async def purge_and_get():
+        stylesheets = await purge_stylesheets(app)
+        response = await app.test_client().get("/")
+        return stylesheets, await response.get_data(as_text=True)
+
+    stylesheets, html = asyncio.run(purge_and_get())
+    purged = stylesheets["/static/site.css"]
+    assert re.fullmatch(r"/static/purged/site\.[0-9a-f]+\.css", purged)
+    assert f'href="{purged}"' in html
+    manifest = json.loads((tmp_path / "purged" / "manifest.json").read_text())
+    assert manifest == stylesheets
+    text = (tmp_path / purged.removeprefix("/static/")).read_text()
+    assert ".card{" in text and ".nav" not in text
+
+    # A later app loads the manifest instead of purging again
+    relaunched = App(__name__, static_folder=str(tmp_path), purged_css=True)
+    relaunched._register_pages()
+    assert relaunched.stylesheet_map == stylesheets
+
+
+def test_purging_logs_instead_of_printing(tmp_path, capsys, caplog):
+    (tmp_path / "site.css").write_text(CSS)
+    app = App(__name__, static_folder=str(tmp_path), purged_css=True)
+
+    @app.page("/", style="/static/site.css")
+    def index(page):
+        page.p("text")
+
+    with caplog.at_level(logging.INFO, logger="ugui.purge"):
+        app._register_pages()
+        asyncio.run(purge_stylesheets(app))
+    assert capsys.readouterr().out == ""
+    assert "No purged stylesheets" in caplog.text
+    assert "/static/site.css: " in caplog.text
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+import textwrap
+import pytest
+from ugui.reload import SCRIPT, Reloader
+
+MODULE = "ugui_reload_pages"
+
+
+# Set up like an extension's init_app, once per run of the module
+EXTENSION = """
+def stamp(response):
+    response.headers["X-Stamp"] = response.headers.get("X-Stamp", "") + "+"
+    return response
+
+app.after_request(stamp)
+"""
+
+
+def write_pages(path, pages: dict, setup: str = "") -> None:
+    source = "from ugui import App\n\napp = App(__name__)\n" + setup
+    for route, text in pages.items():
+        name = route.strip("/") or "index"
+        source += textwrap.dedent(f"""
+
+            @app.page({route!r})
+            def {name}(page):
+                page.p({text!r})
+            """)
+    path.write_text(source)
+
+
+@pytest.fixture
+def pages(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    path = tmp_path / f"{MODULE}.py"
+    write_pages(path, {"/": "one", "/old": "old"}, EXTENSION)
+    module = __import__(MODULE)
+    module.app._register_pages()
+    reloader = Reloader(module.app)
+    module.app._reloader = reloader
+    reloader.install()
+    yield module.app, reloader, path
+    sys.modules.pop(MODULE, None)
+
+
+def get(app, path):
+    async def request():
+        response = await app.test_client().get(path)
+        return response.status_code, await response.get_data(as_text=True)
+
+    return asyncio.run(request())
+
+
+def test_pages_include_the_reload_script(pages):
+    app, reloader, _ = pages
+    status, html = get(app, "/")
+    assert status == 200
+    assert SCRIPT.format(url=reloader.url) in html
+
+
+def test_reload_replaces_adds_and_removes_pages(pages):
+    app, reloader, path = pages
+    assert get(app, "/old")[0] == 200
+
+    write_pages(path, {"/": "two", "/new": "new"})
+    assert reloader.reload(str(path), MODULE)
+    assert "two" in get(app, "/")[1]
+    assert get(app, "/new")[0] == 200
+    assert get(app, "/old")[0] == 404
+    assert [route for route, _ in app._pages] == ["/", "/new"]
+
+    write_pages(path, {"/": "three", "/new": "new", "/old": "back"})
+    assert reloader.reload(str(path), MODULE)
+    status, html = get(app, "/old")
+    assert status == 200 and "back" in html
+
+
+def test_failed_reload_keeps_the_old_pages(pages):
+    app, reloader, path = pages
+    path.write_text("raise RuntimeError('broken')\n")
+    assert not reloader.reload(str(path), MODULE)
+    assert "one" in get(app, "/")[1]
+    assert get(app, "/old")[0] == 200
+
+
+def test_check_reloads_changed_modules(pages):
+    app, reloader, path = pages
+    assert not reloader.check()
+    write_pages(path, {"/": "changed", "/old": "old"})
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert reloader.check()
+    assert "changed" in get(app, "/")[1]
+
+
+def test_reload_does_not_repeat_app_setup(pages):
+    app, reloader, path = pages
+    write_pages(path, {"/": "two", "/old": "old"}, EXTENSION)
+    assert reloader.reload(str(path), MODULE)
+    assert reloader.reload(str(path), MODULE)
+
+    async def request():
+        response = await app.test_client().get("/")
+        return response.headers["X-Stamp"], await response.get_data(as_text=True)
+
+    stamp, html = asyncio.run(request())
+    assert stamp == "+"
+    assert "two" in html
+    # Pages and other module code keep using the running app
+    assert sys.modules[MODULE].app is app
@@ -0,0 +1,88 @@
+import asyncio
+import re
+import pytest
+from ugui import App
+from ugui.components.og.virtual_table import VirtualTable
+
+ROWS = [(f"item {index}", index * 1.5) for index in range(120)]
+
+
+def make_app() -> App:
+    app = App(__name__)
+
+    @app.table_source(
+        "items", headers=["Name", "Price"], page_size=50, formats={"Price": ".2f"}
+    )
+    def items(offset, limit, sort=None, filter=None):
+        rows = ROWS
+        if filter:
+            rows = [row for row in rows if filter in row[0]]
+        if sort:
+            column = ["Name", "Price"].index(sort.removeprefix("-"))
+            rows = sorted(rows, key=lambda row: row[column], reverse=sort[0] == "-")
+        return rows[offset : offset + limit]
+
+    @app.page("/")
+    def index(page):
+        with page.body():
+            page.document.append(VirtualTable(source=items))
+
+    app._register_pages()
+    return app
+
+
+def get(app, path):
+    async def request():
+        response = await app.test_client().get(path)
+        return response, await response.get_data(as_text=True)
+
+    return asyncio.run(request())
+
+
+def test_first_window_is_rendered():
+    _, html = get(make_app(), "/")
+    assert html.count("<tr>") == 51
+    assert 'data-next="50"' in html
+    assert "<td>1.50</td>" in html
+
+
+def test_scrolled_rows_use_the_source_formats():
+    response, html = get(make_app(), "/_ugui/table/items?next=50&limit=2")
+    assert response.status_code == 200
+    assert (
+        html
+        == "<tr><td>item 50</td><td>75.00</td></tr><tr><td>item 51</td><td>76.50</td></tr>"
+    )
+    assert response.headers["X-Ugui-Next"] == "52"
+
+
+def test_last_window_ends_the_table():
+    response, html = get(make_app(), "/_ugui/table/items?next=100&limit=50")
+    assert html.count("<tr>") == 20
+    assert response.headers["X-Ugui-Next"] == ""
+
+
+def test_sort_and_filter_reach_the_source():
+    _, html = get(make_app(), "/_ugui/table/items?sort=-Price&q=item+1&limit=1")
+    assert html == "<tr><td>item 119</td><td>178.50</td></tr>"
+
+
+@pytest.mark.parametrize(
+    "query", ["limit=0", "limit=-5", "limit=x", "next=x", "sort=Unknown"]
+)
+def test_invalid_requests_are_rejected(query):
+    response, _ = get(make_app(), f"/_ugui/table/items?{query}")
+    assert response.status_code == 400
+
+
+def test_numeric_columns_are_declared_on_the_source():
+    app = App(__name__)
+
+    @app.table_source("prices", headers=["Name", "Price"], numeric=["Price"])
+    async def prices(offset, limit):
+        return []
+
+    table = VirtualTable(source=prices)
+    assert "td:nth-child(2)" in table.instance_style()
+    with pytest.raises(TypeError):
+        VirtualTable(source=prices, formats={"Price": ".2f"})